@@ -7,10 +7,16 @@ from google.adk.agents import LlmAgent
 from google.adk.models.lite_llm import LiteLlm
 
 from dwight_schrute.config import settings  # pylint: disable=E0401
+from dwight_schrute.tools.async_db_tools import (  # pylint: disable=E0401
+    AsyncDatabaseTools,
+)
 from dwight_schrute.tools.db_tools import DatabaseTools  # pylint: disable=E0401
 
 
-database_tool_set = DatabaseTools(
+database_tools_class = (
+    AsyncDatabaseTools if settings.use_async_database_tools else DatabaseTools
+)
+database_tool_set = database_tools_class(
     database_url=settings.app_database_url,
 )
 
@@ -25,6 +31,7 @@ root_agent = LlmAgent(
         database_tool_set.get_schema_description,
         database_tool_set.get_user_by_username,
         database_tool_set.get_user_by_email,
+        database_tool_set.search_users,
         database_tool_set.count_users,
         database_tool_set.get_subscription_pricing,
         database_tool_set.count_subscriptions_by_status,
@@ -32,7 +39,11 @@ root_agent = LlmAgent(
         database_tool_set.compare_revenue,
         database_tool_set.calculate_mrr,
         database_tool_set.calculate_churn_rate,
+        database_tool_set.forecast_revenue,
+        database_tool_set.get_plan_unit_economics,
+        database_tool_set.get_billing_history,
         database_tool_set.export_invoices_to_gcs,
         database_tool_set.export_user_subscriptions_to_gcs,
+        database_tool_set.run_readonly_query,
     ],
 )
@@ -60,6 +60,85 @@ class AgentConfig:
     model_id: str = field(
         default_factory=lambda: os.getenv("DWIGHT_MODEL_ID", "gemini-2.5-flash")
     )
+
+    # --> Analytics result cache
+    result_cache_max_entries: int = field(
+        default_factory=lambda: int(os.getenv("DWIGHT_RESULT_CACHE_MAX_ENTRIES", "512"))
+    )
+    result_cache_closed_ttl_seconds: float = field(
+        default_factory=lambda: float(
+            os.getenv("DWIGHT_RESULT_CACHE_CLOSED_TTL_SECONDS", "300")
+        )
+    )
+    result_cache_open_ttl_seconds: float = field(
+        default_factory=lambda: float(
+            os.getenv("DWIGHT_RESULT_CACHE_OPEN_TTL_SECONDS", "60")
+        )
+    )
+
+    # --> Ad-hoc read-only SQL admission limits
+    sql_max_plan_cost: float = field(
+        default_factory=lambda: float(os.getenv("DWIGHT_SQL_MAX_PLAN_COST", "100000"))
+    )
+    sql_statement_timeout_ms: int = field(
+        default_factory=lambda: int(os.getenv("DWIGHT_SQL_STATEMENT_TIMEOUT_MS", "5000"))
+    )
+    sql_max_result_rows: int = field(
+        default_factory=lambda: int(os.getenv("DWIGHT_SQL_MAX_RESULT_ROWS", "200"))
+    )
+    sql_max_result_bytes: int = field(
+        default_factory=lambda: int(os.getenv("DWIGHT_SQL_MAX_RESULT_BYTES", "65536"))
+    )
+
+    # --> Approximate counts
+    approximate_count_sample_size: int = field(
+        default_factory=lambda: int(
+            os.getenv("DWIGHT_APPROXIMATE_COUNT_SAMPLE_SIZE", "4000")
+        )
+    )
+
+    # --> Fuzzy user search
+    user_search_default_limit: int = field(
+        default_factory=lambda: int(os.getenv("DWIGHT_USER_SEARCH_DEFAULT_LIMIT", "5"))
+    )
+    user_search_max_limit: int = field(
+        default_factory=lambda: int(os.getenv("DWIGHT_USER_SEARCH_MAX_LIMIT", "20"))
+    )
+
+    # --> Revenue forecasting
+    forecast_default_horizon_days: int = field(
+        default_factory=lambda: int(os.getenv("DWIGHT_FORECAST_DEFAULT_HORIZON_DAYS", "30"))
+    )
+    forecast_max_horizon_days: int = field(
+        default_factory=lambda: int(os.getenv("DWIGHT_FORECAST_MAX_HORIZON_DAYS", "180"))
+    )
+    forecast_anomaly_window_days: int = field(
+        default_factory=lambda: int(os.getenv("DWIGHT_FORECAST_ANOMALY_WINDOW_DAYS", "28"))
+    )
+    forecast_anomaly_threshold: float = field(
+        default_factory=lambda: float(os.getenv("DWIGHT_FORECAST_ANOMALY_THRESHOLD", "3.5"))
+    )
+
+    # --> Billing history pagination
+    billing_history_default_page_size: int = field(
+        default_factory=lambda: int(
+            os.getenv("DWIGHT_BILLING_HISTORY_DEFAULT_PAGE_SIZE", "10")
+        )
+    )
+    billing_history_max_page_size: int = field(
+        default_factory=lambda: int(os.getenv("DWIGHT_BILLING_HISTORY_MAX_PAGE_SIZE", "50"))
+    )
+
+    # --> Billing batch jobs
+    batch_job_chunk_size: int = field(
+        default_factory=lambda: int(os.getenv("DWIGHT_BATCH_JOB_CHUNK_SIZE", "50000"))
+    )
+
+    # --> Tool implementation
+    use_async_database_tools: bool = field(
+        default_factory=lambda: os.getenv("DWIGHT_ASYNC_DB_TOOLS", "true").lower()
+        in ("1", "true", "yes")
+    )
     # <-- End of agent specific settings
 
 
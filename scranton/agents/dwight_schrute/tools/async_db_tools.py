@@ -0,0 +1,959 @@
+"""
+This module contains an asynchronous version of the database tools.
+
+AsyncDatabaseTools exposes the same tools, signatures and response shapes as
+DatabaseTools, but runs on SQLAlchemy's async engine (aiosqlite / asyncpg) so that
+database round trips do not block the agent runner. Independent queries inside a
+tool run concurrently.
+"""
+
+import asyncio
+import csv
+import logging
+import os
+import tempfile
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import func, select
+from google.cloud import storage
+
+from dwight_schrute.config import settings  # pylint: disable=E0401
+from dwight_schrute.tools.database.async_client import (  # pylint: disable=E0401
+    AsyncORMDBClient,
+)
+from dwight_schrute.tools.database.fast_count import (  # pylint: disable=E0401
+    estimate_count,
+)
+from dwight_schrute.tools.database.forecasting import (  # pylint: disable=E0401
+    daily_series_query,
+)
+from dwight_schrute.tools.database.models import (  # pylint: disable=E0401
+    User,
+    Subscription,
+    UserSubscription,
+    Invoice,
+    SubscriptionStatus,
+)
+from dwight_schrute.tools.database.pagination import (  # pylint: disable=E0401
+    decode_cursor,
+)
+from dwight_schrute.tools.database.result_cache import (  # pylint: disable=E0401
+    watermark_query,
+)
+from dwight_schrute.tools.database.unit_economics import (  # pylint: disable=E0401
+    unit_economics_table,
+)
+from dwight_schrute.tools.db_tools import DatabaseTools  # pylint: disable=E0401
+
+
+logger = logging.getLogger(__name__)
+
+
+def _same_doc(sync_method: Callable) -> Callable:
+    """
+    Reuse the synchronous tool's docstring, which the agent sees as the tool description.
+    """
+
+    def decorator(method: Callable) -> Callable:
+        method.__doc__ = sync_method.__doc__
+        return method
+
+    return decorator
+
+
+class AsyncDatabaseTools(DatabaseTools):
+    """
+    An asynchronous drop-in replacement for DatabaseTools.
+    """
+
+    async def _scalar(self, stmt) -> Any:
+        """
+        Run a scalar query on its own session, so several can run concurrently.
+        """
+        async with AsyncORMDBClient(self.database_url) as db:
+            return await db.scalar(stmt)
+
+    async def _rows(self, stmt) -> List[Any]:
+        """
+        Run a query on its own session and fetch all rows.
+        """
+        async with AsyncORMDBClient(self.database_url) as db:
+            return (await db.execute(stmt)).all()
+
+    async def _estimate_count(self, table, criteria, range_columns) -> Dict[str, Any]:
+        """
+        Run the statistics-based count estimate on the async connection.
+        """
+        async with AsyncORMDBClient(self.database_url) as db:
+            return await db.session.run_sync(
+                lambda session: estimate_count(
+                    session.connection(),
+                    table,
+                    criteria,
+                    range_columns=range_columns,
+                    sample_size=settings.approximate_count_sample_size,
+                )
+            )
+
+    async def _watermark(self) -> tuple:
+        async with AsyncORMDBClient(self.database_url) as db:
+            return tuple((await db.execute(watermark_query())).one())
+
+    # <-- Methods for interacting with Users -->
+    @_same_doc(DatabaseTools.get_user_by_username)
+    async def get_user_by_username(self, username: str) -> Dict[str, Any]:
+        try:
+            async with AsyncORMDBClient(self.database_url) as db:
+                user = (
+                    await db.execute(select(User).filter_by(username=username.lower()))
+                ).scalar_one_or_none()
+                if not user:
+                    return {
+                        "status": "error",
+                        "message": f"User with username '{username}' not found.",
+                        "results": {},
+                    }
+                return {
+                    "status": "success",
+                    "message": "User retrieved successfully",
+                    "results": {
+                        "user_id": user.id,
+                        "username": user.username,
+                        "email": user.email,
+                        "created_at": str(user.created_at.isoformat()),
+                    },
+                }
+        except Exception as e:
+            logger.error("Error retrieving user by username: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
+
+    @_same_doc(DatabaseTools.get_user_by_email)
+    async def get_user_by_email(self, email: str) -> Dict[str, Any]:
+        try:
+            async with AsyncORMDBClient(self.database_url) as db:
+                user = (
+                    await db.execute(select(User).filter_by(email=email.lower()))
+                ).scalar_one_or_none()
+                if not user:
+                    return {
+                        "status": "error",
+                        "message": f"User with email '{email}' not found.",
+                        "results": {},
+                    }
+                return {
+                    "status": "success",
+                    "message": "User retrieved successfully",
+                    "results": {
+                        "user_id": user.id,
+                        "username": user.username,
+                        "email": user.email,
+                        "created_at": str(user.created_at.isoformat()),
+                    },
+                }
+        except Exception as e:
+            logger.error("Error retrieving user by email: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
+
+    @_same_doc(DatabaseTools.search_users)
+    async def search_users(
+        self, query: str, limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        # The index check and the match run a single statement each, so the
+        # synchronous path runs in a worker thread.
+        return await asyncio.to_thread(super().search_users, query, limit)
+
+    @_same_doc(DatabaseTools.count_users)
+    async def count_users(
+        self,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        approximate: bool = True,
+    ) -> Dict[str, Any]:
+        try:
+            try:
+                created_after = (
+                    self._validate_and_convert_datetime(created_after)
+                    if created_after
+                    else None
+                )
+                created_before = (
+                    self._validate_and_convert_datetime(created_before)
+                    if created_before
+                    else None
+                )
+            except ValueError as ve:
+                return {
+                    "status": "error",
+                    "message": str(ve),
+                    "results": {},
+                }
+            criteria = []
+            if created_after:
+                criteria.append(User.created_at >= created_after)
+            if created_before:
+                criteria.append(User.created_at <= created_before)
+            if approximate:
+                estimate = await self._estimate_count(
+                    User.__table__, criteria, ["created_at"] * len(criteria)
+                )
+                return {
+                    "status": "success",
+                    "message": "User count estimated successfully",
+                    "results": {
+                        "user_count": estimate["count"],
+                        **self._approximation(estimate),
+                    },
+                }
+            user_count = await self._scalar(
+                select(func.count()).select_from(User).where(*criteria)
+            )
+            return {
+                "status": "success",
+                "message": "User count retrieved successfully",
+                "results": {
+                    "user_count": user_count,
+                    "approximate": False,
+                },
+            }
+        except Exception as e:
+            logger.error("Error counting users: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
+
+    # <-- Methods for interacting with Subscriptions -->
+    @_same_doc(DatabaseTools.get_subscription_pricing)
+    async def get_subscription_pricing(self, name: str) -> Dict[str, Any]:
+        try:
+            if name not in [
+                "Basic SD",
+                "Standard HD",
+                "Premium 4K",
+                "Family Plan",
+                "Annual Plan",
+            ]:
+                return {
+                    "status": "error",
+                    "message": f"Invalid subscription name '{name}'. Available options are: "
+                    "'Basic SD', 'Standard HD', 'Premium 4K', 'Family Plan', 'Annual Plan'.",
+                    "results": {},
+                }
+            async with AsyncORMDBClient(self.database_url) as db:
+                subscription = (
+                    await db.execute(select(Subscription).filter_by(name=name))
+                ).scalar_one_or_none()
+                if not subscription:
+                    return {
+                        "status": "error",
+                        "message": f"Subscription with name '{name}' not found.",
+                        "results": {},
+                    }
+                return {
+                    "status": "success",
+                    "message": "Subscription pricing retrieved successfully",
+                    "results": {
+                        "subscription_id": subscription.id,
+                        "name": subscription.name,
+                        "price": subscription.price,
+                        "description": subscription.description,
+                    },
+                }
+        except Exception as e:
+            logger.error("Error retrieving subscription pricing: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
+
+    # <-- Methods for interacting with UserSubscriptions -->
+    @_same_doc(DatabaseTools.count_subscriptions_by_status)
+    async def count_subscriptions_by_status(
+        self,
+        status: str,
+        period_start: Optional[str] = None,
+        period_end: Optional[str] = None,
+        approximate: bool = True,
+    ) -> Dict[str, Any]:
+        try:
+            try:
+                period_start = (
+                    self._validate_and_convert_datetime(period_start)
+                    if period_start
+                    else None
+                )
+                period_end = (
+                    self._validate_and_convert_datetime(period_end)
+                    if period_end
+                    else None
+                )
+            except ValueError as ve:
+                return {
+                    "status": "error",
+                    "message": str(ve),
+                    "results": {},
+                }
+            if not status or status.lower() not in ["active", "cancelled", "expired"]:
+                return {
+                    "status": "error",
+                    "message": "Invalid status provided. Options are 'active', 'cancelled', or 'expired'.",
+                    "results": {},
+                }
+
+            # Map the status string to the SubscriptionStatus enum value
+            status_enum = getattr(SubscriptionStatus, status.upper())
+
+            criteria = [UserSubscription.status == status_enum]
+            range_columns = []
+            if period_start:
+                criteria.append(UserSubscription.start_date >= period_start)
+                range_columns.append("start_date")
+            if period_end:
+                criteria.append(UserSubscription.end_date <= period_end)
+                range_columns.append("end_date")
+            if approximate:
+                estimate = await self._estimate_count(
+                    UserSubscription.__table__, criteria, range_columns
+                )
+                return {
+                    "status": "success",
+                    "message": "Subscription count estimated successfully",
+                    "results": {
+                        "subscription_count": estimate["count"],
+                        **self._approximation(estimate),
+                    },
+                }
+            subscription_count = await self._scalar(
+                select(func.count()).select_from(UserSubscription).where(*criteria)
+            )
+            return {
+                "status": "success",
+                "message": "Subscription count retrieved successfully",
+                "results": {
+                    "subscription_count": subscription_count,
+                    "approximate": False,
+                },
+            }
+        except Exception as e:
+            logger.error("Error counting subscriptions by status: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
+
+    @_same_doc(DatabaseTools.sum_revenue)
+    async def sum_revenue(
+        self, date_from: str, date_to: str, status: Optional[str] = None
+    ) -> Dict[str, Any]:
+        try:
+            try:
+                date_from = self._validate_and_convert_datetime(date_from)
+                date_to = self._validate_and_convert_datetime(date_to)
+            except ValueError as ve:
+                return {
+                    "status": "error",
+                    "message": str(ve),
+                    "results": {},
+                }
+            if date_from >= date_to:
+                return {
+                    "status": "error",
+                    "message": self._INVALID_DATE_RANGE_ERROR,
+                    "results": {},
+                }
+            if status and status.lower() not in ["paid", "unpaid"]:
+                return {
+                    "status": "error",
+                    "message": "Invalid status provided. Options are 'paid' or 'unpaid'.",
+                    "results": {},
+                }
+            status = status.lower() if status else "paid"
+            cache_key = ("sum_revenue", date_from.isoformat(), date_to.isoformat(), status)
+            watermark = await self._watermark()
+            cached = self._result_cache.get(cache_key, watermark)
+            if cached is not None:
+                return {**cached, "metadata": self._cache_metadata(hit=True)}
+            query = (
+                select(func.sum(Invoice.amount))
+                .join(
+                    UserSubscription,
+                    Invoice.user_subscription_id == UserSubscription.id,
+                )
+                .where(
+                    UserSubscription.start_date >= date_from,
+                    UserSubscription.end_date <= date_to,
+                    Invoice.status == status,
+                )
+            )
+            # Same result as the sync tool's Python sum: 0 over no invoices, unrounded
+            total_revenue = await self._scalar(query)
+            if total_revenue is None:
+                total_revenue = 0
+            response = {
+                "status": "success",
+                "message": "Total revenue calculated successfully",
+                "results": {
+                    "total_revenue": total_revenue,
+                },
+            }
+            self._result_cache.put(
+                cache_key, watermark, response, closed=self._is_closed_period(date_to)
+            )
+            return {**response, "metadata": self._cache_metadata(hit=False)}
+        except Exception as e:
+            logger.error("Error calculating total revenue: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
+
+    @_same_doc(DatabaseTools.compare_revenue)
+    async def compare_revenue(
+        self, p1_start: str, p1_end: str, p2_start: str, p2_end: str
+    ) -> Dict[str, Any]:
+        try:
+            try:
+                p1_start_dt = self._validate_and_convert_datetime(p1_start)
+                p1_end_dt = self._validate_and_convert_datetime(p1_end)
+                p2_start_dt = self._validate_and_convert_datetime(p2_start)
+                p2_end_dt = self._validate_and_convert_datetime(p2_end)
+            except ValueError as ve:
+                return {
+                    "status": "error",
+                    "message": str(ve),
+                    "results": {},
+                }
+            if p1_start_dt >= p1_end_dt or p2_start_dt >= p2_end_dt:
+                return {
+                    "status": "error",
+                    "message": self._INVALID_DATE_RANGE_ERROR,
+                    "results": {},
+                }
+            revenue_p1, revenue_p2 = await asyncio.gather(
+                self.sum_revenue(p1_start, p1_end),
+                self.sum_revenue(p2_start, p2_end),
+            )
+
+            if revenue_p1["status"] == "error" or revenue_p2["status"] == "error":
+                return {
+                    "status": "error",
+                    "message": "Error calculating revenue for one or both periods.",
+                    "results": {},
+                }
+
+            delta = (
+                revenue_p2["results"]["total_revenue"]
+                - revenue_p1["results"]["total_revenue"]
+            )
+            pct = (
+                delta / revenue_p1["results"]["total_revenue"] * 100
+                if revenue_p1["results"]["total_revenue"] > 0
+                else 0
+            )
+
+            return {
+                "status": "success",
+                "message": "Revenue comparison calculated successfully",
+                "results": {
+                    "period_1_revenue": revenue_p1["results"]["total_revenue"],
+                    "period_2_revenue": revenue_p2["results"]["total_revenue"],
+                    "delta": delta,
+                    "percentage_change": pct,
+                    "period_1": {
+                        "start": p1_start_dt.isoformat(),
+                        "end": p1_end_dt.isoformat(),
+                    },
+                    "period_2": {
+                        "start": p2_start_dt.isoformat(),
+                        "end": p2_end_dt.isoformat(),
+                    },
+                },
+            }
+        except Exception as e:
+            logger.error("Error comparing revenues: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
+
+    @_same_doc(DatabaseTools.calculate_mrr)
+    async def calculate_mrr(self, as_of_date: str) -> Dict[str, Any]:
+        try:
+            try:
+                as_of_date = self._validate_and_convert_datetime(as_of_date)
+            except ValueError as ve:
+                return {
+                    "status": "error",
+                    "message": str(ve),
+                    "results": {},
+                }
+            cache_key = ("calculate_mrr", as_of_date.isoformat())
+            watermark = await self._watermark()
+            cached = self._result_cache.get(cache_key, watermark)
+            if cached is not None:
+                return {**cached, "metadata": self._cache_metadata(hit=True)}
+            # Sum the invoice amounts of subscriptions active as of the given date
+            query = (
+                select(func.sum(Invoice.amount))
+                .join(
+                    UserSubscription,
+                    Invoice.user_subscription_id == UserSubscription.id,
+                )
+                .where(
+                    UserSubscription.start_date <= as_of_date,
+                    UserSubscription.end_date >= as_of_date,
+                    UserSubscription.status == SubscriptionStatus.ACTIVE,
+                )
+            )
+            mrr = await self._scalar(query)
+            if mrr is None:
+                mrr = 0
+            response = {
+                "status": "success",
+                "message": "MRR calculated successfully",
+                "results": {
+                    "mrr": mrr,
+                    "as_of_date": as_of_date.isoformat(),
+                },
+            }
+            self._result_cache.put(
+                cache_key, watermark, response, closed=self._is_closed_period(as_of_date)
+            )
+            return {**response, "metadata": self._cache_metadata(hit=False)}
+        except Exception as e:
+            logger.error("Error calculating MRR: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
+
+    @_same_doc(DatabaseTools.calculate_churn_rate)
+    async def calculate_churn_rate(
+        self, period_start: str, period_end: str
+    ) -> Dict[str, Any]:
+        try:
+            try:
+                period_start = self._validate_and_convert_datetime(period_start)
+                period_end = self._validate_and_convert_datetime(period_end)
+            except ValueError as ve:
+                return {
+                    "status": "error",
+                    "message": str(ve),
+                    "results": {},
+                }
+            if period_start >= period_end:
+                return {
+                    "status": "error",
+                    "message": self._INVALID_DATE_RANGE_ERROR,
+                    "results": {},
+                }
+            cache_key = (
+                "calculate_churn_rate",
+                period_start.isoformat(),
+                period_end.isoformat(),
+            )
+            watermark = await self._watermark()
+            cached = self._result_cache.get(cache_key, watermark)
+            if cached is not None:
+                return {**cached, "metadata": self._cache_metadata(hit=True)}
+            # Subscriptions that ended during the period and those active at its
+            # start are independent counts, so they run concurrently.
+            churned_subscriptions, active_subscriptions_start = await asyncio.gather(
+                self._scalar(
+                    select(func.count())
+                    .select_from(UserSubscription)
+                    .where(
+                        UserSubscription.end_date >= period_start,
+                        UserSubscription.end_date <= period_end,
+                        UserSubscription.status == SubscriptionStatus.CANCELLED,
+                    )
+                ),
+                self._scalar(
+                    select(func.count())
+                    .select_from(UserSubscription)
+                    .where(
+                        UserSubscription.start_date <= period_start,
+                        UserSubscription.end_date >= period_start,
+                        UserSubscription.status == SubscriptionStatus.ACTIVE,
+                    )
+                ),
+            )
+            if active_subscriptions_start == 0:
+                return {
+                    "status": "error",
+                    "message": "No active subscriptions at the start of the period.",
+                    "results": {},
+                }
+            churn_rate = churned_subscriptions / active_subscriptions_start * 100
+            response = {
+                "status": "success",
+                "message": "Churn rate calculated successfully",
+                "results": {
+                    "churn_rate": churn_rate,
+                    "period_start": period_start.isoformat(),
+                    "period_end": period_end.isoformat(),
+                    "churned_subscriptions": churned_subscriptions,
+                    "active_subscriptions_start": active_subscriptions_start,
+                },
+            }
+            self._result_cache.put(
+                cache_key, watermark, response, closed=self._is_closed_period(period_end)
+            )
+            return {**response, "metadata": self._cache_metadata(hit=False)}
+        except Exception as e:
+            logger.error("Error calculating churn rate: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
+
+    @_same_doc(DatabaseTools.forecast_revenue)
+    async def forecast_revenue(
+        self,
+        date_from: str,
+        date_to: str,
+        horizon_days: Optional[int] = None,
+        season_length: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        try:
+            try:
+                date_from, date_to, horizon, season = self._forecast_arguments(
+                    date_from, date_to, horizon_days, season_length
+                )
+            except ValueError as ve:
+                return {
+                    "status": "error",
+                    "message": str(ve),
+                    "results": {},
+                }
+            cache_key = (
+                "forecast_revenue",
+                date_from.isoformat(),
+                date_to.isoformat(),
+                horizon,
+                season,
+            )
+            watermark = await self._watermark()
+            cached = self._result_cache.get(cache_key, watermark)
+            if cached is not None:
+                return {**cached, "metadata": self._cache_metadata(hit=True)}
+            async with AsyncORMDBClient(self.database_url) as db:
+                rows = (await db.execute(daily_series_query(date_from, date_to))).all()
+            # Model fitting is CPU-bound, so keep it off the event loop
+            response = await asyncio.to_thread(
+                self._forecast_response, rows, date_from, date_to, horizon, season
+            )
+            self._result_cache.put(
+                cache_key, watermark, response, closed=self._is_closed_period(date_to)
+            )
+            return {**response, "metadata": self._cache_metadata(hit=False)}
+        except Exception as e:
+            logger.error("Error forecasting revenue: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
+
+    @_same_doc(DatabaseTools.get_plan_unit_economics)
+    async def get_plan_unit_economics(
+        self, cohort_start: Optional[str] = None, cohort_end: Optional[str] = None
+    ) -> Dict[str, Any]:
+        try:
+            try:
+                cohort, queries = self._unit_economics_queries(cohort_start, cohort_end)
+            except ValueError as ve:
+                return {
+                    "status": "error",
+                    "message": str(ve),
+                    "results": {},
+                }
+            cache_key = ("get_plan_unit_economics", cohort["cohort_start"], cohort["cohort_end"])
+            watermark = await self._watermark()
+            cached = self._result_cache.get(cache_key, watermark)
+            if cached is not None:
+                return {**cached, "metadata": self._cache_metadata(hit=True)}
+            # The per-plan and overall aggregates are independent, so they run concurrently
+            per_plan, overall = await asyncio.gather(*(self._rows(q) for q in queries))
+            response = {
+                "status": "success",
+                "message": "Plan unit economics calculated successfully",
+                "results": {**cohort, **unit_economics_table(per_plan + overall)},
+            }
+            self._result_cache.put(cache_key, watermark, response, closed=False)
+            return {**response, "metadata": self._cache_metadata(hit=False)}
+        except Exception as e:
+            logger.error("Error calculating plan unit economics: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
+
+    @_same_doc(DatabaseTools.get_billing_history)
+    async def get_billing_history(
+        self,
+        user_id: int,
+        cursor: Optional[str] = None,
+        page_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        try:
+            user_id = int(user_id)
+            page_size = (
+                max(1, min(int(page_size), settings.billing_history_max_page_size))
+                if page_size not in (None, "")
+                else settings.billing_history_default_page_size
+            )
+            after = (
+                decode_cursor(cursor, {"billing_history": user_id}) if cursor else None
+            )
+        except ValueError as ve:
+            return {
+                "status": "error",
+                "message": str(ve),
+                "results": {},
+            }
+        try:
+            async with AsyncORMDBClient(self.database_url) as db:
+                rows = (
+                    await db.execute(
+                        self._billing_history_query(user_id, page_size, after)
+                    )
+                ).all()
+                if not rows and not after and await db.session.get(User, user_id) is None:
+                    return {
+                        "status": "error",
+                        "message": f"User with id '{user_id}' not found.",
+                        "results": {},
+                    }
+                return self._billing_history_page(rows, user_id, page_size)
+        except Exception as e:
+            logger.error("Error retrieving billing history: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
+
+    # <-- Export methods -->
+    @staticmethod
+    def _upload_csv(
+        bucket_name: str, destination_blob_name: str, header: List[str], rows: List[list]
+    ) -> None:
+        """
+        Write rows to a private temporary CSV file and upload it to GCS.
+        Blocking; run it in a worker thread.
+        """
+        with tempfile.NamedTemporaryFile(
+            mode="w", newline="", suffix=".csv", delete=False
+        ) as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(header)
+            writer.writerows(rows)
+        try:
+            client = storage.Client()
+            bucket = client.bucket(bucket_name)
+            blob = bucket.blob(destination_blob_name)
+            blob.upload_from_filename(csvfile.name)
+        finally:
+            os.remove(csvfile.name)
+
+    @_same_doc(DatabaseTools.export_invoices_to_gcs)
+    async def export_invoices_to_gcs(
+        self,
+        bucket_name: str,
+        destination_blob_name: str,
+        start_date: str,
+        end_date: str,
+    ) -> Dict[str, Any]:
+        try:
+            # Normalize bucket name
+            clean_bucket = bucket_name.replace("gs://", "").rstrip("/")
+
+            start_dt = self._validate_and_convert_datetime(start_date)
+            end_dt = self._validate_and_convert_datetime(end_date)
+            if start_dt >= end_dt:
+                return {
+                    "status": "error",
+                    "message": self._INVALID_DATE_RANGE_ERROR,
+                    "results": {},
+                }
+
+            async with AsyncORMDBClient(self.database_url) as db:
+                result = await db.execute(
+                    select(
+                        Invoice.id,
+                        Invoice.user_subscription_id,
+                        Invoice.invoice_date,
+                        Invoice.amount,
+                        Invoice.status,
+                        Invoice.created_at,
+                    ).where(
+                        Invoice.invoice_date >= start_dt, Invoice.invoice_date <= end_dt
+                    )
+                )
+                rows = [
+                    [
+                        inv.id,
+                        inv.user_subscription_id,
+                        inv.invoice_date.isoformat(),
+                        inv.amount,
+                        inv.status,
+                        inv.created_at.isoformat(),
+                    ]
+                    for inv in result
+                ]
+
+            if not rows:
+                return {
+                    "status": "error",
+                    "message": "No invoices found in the given range.",
+                    "results": {},
+                }
+
+            await asyncio.to_thread(
+                self._upload_csv,
+                clean_bucket,
+                destination_blob_name,
+                [
+                    "id",
+                    "user_subscription_id",
+                    "invoice_date",
+                    "amount",
+                    "status",
+                    "created_at",
+                ],
+                rows,
+            )
+            gcs_uri = f"gs://{clean_bucket}/{destination_blob_name}"
+            return {
+                "status": "success",
+                "message": "Invoices exported and uploaded successfully.",
+                "results": {"gcs_uri": gcs_uri},
+            }
+        except Exception as e:
+            return {"status": "error", "message": str(e), "results": {}}
+
+    @_same_doc(DatabaseTools.export_user_subscriptions_to_gcs)
+    async def export_user_subscriptions_to_gcs(
+        self,
+        bucket_name: str,
+        destination_blob_name: str,
+        start_date: str,
+        end_date: str,
+    ) -> Dict[str, Any]:
+        try:
+            # Normalize bucket name
+            clean_bucket = bucket_name.replace("gs://", "").rstrip("/")
+
+            start_dt = self._validate_and_convert_datetime(start_date)
+            end_dt = self._validate_and_convert_datetime(end_date)
+            if start_dt >= end_dt:
+                return {
+                    "status": "error",
+                    "message": self._INVALID_DATE_RANGE_ERROR,
+                    "results": {},
+                }
+
+            async with AsyncORMDBClient(self.database_url) as db:
+                result = await db.execute(
+                    select(
+                        UserSubscription.id,
+                        UserSubscription.user_id,
+                        UserSubscription.subscription_id,
+                        UserSubscription.start_date,
+                        UserSubscription.end_date,
+                        UserSubscription.status,
+                    ).where(
+                        UserSubscription.start_date >= start_dt,
+                        UserSubscription.end_date <= end_dt,
+                    )
+                )
+                rows = [
+                    [
+                        us.id,
+                        us.user_id,
+                        us.subscription_id,
+                        us.start_date.isoformat(),
+                        us.end_date.isoformat() if us.end_date else "",
+                        us.status.value,
+                    ]
+                    for us in result
+                ]
+
+            if not rows:
+                return {
+                    "status": "error",
+                    "message": "No user subscriptions found in the given range.",
+                    "results": {},
+                }
+
+            await asyncio.to_thread(
+                self._upload_csv,
+                clean_bucket,
+                destination_blob_name,
+                [
+                    "id",
+                    "user_id",
+                    "subscription_id",
+                    "start_date",
+                    "end_date",
+                    "status",
+                ],
+                rows,
+            )
+            gcs_uri = f"gs://{clean_bucket}/{destination_blob_name}"
+            return {
+                "status": "success",
+                "message": "User subscriptions exported and uploaded successfully.",
+                "results": {"gcs_uri": gcs_uri},
+            }
+        except Exception as e:
+            return {"status": "error", "message": str(e), "results": {}}
+
+    # <-- Methods for ad-hoc read-only queries -->
+    @_same_doc(DatabaseTools.run_readonly_query)
+    async def run_readonly_query(
+        self, sql: str, max_rows: Optional[int] = None
+    ) -> Dict[str, Any]:
+        # Admission control relies on driver-level hooks (server-side cursors,
+        # SQLite progress handlers), so the synchronous path runs in a worker thread.
+        return await asyncio.to_thread(super().run_readonly_query, sql, max_rows)
+
+    # <-- Methods for billing batch jobs -->
+    @_same_doc(DatabaseTools.expire_lapsed_subscriptions)
+    async def expire_lapsed_subscriptions(
+        self,
+        as_of_date: Optional[str] = None,
+        dry_run: bool = True,
+        chunk_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        return await asyncio.to_thread(
+            super().expire_lapsed_subscriptions, as_of_date, dry_run, chunk_size
+        )
+
+    @_same_doc(DatabaseTools.generate_monthly_invoices)
+    async def generate_monthly_invoices(
+        self,
+        month: Optional[str] = None,
+        dry_run: bool = True,
+        chunk_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        return await asyncio.to_thread(
+            super().generate_monthly_invoices, month, dry_run, chunk_size
+        )
@@ -0,0 +1,61 @@
+"""
+Module for interacting with database asynchronously using AsyncORMDBClient.
+"""
+
+from typing import Any, Dict
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+# Async DBAPI driver used for each backend
+_ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+# Async engines own a connection pool, so they are shared per URL instead of
+# being created for every tool call.
+_engines: Dict[str, AsyncEngine] = {}
+
+
+def to_async_url(url: str) -> str:
+    """
+    Rewrite a synchronous database URL to use the matching async driver,
+    e.g. 'sqlite:///app.db' -> 'sqlite+aiosqlite:///app.db'.
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    driver = _ASYNC_DRIVERS.get(backend)
+    if driver is None:
+        raise ValueError(f"No async driver configured for '{backend}' databases.")
+    return parsed.set(drivername=f"{backend}+{driver}").render_as_string(
+        hide_password=False
+    )
+
+
+def get_async_engine(url: str) -> AsyncEngine:
+    """Return the shared async engine for a (sync or async) database URL."""
+    async_url = to_async_url(url)
+    if async_url not in _engines:
+        _engines[async_url] = create_async_engine(async_url, pool_pre_ping=True)
+    return _engines[async_url]
+
+
+class AsyncORMDBClient:
+    def __init__(self, url: str):
+        self.engine = get_async_engine(url)
+        self.Session = async_sessionmaker(bind=self.engine, expire_on_commit=False)
+
+    async def __aenter__(self):
+        self.session = self.Session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc:
+            await self.session.rollback()
+        else:
+            await self.session.commit()
+        await self.session.close()
+
+    async def execute(self, stmt) -> Any:
+        return await self.session.execute(stmt)
+
+    async def scalar(self, stmt) -> Any:
+        return await self.session.scalar(stmt)
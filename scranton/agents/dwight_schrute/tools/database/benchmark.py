@@ -0,0 +1,258 @@
+"""
+Scale benchmark for Dwight Schrute's DatabaseTools.
+
+For each dataset size a fresh database is seeded with the synthetic data generator,
+then every DatabaseTools method is timed over a few repetitions (with the result
+cache cleared before each cold run) and the results are recorded as JSON.
+
+Usage (from the scranton/agents directory):
+    python -m dwight_schrute.tools.database.benchmark \
+        --database-url "sqlite:///dwight_bench_{size}.db" \
+        --sizes 10000 100000 700000 --output dwight_benchmark.json
+
+A `{size}` placeholder in the URL gives each size its own database; without it the
+same database is reset for every size. About 700k users yield ~10M invoices.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from dwight_schrute.tools.database.client import ORMDBClient  # pylint: disable=E0401
+from dwight_schrute.tools.database.synthetic_data import (  # pylint: disable=E0401
+    SyntheticDataGenerator,
+)
+from dwight_schrute.tools.db_tools import DatabaseTools  # pylint: disable=E0401
+
+
+logger = logging.getLogger(__name__)
+
+# Methods answered from the result cache on repeated calls
+CACHED_METHODS = {
+    "sum_revenue",
+    "calculate_mrr",
+    "calculate_churn_rate",
+    "forecast_revenue",
+    "get_plan_unit_economics",
+}
+
+
+def build_cases(
+    tools: DatabaseTools, end: datetime, gcs_bucket: Optional[str] = None
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Build one representative call per DatabaseTools method for a seeded database.
+
+    Args:
+        tools (DatabaseTools): The tool set pointed at the seeded database.
+        end (datetime): The "today" the dataset was generated for.
+        gcs_bucket (Optional[str]): Bucket for the export methods; they are skipped
+            when not provided since they upload to GCS.
+
+    Returns:
+        List[Tuple[str, Dict[str, Any]]]: (method name, keyword arguments) pairs.
+    """
+    with ORMDBClient(tools.database_url) as db:
+        user_id, username, email = db.session.execute(
+            text("SELECT id, username, email FROM users ORDER BY id LIMIT 1")
+        ).one()
+
+    month_end = end.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    month_start = (month_end - timedelta(days=1)).replace(day=1)
+    year_start = month_end.replace(year=month_end.year - 1)
+    two_years_start = month_end.replace(year=month_end.year - 2)
+    iso = datetime.isoformat
+
+    cases = [
+        ("get_schema_description", {}),
+        ("get_user_by_username", {"username": username}),
+        ("get_user_by_email", {"email": email}),
+        ("search_users", {"query": username[:-1]}),
+        ("count_users", {}),
+        ("count_users", {"created_after": iso(year_start)}),
+        ("get_subscription_pricing", {"name": "Premium 4K"}),
+        ("count_subscriptions_by_status", {"status": "active"}),
+        ("sum_revenue", {"date_from": iso(month_start), "date_to": iso(month_end)}),
+        ("sum_revenue", {"date_from": iso(year_start), "date_to": iso(month_end)}),
+        (
+            "compare_revenue",
+            {
+                "p1_start": iso(two_years_start),
+                "p1_end": iso(year_start),
+                "p2_start": iso(year_start),
+                "p2_end": iso(month_end),
+            },
+        ),
+        ("calculate_mrr", {"as_of_date": iso(month_start)}),
+        (
+            "calculate_churn_rate",
+            {"period_start": iso(month_start), "period_end": iso(month_end)},
+        ),
+        (
+            "forecast_revenue",
+            {"date_from": iso(year_start), "date_to": iso(month_end), "horizon_days": 30},
+        ),
+        ("get_plan_unit_economics", {}),
+        ("get_billing_history", {"user_id": user_id}),
+        (
+            "run_readonly_query",
+            {
+                "sql": "SELECT status, COUNT(*) AS n FROM invoices "
+                f"WHERE invoice_date >= '{month_start:%Y-%m-%d}' GROUP BY status"
+            },
+        ),
+    ]
+    if gcs_bucket:
+        cases += [
+            (
+                "export_invoices_to_gcs",
+                {
+                    "bucket_name": gcs_bucket,
+                    "destination_blob_name": "benchmark/invoices.csv",
+                    "start_date": iso(month_start),
+                    "end_date": iso(month_end),
+                },
+            ),
+            (
+                "export_user_subscriptions_to_gcs",
+                {
+                    "bucket_name": gcs_bucket,
+                    "destination_blob_name": "benchmark/user_subscriptions.csv",
+                    "start_date": iso(year_start),
+                    "end_date": iso(month_end),
+                },
+            ),
+        ]
+    return cases
+
+
+def _time_call(
+    method: Callable[..., Dict[str, Any]],
+    kwargs: Dict[str, Any],
+    repeat: int,
+    before: Optional[Callable[[], None]] = None,
+) -> Tuple[List[float], Dict[str, Any]]:
+    timings, response = [], {}
+    for _ in range(repeat):
+        if before:
+            before()
+        started = time.perf_counter()
+        response = method(**kwargs)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, response
+
+
+def _summarize(timings: List[float]) -> Dict[str, float]:
+    ordered = sorted(timings)
+    return {
+        "min_ms": round(ordered[0], 3),
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def benchmark_database(
+    database_url: str, end: datetime, repeat: int, gcs_bucket: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Time every DatabaseTools method against an already seeded database.
+
+    Returns:
+        List[Dict[str, Any]]: One record per benchmark case.
+    """
+    tools = DatabaseTools(database_url=database_url)
+    records = []
+    for name, kwargs in build_cases(tools, end, gcs_bucket):
+        method = getattr(tools, name)
+        timings, response = _time_call(
+            method, kwargs, repeat, before=tools._result_cache.invalidate
+        )
+        record = {
+            "method": name,
+            "kwargs": kwargs,
+            "status": response.get("status"),
+            "repeat": repeat,
+            **_summarize(timings),
+        }
+        if response.get("status") != "success":
+            record["message"] = response.get("message")
+        if name in CACHED_METHODS:
+            cached_timings, _ = _time_call(method, kwargs, repeat)
+            record["cached"] = _summarize(cached_timings)
+        records.append(record)
+        logger.info("%s %s: median %.2f ms", name, kwargs, record["median_ms"])
+    return records
+
+
+def run(
+    database_url: str,
+    sizes: List[int],
+    repeat: int = 5,
+    seed: int = 42,
+    gcs_bucket: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Seed a database per size and benchmark it.
+
+    Args:
+        database_url (str): Target URL; may contain a `{size}` placeholder.
+        sizes (List[int]): Numbers of users to generate.
+        repeat (int): Timed repetitions per case.
+        seed (int): Seed passed to the generator.
+        gcs_bucket (Optional[str]): Bucket for timing the export methods.
+
+    Returns:
+        Dict[str, Any]: The full benchmark report.
+    """
+    end = datetime.now().replace(microsecond=0)
+    report: Dict[str, Any] = {
+        "generated_at": end.isoformat(),
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "seed": seed,
+        "runs": [],
+    }
+    for size in sorted(sizes):
+        url = database_url.format(size=size)
+        generator = SyntheticDataGenerator(url, seed=seed, end_date=end)
+        logger.info("Seeding %d users into %s", size, generator.engine.url)
+        rows = generator.generate(size, reset=True)
+        report["runs"].append(
+            {
+                "users": size,
+                "dialect": generator.engine.dialect.name,
+                "rows": rows,
+                "results": benchmark_database(url, end, repeat, gcs_bucket),
+            }
+        )
+        generator.engine.dispose()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", default="sqlite:///dwight_bench_{size}.db")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--gcs-bucket", default=None)
+    parser.add_argument("--output", default="dwight_benchmark.json")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    report = run(args.database_url, args.sizes, args.repeat, args.seed, args.gcs_bucket)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""
+Set-based subscription lifecycle and invoice generation batch jobs.
+
+Both jobs run one `UPDATE` / `INSERT ... SELECT` per chunk of user subscription
+ids, each in its own transaction, so a long run never holds locks on the whole
+table and an interrupted run can simply be restarted: every statement only
+touches rows that still need it, which makes the jobs idempotent.
+
+Usage (from the scranton/agents directory):
+    python -m dwight_schrute.tools.database.billing_jobs expire --dry-run
+    python -m dwight_schrute.tools.database.billing_jobs invoice --month 2025-01
+"""
+
+import argparse
+import json
+import logging
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Union
+
+from sqlalchemy import DateTime, bindparam, create_engine, text
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+# Plans billed once a year on the subscription's anniversary month; every other
+# plan is billed monthly on the subscription's day of month.
+ANNUAL_PLANS = ("Annual Plan",)
+
+_EXPIRE_CONDITION = """
+    user_subscriptions.status = 'ACTIVE'
+    AND user_subscriptions.end_date < :as_of
+    AND user_subscriptions.id BETWEEN :low AND :high
+"""
+
+# Day of month of the billing date, clamped to the last day of the billed month,
+# at the subscription's time of day. SQLite stores timestamps as text, so the
+# time part is copied from the stored value to keep the same format. The month is
+# given by the names of its start and end parameters.
+_BILLING_DATE = {
+    "sqlite": (
+        "MIN(date(:{start}, '+' || "
+        "(CAST(strftime('%d', us.start_date) AS INTEGER) - 1) || ' days'), "
+        "date(:{end}, '-1 day')) || substr(us.start_date, 11)"
+    ),
+    "postgresql": (
+        "LEAST(CAST(:{start} AS date) "
+        "+ (EXTRACT(DAY FROM us.start_date)::int - 1), "
+        "CAST(:{end} AS date) - 1) + us.start_date::time"
+    ),
+}
+_START_MONTH = {
+    "sqlite": "CAST(strftime('%m', us.start_date) AS INTEGER)",
+    "postgresql": "EXTRACT(MONTH FROM us.start_date)::int",
+}
+
+_BILLABLE_SUBSCRIPTIONS = """
+    SELECT us.id AS user_subscription_id, {billing_date} AS invoice_date,
+           s.price AS amount, us.start_date
+    FROM user_subscriptions us
+    JOIN subscriptions s ON s.id = us.subscription_id
+    WHERE us.status = 'ACTIVE'
+      AND us.id BETWEEN :low AND :high
+      AND us.start_date < :month_end
+      AND (us.end_date IS NULL OR us.end_date >= :month_start)
+      AND (s.name NOT IN :annual_plans OR {start_month} = :month)
+      AND NOT EXISTS (
+          SELECT 1 FROM invoices i
+          WHERE i.user_subscription_id = us.id
+            AND i.invoice_date >= :month_start AND i.invoice_date < :month_end
+      )
+"""
+
+# An active subscription's end date is its next renewal, which is billed like any
+# other period; subscriptions that lapsed before the month are left to expiry.
+_INVOICES_TO_CREATE = """
+    SELECT user_subscription_id, invoice_date, amount FROM ({billable}) billable
+    WHERE invoice_date >= start_date
+"""
+
+# The end date of an active subscription is its next renewal, which expiry and
+# billing both read, so it moves to the next billing date once the month is
+# invoiced: a month later for monthly plans, a year later for annual ones. The
+# new date is computed from the month rather than added to the old one, and is
+# never moved back, so repeating the job leaves it unchanged.
+_RENEWAL_DATE = """
+    SELECT CASE WHEN s.name IN :annual_plans THEN {next_year} ELSE {next_month} END
+    FROM user_subscriptions us
+    JOIN subscriptions s ON s.id = us.subscription_id
+    WHERE us.id = user_subscriptions.id
+"""
+
+_RENEW_INVOICED = """
+    UPDATE user_subscriptions SET end_date = ({renewal})
+    WHERE status = 'ACTIVE'
+      AND id BETWEEN :low AND :high
+      AND end_date IS NOT NULL
+      AND end_date < ({renewal})
+      AND EXISTS (
+          SELECT 1 FROM invoices i
+          WHERE i.user_subscription_id = user_subscriptions.id
+            AND i.invoice_date >= :month_start AND i.invoice_date < :month_end
+      )
+"""
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _month_bounds(month: date) -> Dict[str, Any]:
+    start = datetime(month.year, month.month, 1)
+    return {
+        "month_start": start,
+        "month_end": _add_months(start, 1),
+        "month": month.month,
+        "next_month_start": _add_months(start, 1),
+        "next_month_end": _add_months(start, 2),
+        "next_year_start": _add_months(start, 12),
+        "next_year_end": _add_months(start, 13),
+    }
+
+
+@contextmanager
+def _bind(engine: Union[Engine, str]) -> Iterator[Engine]:
+    """Use an engine, or one created (and disposed of afterwards) for a URL."""
+    if not isinstance(engine, str):
+        yield engine
+        return
+    created = create_engine(engine)
+    try:
+        yield created
+    finally:
+        created.dispose()
+
+
+def _datetime_params(statement, *names: str):
+    # Bind datetimes through the DateTime type so SQLite gets its stored text format
+    return statement.bindparams(*(bindparam(name, type_=DateTime) for name in names))
+
+
+def _id_range(engine: Engine) -> tuple:
+    with engine.connect() as connection:
+        return connection.execute(
+            text("SELECT MIN(id), MAX(id) FROM user_subscriptions")
+        ).one()
+
+
+def _run_chunks(
+    engine: Engine,
+    job: str,
+    statement,
+    params: Dict[str, Any],
+    chunk_size: int,
+    dry_run: bool,
+    progress: Optional[ProgressCallback],
+    follow_up: Optional[Tuple[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Run a statement over consecutive id ranges, one transaction per chunk. In dry-run
+    mode the statement is a count of the rows the job would change. A follow-up
+    statement, given with the name its row count is reported under, runs in the
+    same transaction as each chunk's statement.
+    """
+    started = time.perf_counter()
+    low_id, high_id = _id_range(engine)
+    total, chunks = 0, 0
+    follow_up_total = 0
+    if low_id is not None:
+        n_chunks = (high_id - low_id) // chunk_size + 1
+        for low in range(low_id, high_id + 1, chunk_size):
+            chunk_params = {**params, "low": low, "high": low + chunk_size - 1}
+            with engine.begin() as connection:
+                result = connection.execute(statement, chunk_params)
+                rows = result.scalar() if dry_run else result.rowcount
+                if follow_up:
+                    follow_up_total += connection.execute(
+                        follow_up[1], chunk_params
+                    ).rowcount
+            total += rows
+            chunks += 1
+            report = {
+                "job": job,
+                "chunk": chunks,
+                "chunks": n_chunks,
+                "rows": rows,
+                "total": total,
+                "dry_run": dry_run,
+            }
+            logger.info("%s chunk %d/%d: %d rows (%d total)", job, chunks, n_chunks, rows, total)
+            if progress:
+                progress(report)
+    summary = {
+        "job": job,
+        "dry_run": dry_run,
+        "rows": total,
+        "chunks": chunks,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    if follow_up:
+        summary[follow_up[0]] = follow_up_total
+    return summary
+
+
+def expire_lapsed_subscriptions(
+    engine: Union[Engine, str],
+    as_of: Optional[datetime] = None,
+    chunk_size: int = 50_000,
+    dry_run: bool = False,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Mark active subscriptions whose end date has passed as expired.
+
+    Args:
+        engine (Union[Engine, str]): Engine or URL of the application database.
+        as_of (Optional[datetime]): Subscriptions ending before this moment lapse.
+            Defaults to now.
+        chunk_size (int): Number of subscription ids per transaction.
+        dry_run (bool): Only count the subscriptions that would be expired.
+        progress (Optional[ProgressCallback]): Called with a report after each chunk.
+
+    Returns:
+        Dict[str, Any]: The number of subscriptions expired (or to expire) and timing.
+    """
+    if dry_run:
+        statement = text(
+            f"SELECT COUNT(*) FROM user_subscriptions WHERE {_EXPIRE_CONDITION}"
+        )
+    else:
+        statement = text(
+            f"UPDATE user_subscriptions SET status = 'EXPIRED' WHERE {_EXPIRE_CONDITION}"
+        )
+    as_of = as_of or datetime.now()
+    with _bind(engine) as bound:
+        summary = _run_chunks(
+            bound,
+            "expire_lapsed_subscriptions",
+            _datetime_params(statement, "as_of"),
+            {"as_of": as_of},
+            chunk_size,
+            dry_run,
+            progress,
+        )
+    return {**summary, "as_of": as_of.isoformat()}
+
+
+def generate_monthly_invoices(
+    engine: Union[Engine, str],
+    month: Optional[date] = None,
+    chunk_size: int = 50_000,
+    dry_run: bool = False,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Create the month's unpaid invoices for all active subscriptions.
+
+    Monthly plans are billed on the subscription's day of month (clamped to the end
+    of short months), annual plans in their anniversary month only, at the plan's
+    current price. Subscriptions that already have an invoice dated in the month
+    are skipped, so the job can be re-run safely. In the same transaction, the end
+    date (next renewal) of each subscription invoiced for the month moves to its
+    next billing date, so billed subscriptions do not lapse.
+
+    Args:
+        engine (Union[Engine, str]): Engine or URL of the application database.
+        month (Optional[date]): Any day of the month to bill. Defaults to this month.
+        chunk_size (int): Number of subscription ids per transaction.
+        dry_run (bool): Only count the invoices that would be created.
+        progress (Optional[ProgressCallback]): Called with a report after each chunk.
+
+    Returns:
+        Dict[str, Any]: The number of invoices created (or to create), the number of
+        subscriptions renewed (unless dry_run) and timing.
+    """
+    with _bind(engine) as bound:
+        dialect = bound.dialect.name
+        if dialect not in _BILLING_DATE:
+            raise ValueError(
+                f"Invoice generation is not supported on '{dialect}' databases."
+            )
+        month = month or date.today()
+        billing_date = _BILLING_DATE[dialect]
+        billable = _BILLABLE_SUBSCRIPTIONS.format(
+            billing_date=billing_date.format(start="month_start", end="month_end"),
+            start_month=_START_MONTH[dialect],
+        )
+        to_create = _INVOICES_TO_CREATE.format(billable=billable)
+        if dry_run:
+            statement = text(f"SELECT COUNT(*) FROM ({to_create}) invoices_to_create")
+        else:
+            statement = text(
+                "INSERT INTO invoices (user_subscription_id, invoice_date, amount, status, "
+                f"created_at) SELECT user_subscription_id, invoice_date, amount, 'unpaid', "
+                f":created_at FROM ({to_create}) invoices_to_create"
+            )
+        statement = _datetime_params(statement, "month_start", "month_end").bindparams(
+            bindparam("annual_plans", expanding=True)
+        )
+        params = {**_month_bounds(month), "annual_plans": list(ANNUAL_PLANS)}
+        follow_up = None
+        if not dry_run:
+            statement = _datetime_params(statement, "created_at")
+            params["created_at"] = datetime.now()
+            renewal = _RENEWAL_DATE.format(
+                next_month=billing_date.format(
+                    start="next_month_start", end="next_month_end"
+                ),
+                next_year=billing_date.format(start="next_year_start", end="next_year_end"),
+            )
+            renew = _datetime_params(
+                text(_RENEW_INVOICED.format(renewal=renewal)),
+                "month_start",
+                "month_end",
+                "next_month_start",
+                "next_month_end",
+                "next_year_start",
+                "next_year_end",
+            ).bindparams(bindparam("annual_plans", expanding=True))
+            follow_up = ("renewed", renew)
+        summary = _run_chunks(
+            bound,
+            "generate_monthly_invoices",
+            statement,
+            params,
+            chunk_size,
+            dry_run,
+            progress,
+            follow_up,
+        )
+    return {**summary, "month": f"{month:%Y-%m}"}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("job", choices=["expire", "invoice"])
+    parser.add_argument("--database-url", default="sqlite:///dwight_schrute.db")
+    parser.add_argument(
+        "--month",
+        type=lambda value: datetime.strptime(value, "%Y-%m").date(),
+        default=None,
+        help="Month to invoice as YYYY-MM (defaults to the current month)",
+    )
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    if args.job == "expire":
+        result = expire_lapsed_subscriptions(
+            args.database_url, chunk_size=args.chunk_size, dry_run=args.dry_run
+        )
+    else:
+        result = generate_monthly_invoices(
+            args.database_url, args.month, chunk_size=args.chunk_size, dry_run=args.dry_run
+        )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Daily revenue and active subscription forecasting with anomaly detection.
+
+Both daily series come from one grouped query: invoice amounts by day, plus +1/-1
+events on the days subscriptions start and end, which are accumulated into the
+number of active subscriptions per day. Each series is fitted with additive
+Holt-Winters (level, trend and seasonality). The smoothing parameters are chosen
+by one-step-ahead squared error over a grid, and all grid points are updated
+together with NumPy, so one pass over the series fits every candidate.
+
+Anomalous days are the ones whose one-step-ahead residual has a large robust
+z-score (median and MAD) relative to the trailing window of residuals.
+"""
+
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Date, case, func, literal, select, union_all
+
+from dwight_schrute.tools.database.models import (  # pylint: disable=E0401
+    Invoice,
+    SubscriptionStatus,
+    UserSubscription,
+)
+
+
+# Smoothing parameter grid of level (alpha), trend (beta) and seasonality (gamma)
+_ALPHAS = (0.05, 0.1, 0.2, 0.35, 0.5, 0.75)
+_BETAS = (0.0, 0.01, 0.05, 0.15)
+_GAMMAS = (0.05, 0.15, 0.3, 0.5)
+
+# z-score of the two-sided 95% prediction interval
+_Z_95 = 1.96
+
+# Scales a MAD (or a mean absolute deviation) to a normal standard deviation
+_MAD_SCALE = 0.6745
+_MEAN_AD_SCALE = 0.7979
+
+MAX_ANOMALIES = 10
+
+
+def daily_series_query(start: datetime, end: datetime):
+    """
+    Build the query returning (day, revenue, active subscription delta) rows for
+    the days in [start, end). Subscriptions that started or ended before `start`
+    are folded into its first day, so the deltas accumulate to the active count.
+    """
+    first_day = literal(start.date(), Date)
+
+    def day_of(column):
+        return case((column < start, first_day), else_=func.date(column))
+
+    invoices = select(
+        func.date(Invoice.invoice_date).label("day"),
+        Invoice.amount.label("revenue"),
+        literal(0).label("delta"),
+    ).where(Invoice.invoice_date >= start, Invoice.invoice_date < end)
+    starts = select(
+        day_of(UserSubscription.start_date).label("day"),
+        literal(0).label("revenue"),
+        literal(1).label("delta"),
+    ).where(UserSubscription.start_date < end)
+    ends = select(
+        day_of(UserSubscription.end_date).label("day"),
+        literal(0).label("revenue"),
+        literal(-1).label("delta"),
+    ).where(
+        UserSubscription.status != SubscriptionStatus.ACTIVE,
+        UserSubscription.end_date < end,
+    )
+    events = union_all(invoices, starts, ends).subquery()
+    return (
+        select(events.c.day, func.sum(events.c.revenue), func.sum(events.c.delta))
+        .group_by(events.c.day)
+        .order_by(events.c.day)
+    )
+
+
+def to_daily_arrays(
+    rows: Sequence[Tuple[Any, Any, Any]], start: date, days: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Turn the rows of daily_series_query into dense daily arrays.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: The days, the revenue per day and
+        the number of active subscriptions at the end of each day.
+    """
+    dates = np.datetime64(start, "D") + np.arange(days)
+    revenue = np.zeros(days)
+    delta = np.zeros(days)
+    if rows:
+        # SQLite returns days as text, PostgreSQL as dates
+        day, day_revenue, day_delta = zip(*rows)
+        index = (np.array([str(d)[:10] for d in day], dtype="datetime64[D]") - dates[0]).astype(int)
+        revenue[index] = np.asarray(day_revenue, dtype=float)
+        delta[index] = np.asarray(day_delta, dtype=float)
+    return dates, revenue, np.cumsum(delta)
+
+
+def holt_winters(
+    y: np.ndarray, season_length: int, horizon: int
+) -> Dict[str, Any]:
+    """
+    Fit additive Holt-Winters on the parameter grid and forecast with the best fit.
+
+    Args:
+        y (np.ndarray): The series, at least two seasons long.
+        season_length (int): Number of observations per season.
+        horizon (int): Number of steps to forecast.
+
+    Returns:
+        Dict[str, Any]: The forecast with its 95% interval, the one-step-ahead
+        predictions over the history, and the chosen parameters and fit error.
+    """
+    m, n = season_length, len(y)
+    if n < 2 * m:
+        raise ValueError(f"At least {2 * m} observations are needed to fit a season of {m}.")
+    alpha, beta, gamma = (
+        grid.ravel() for grid in np.meshgrid(_ALPHAS, _BETAS, _GAMMAS, indexing="ij")
+    )
+    first, second = y[:m].mean(), y[m : 2 * m].mean()
+    level = np.full(alpha.shape, first)
+    trend = np.full(alpha.shape, (second - first) / m)
+    season = np.tile(y[:m] - first, (alpha.size, 1))
+    predictions = np.empty((n, alpha.size))
+    for t in range(n):
+        s = season[:, t % m]
+        base = level + trend
+        predictions[t] = base + s
+        new_level = alpha * (y[t] - s) + (1 - alpha) * base
+        season[:, t % m] = gamma * (y[t] - base) + (1 - gamma) * s
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        level = new_level
+
+    # The first season only initialises the seasonal components
+    errors = y[m:, None] - predictions[m:]
+    sse = np.einsum("ij,ij->j", errors, errors)
+    best = int(np.argmin(sse))
+    sigma = np.sqrt(sse[best] / len(errors))
+
+    steps = np.arange(1, horizon + 1)
+    forecast = level[best] + steps * trend[best] + season[best, (n - 1 + steps) % m]
+    # Variance of the h-step error of additive Holt-Winters (Hyndman et al., ETS(A,A,A))
+    j = np.arange(1, horizon)
+    c = alpha[best] * (1 + j * beta[best]) + gamma[best] * (j % m == 0)
+    variance = sigma**2 * (1 + np.concatenate(([0.0], np.cumsum(c**2))))
+    half_width = _Z_95 * np.sqrt(variance)
+    return {
+        "forecast": forecast,
+        "lower": forecast - half_width,
+        "upper": forecast + half_width,
+        "fitted": predictions[:, best],
+        "alpha": float(alpha[best]),
+        "beta": float(beta[best]),
+        "gamma": float(gamma[best]),
+        "rmse": float(sigma),
+    }
+
+
+def robust_zscores(
+    values: np.ndarray, window: int, min_scale: float = 0.0
+) -> np.ndarray:
+    """
+    Score each value against the median and MAD of the preceding window. The scale
+    is at least `min_scale`, so unit steps of small counts are not flagged. Values
+    without a full window, or whose window has no spread at all, score 0.
+    """
+    z = np.zeros(len(values))
+    if len(values) <= window:
+        return z
+    windows = np.lib.stride_tricks.sliding_window_view(values[:-1], window)
+    median = np.median(windows, axis=1)
+    deviations = np.abs(windows - median[:, None])
+    # Fall back to the mean absolute deviation when more than half the window is equal
+    scale = np.median(deviations, axis=1) / _MAD_SCALE
+    flat = scale == 0
+    scale[flat] = deviations[flat].mean(axis=1) / _MEAN_AD_SCALE
+    scale = np.maximum(scale, min_scale)
+    current = values[window:] - median
+    np.divide(current, scale, out=z[window:], where=scale > 0)
+    return z
+
+
+def forecast_series(
+    dates: np.ndarray,
+    values: np.ndarray,
+    horizon: int,
+    season_length: int,
+    anomaly_window: int,
+    anomaly_threshold: float,
+    min_scale: float = 1.0,
+    decimals: int = 2,
+) -> Dict[str, Any]:
+    """
+    Forecast a daily series and flag its anomalous days.
+
+    Args:
+        dates (np.ndarray): The days of the series (datetime64[D]).
+        values (np.ndarray): The daily values, which are never negative.
+        horizon (int): Number of days to forecast.
+        season_length (int): Seasonal period in days.
+        anomaly_window (int): Number of preceding days a day is compared with.
+        anomaly_threshold (float): Robust z-score above which a day is anomalous.
+        min_scale (float): Smallest residual spread, in units of the series.
+        decimals (int): Rounding of the returned values.
+
+    Returns:
+        Dict[str, Any]: The model, the forecast with its 95% interval and the most
+        anomalous days, largest deviation first.
+    """
+    fit = holt_winters(values, season_length, horizon)
+    residuals = values - fit["fitted"]
+    z = robust_zscores(residuals[season_length:], anomaly_window, min_scale)
+    z = np.concatenate((np.zeros(season_length), z))
+    flagged = np.flatnonzero(np.abs(z) > anomaly_threshold)
+    flagged = flagged[np.argsort(-np.abs(z[flagged]))][:MAX_ANOMALIES]
+
+    future = dates[-1] + np.arange(1, horizon + 1)
+    forecast: List[Dict[str, Any]] = [
+        {
+            "date": str(day),
+            "forecast": round(max(float(value), 0.0), decimals),
+            "lower": round(max(float(low), 0.0), decimals),
+            "upper": round(max(float(high), 0.0), decimals),
+        }
+        for day, value, low, high in zip(future, fit["forecast"], fit["lower"], fit["upper"])
+    ]
+    anomalies = [
+        {
+            "date": str(dates[i]),
+            "value": round(float(values[i]), decimals),
+            "expected": round(float(fit["fitted"][i]), decimals),
+            "z_score": round(float(z[i]), 1),
+        }
+        for i in flagged
+    ]
+    return {
+        "model": {
+            "method": "holt_winters_additive",
+            "season_length": season_length,
+            "alpha": fit["alpha"],
+            "beta": fit["beta"],
+            "gamma": fit["gamma"],
+            "rmse": round(fit["rmse"], decimals),
+        },
+        "last_value": round(float(values[-1]), decimals),
+        "forecast": forecast,
+        "anomalies": anomalies,
+        "anomalous_days": int(np.count_nonzero(np.abs(z) > anomaly_threshold)),
+    }
+
+
+def history_days(start: datetime, end: datetime) -> int:
+    """
+    Number of whole days covered by [start, end).
+    """
+    days = (end.date() - start.date()).days
+    return days + 1 if end.time() != time.min else days
@@ -40,7 +40,7 @@ class Subscription(Base):
 class UserSubscription(Base):
     __tablename__ = "user_subscriptions"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     subscription_id = Column(Integer, ForeignKey("subscriptions.id"), nullable=False)
     start_date = Column(DateTime, default=datetime.now(timezone.utc))
     end_date = Column(DateTime, nullable=True)
@@ -53,7 +53,7 @@ class Invoice(Base):
     __tablename__ = "invoices"
     id = Column(Integer, primary_key=True, index=True)
     user_subscription_id = Column(
-        Integer, ForeignKey("user_subscriptions.id"), nullable=False
+        Integer, ForeignKey("user_subscriptions.id"), nullable=False, index=True
     )
     invoice_date = Column(DateTime, nullable=False)
     amount = Column(Float, nullable=False)
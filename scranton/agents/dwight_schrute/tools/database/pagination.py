@@ -0,0 +1,64 @@
+"""
+Opaque keyset cursors for paginated tool responses.
+
+A cursor carries the sort key of the last row of a page, plus the scope it was
+issued for, so the next page continues with `WHERE (key) < (cursor key)` instead of
+an OFFSET that rescans every previous page.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Sequence, Tuple
+
+
+def encode_cursor(scope: Dict[str, Any], key: Sequence[Any]) -> str:
+    """
+    Encode a keyset position as an opaque, URL-safe string.
+
+    Args:
+        scope (Dict[str, Any]): The query parameters the cursor is only valid for.
+        key (Sequence[Any]): The sort key of the last returned row. Datetimes are
+            stored as ISO strings.
+
+    Returns:
+        str: The cursor.
+    """
+    payload = {
+        "s": scope,
+        "k": [
+            {"dt": value.isoformat()} if isinstance(value, datetime) else value
+            for value in key
+        ],
+    }
+    raw = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, scope: Dict[str, Any]) -> Tuple[Any, ...]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): The cursor returned with the previous page.
+        scope (Dict[str, Any]): The parameters of the current request.
+
+    Returns:
+        Tuple[Any, ...]: The sort key to continue after.
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another scope.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        key = tuple(
+            datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+            for value in payload["k"]
+        )
+        issued_for = payload["s"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError("Invalid cursor. Start again without a cursor.") from e
+    if issued_for != scope:
+        raise ValueError("The cursor belongs to a different query. Start again without a cursor.")
+    return key
@@ -0,0 +1,105 @@
+"""
+In-process result cache for DatabaseTools analytics, validated by a data high-water mark.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy import Select, func, select
+
+from dwight_schrute.tools.database.models import (  # pylint: disable=E0401
+    Invoice,
+    UserSubscription,
+)
+
+
+def watermark_query() -> Select:
+    """
+    Build the high-water-mark probe of the billing tables.
+
+    Both values are primary-key index lookups, so the probe stays constant time
+    regardless of table size. Any new invoice or subscription moves the mark;
+    updates of existing rows do not, which the TTLs of `ResultCache` bound.
+
+    Returns:
+        Select: SELECT (max invoice id, max user subscription id)
+    """
+    return select(
+        func.max(Invoice.id),
+        select(func.max(UserSubscription.id)).scalar_subquery(),
+    )
+
+
+def probe_watermark(session) -> Tuple[Any, ...]:
+    """
+    Read the current high-water mark with an open SQLAlchemy session.
+    """
+    return tuple(session.execute(watermark_query()).one())
+
+
+class ResultCache:
+    """
+    A bounded LRU cache of tool responses keyed by tool name and normalized
+    parameters. Entries are only served while the stored watermark matches the
+    current one and their TTL has not expired. In-place updates (an invoice paid
+    late, a renewal date moved by billing) do not move the watermark, so even
+    closed (past) periods only get a short TTL; open periods get a shorter one.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        closed_ttl_seconds: float = 300,
+        open_ttl_seconds: float = 60,
+    ) -> None:
+        self.max_entries = max_entries
+        self.closed_ttl_seconds = closed_ttl_seconds
+        self.open_ttl_seconds = open_ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, watermark: Any) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached response, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_watermark, expires_at, value = entry
+                if stored_watermark == watermark and expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(value)
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(
+        self, key: Hashable, watermark: Any, value: Dict[str, Any], closed: bool
+    ) -> None:
+        """Store a response; `closed` marks periods that lie entirely in the past."""
+        ttl = self.closed_ttl_seconds if closed else self.open_ttl_seconds
+        with self._lock:
+            self._entries[key] = (
+                watermark,
+                time.monotonic() + ttl,
+                copy.deepcopy(value),
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Drop every cached entry, e.g. after a job rewrote existing rows."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit/miss counters and current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
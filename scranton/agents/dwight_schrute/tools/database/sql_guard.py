@@ -0,0 +1,362 @@
+"""
+Validation and plan-cost admission control for ad-hoc, read-only SQL queries.
+"""
+
+import json
+import re
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy.engine import Connection
+
+
+class QueryRejectedError(ValueError):
+    """Raised when an ad-hoc query fails validation or plan-cost admission."""
+
+
+_COMMENT_RE = re.compile(
+    r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")|--[^\n]*|/\*.*?\*/", re.S
+)
+_TOKEN_RE = re.compile(
+    r"'(?:[^']|'')*'"  # string literal
+    r"|\"(?:[^\"]|\"\")*\"(?:\.\"(?:[^\"]|\"\")*\")?"  # quoted identifier
+    r"|[A-Za-z_][\w$]*(?:\.[A-Za-z_][\w$]*)?"  # keyword or (qualified) identifier
+    r"|\S",
+    re.S,
+)
+
+_FORBIDDEN_KEYWORDS = {
+    "insert", "update", "delete", "merge", "upsert", "drop", "alter",
+    "create", "truncate", "grant", "revoke", "copy", "attach", "detach", "pragma",
+    "vacuum", "analyze", "reindex", "call", "do", "lock", "into", "set", "reset",
+    "listen", "notify", "load", "execute", "prepare", "deallocate", "refresh",
+}
+_FORBIDDEN_IDENTIFIER_RE = re.compile(
+    r"^(pg_|sqlite_|lo_|dblink|information_schema|set_config|current_setting"
+    r"|nextval|setval|txid_|query_to_xml|table_to_xml|cursor_to_xml)",
+    re.I,
+)
+# Functions whose argument lists use FROM as a keyword, e.g. EXTRACT(YEAR FROM x)
+_FROM_ARGUMENT_FUNCTIONS = {"extract", "substring", "trim", "overlay", "position"}
+_ALIAS_STOP_WORDS = {
+    "where", "join", "inner", "left", "right", "full", "outer", "cross", "natural",
+    "on", "using", "group", "order", "having", "limit", "offset", "fetch", "union",
+    "except", "intersect", "window", "lateral", "as",
+}
+_ALLOWED_SCHEMAS = {"public", "main"}
+_AGGREGATE_FUNCTIONS = {
+    "count", "sum", "avg", "min", "max", "total", "group_concat", "string_agg",
+    "array_agg", "bool_and", "bool_or", "every", "stddev", "variance",
+}
+_CLAUSE_KEYWORDS = {
+    "having", "order", "limit", "offset", "window", "fetch", "union", "except",
+    "intersect",
+}
+# SQLite has no cost model; a full scan is charged per row in the units of
+# PostgreSQL's planner (cpu_tuple_cost 0.01 plus a sequential page read per ~100
+# rows), so both dialects are held to the same cost limit
+_SQLITE_SCAN_COST_PER_ROW = 0.02
+# Groups assumed per GROUP BY column, PostgreSQL's default for columns without
+# statistics
+_DEFAULT_GROUPS_PER_COLUMN = 200
+
+
+def _unquote(identifier: str) -> str:
+    return ".".join(part.strip('"') for part in identifier.split("."))
+
+
+def _is_word(token: str) -> bool:
+    return bool(token) and (token[0].isalpha() or token[0] in '_"')
+
+
+class ValidatedQuery:
+    """
+    A single SELECT statement that passed static validation, together with the
+    application tables it reads and the aliases they are referenced by.
+    """
+
+    def __init__(self, sql: str, tables: Set[str], aliases: Dict[str, str]):
+        self.sql = sql
+        self.tables = tables
+        self.aliases = aliases
+
+
+def validate_select(sql: str, allowed_tables: Iterable[str]) -> ValidatedQuery:
+    """
+    Statically validate that `sql` is a single SELECT over the application schema.
+
+    Args:
+        sql (str): The raw SQL supplied by the caller.
+        allowed_tables (Iterable[str]): Table names the query may read from.
+
+    Returns:
+        ValidatedQuery: The cleaned statement and the tables it references.
+
+    Raises:
+        QueryRejectedError: If the statement is not a read-only SELECT over allowed tables.
+    """
+    if not sql or not sql.strip():
+        raise QueryRejectedError("Query must not be empty.")
+
+    cleaned = _COMMENT_RE.sub(lambda m: m.group(1) or " ", sql).strip()
+    while cleaned.endswith(";"):
+        cleaned = cleaned[:-1].rstrip()
+    tokens = _TOKEN_RE.findall(cleaned)
+    if not tokens:
+        raise QueryRejectedError("Query must not be empty.")
+    if ";" in tokens:
+        raise QueryRejectedError("Only a single statement is allowed.")
+
+    words = [t.lower() for t in tokens if not t.startswith("'")]
+    first_word = next((w for w in words if w != "("), "")
+    if first_word not in ("select", "with"):
+        raise QueryRejectedError("Only SELECT statements are allowed.")
+
+    for word in words:
+        if word in _FORBIDDEN_KEYWORDS:
+            raise QueryRejectedError(f"Keyword '{word.upper()}' is not allowed.")
+        if _is_word(word) and _FORBIDDEN_IDENTIFIER_RE.match(_unquote(word)):
+            raise QueryRejectedError(f"Reference to '{word}' is not allowed.")
+    if "for" in words and any(w in ("share", "nowait") for w in words):
+        raise QueryRejectedError("Locking clauses are not allowed.")
+
+    lowered = [t.lower() if not t.startswith("'") else t for t in tokens]
+    cte_names = {
+        _unquote(lowered[i])
+        for i in range(len(lowered) - 2)
+        if _is_word(lowered[i]) and lowered[i + 1] == "as" and lowered[i + 2] == "("
+    }
+    allowed = {t.lower() for t in allowed_tables}
+    tables: Set[str] = set()
+    aliases: Dict[str, str] = {}
+    paren_stack: List[Optional[str]] = []
+
+    i = 0
+    while i < len(lowered):
+        token = lowered[i]
+        if token == "(":
+            previous = lowered[i - 1] if i > 0 else None
+            paren_stack.append(previous)
+        elif token == ")":
+            if paren_stack:
+                paren_stack.pop()
+        elif token in ("from", "join") and not (
+            paren_stack and paren_stack[-1] in _FROM_ARGUMENT_FUNCTIONS
+        ):
+            i = _collect_table_refs(
+                lowered, i + 1, token == "from", cte_names, allowed, tables, aliases
+            )
+            continue
+        i += 1
+
+    return ValidatedQuery(cleaned, tables, aliases)
+
+
+def _collect_table_refs(
+    tokens: List[str],
+    i: int,
+    allow_comma_list: bool,
+    cte_names: Set[str],
+    allowed: Set[str],
+    tables: Set[str],
+    aliases: Dict[str, str],
+) -> int:
+    """
+    Parse the table references following a FROM/JOIN keyword, recording every
+    application table (and its alias) and rejecting anything outside the schema.
+    Returns the index of the first unconsumed token.
+    """
+    while i < len(tokens):
+        if tokens[i] == "lateral":
+            i += 1
+        if i >= len(tokens) or not _is_word(tokens[i]) or (
+            i + 1 < len(tokens) and tokens[i + 1] == "("
+        ):
+            # Subquery or table function; its own FROM clauses are visited later.
+            return i
+        name = _unquote(tokens[i])
+        if "." in name:
+            schema, name = name.split(".", 1)
+            if schema not in _ALLOWED_SCHEMAS:
+                raise QueryRejectedError(f"Schema '{schema}' is not allowed.")
+        if name not in cte_names:
+            if name not in allowed:
+                raise QueryRejectedError(
+                    f"Table '{name}' is not part of the application schema."
+                )
+            tables.add(name)
+            aliases[name] = name
+        i += 1
+        if i < len(tokens) and tokens[i] == "as":
+            i += 1
+        if (
+            i < len(tokens)
+            and _is_word(tokens[i])
+            and tokens[i] not in _ALIAS_STOP_WORDS
+        ):
+            if name not in cte_names:
+                aliases[_unquote(tokens[i])] = name
+            i += 1
+        if allow_comma_list and i < len(tokens) and tokens[i] == ",":
+            i += 1
+            continue
+        return i
+    return i
+
+
+def _output_rows(sql: str, input_rows: float) -> float:
+    """
+    Estimate the rows a query returns from the rows it reads, from the shape of its
+    outermost SELECT: an aggregate without GROUP BY returns one row, a GROUP BY
+    one row per group, and LIMIT caps the result.
+    """
+    # Whether each open parenthesis holds a subquery
+    subqueries: List[bool] = []
+    previous = ""
+    aggregate = window = False
+    group_columns = 0
+    in_group_by = False
+    limit: Optional[float] = None
+    for match in _TOKEN_RE.finditer(sql):
+        token = match.group(0).lower()
+        if token.startswith("'"):
+            previous = token
+            continue
+        if token == "(":
+            if previous in _AGGREGATE_FUNCTIONS and not any(subqueries):
+                aggregate = True
+            subqueries.append(False)
+        elif token == ")":
+            if subqueries:
+                subqueries.pop()
+        elif token in ("select", "with") and subqueries:
+            subqueries[-1] = True
+        elif token == "over" and not any(subqueries):
+            # Window functions return a row per input row
+            window = True
+        elif not subqueries:
+            if token in ("union", "except", "intersect"):
+                # Compound queries return up to the rows of all their parts
+                return input_rows
+            if token == "by" and previous == "group":
+                in_group_by, group_columns = True, 1
+            elif token in _CLAUSE_KEYWORDS:
+                in_group_by = False
+            elif token == "," and in_group_by:
+                group_columns += 1
+            if token == "limit":
+                number = re.match(r"\s*(\d+)", sql[match.end():])
+                if number:
+                    limit = float(number.group(1))
+        previous = token
+
+    if group_columns:
+        rows = min(input_rows, float(_DEFAULT_GROUPS_PER_COLUMN) ** group_columns)
+    elif aggregate and not window:
+        rows = 1.0
+    else:
+        rows = input_rows
+    return rows if limit is None else min(rows, limit)
+
+
+def estimate_plan(connection: Connection, query: ValidatedQuery) -> Dict[str, Any]:
+    """
+    Estimate the cost and result size of a validated query without running it.
+
+    On PostgreSQL this reads the planner's `Total Cost` and `Plan Rows` from
+    `EXPLAIN (FORMAT JSON)`. SQLite has no cost model, so full table scans from
+    `EXPLAIN QUERY PLAN` are charged by each table's row count (nested scans
+    multiply), and the returned rows are estimated from the rows read and the
+    aggregation, grouping and LIMIT of the query.
+
+    Args:
+        connection (Connection): An open connection inside the query transaction.
+        query (ValidatedQuery): The statement to estimate.
+
+    Returns:
+        Dict[str, Any]: {"estimated_cost": float, "estimated_rows": float, "plan": list}
+    """
+    driver_options = {"no_parameters": True}
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        raw = connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {query.sql}", execution_options=driver_options
+        ).scalar()
+        plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+        return {
+            "estimated_cost": float(plan["Total Cost"]),
+            "estimated_rows": float(plan["Plan Rows"]),
+            "plan": [plan["Node Type"]],
+        }
+    if dialect == "sqlite":
+        steps = [
+            row[3]
+            for row in connection.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {query.sql}", execution_options=driver_options
+            )
+        ]
+        table_rows = {
+            table: float(
+                connection.exec_driver_sql(
+                    f'SELECT COALESCE(MAX(rowid), 0) FROM "{table}"'
+                ).scalar()
+            )
+            for table in query.tables
+        }
+        largest = max(table_rows.values(), default=0.0)
+        scanned_rows, read_rows = 1.0, 0.0
+        for step in steps:
+            match = re.match(r"SCAN (\S+)", step)
+            if not match or step.startswith("SCAN CONSTANT ROW"):
+                continue
+            scanned = table_rows.get(query.aliases.get(match.group(1), ""), largest)
+            scanned_rows *= max(scanned, 1.0)
+            read_rows = max(read_rows, scanned)
+        return {
+            "estimated_cost": scanned_rows * _SQLITE_SCAN_COST_PER_ROW,
+            "estimated_rows": _output_rows(query.sql, read_rows),
+            "plan": steps,
+        }
+    raise QueryRejectedError(
+        f"Plan estimation is not supported for the '{dialect}' dialect."
+    )
+
+
+def apply_read_only_guards(connection: Connection, timeout_ms: int) -> None:
+    """
+    Make the current transaction read-only and bound its statement runtime.
+    Must be paired with `release_read_only_guards` before the connection is reused.
+    """
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+    elif dialect == "sqlite":
+        dbapi_connection = connection.connection.dbapi_connection
+        deadline = time.monotonic() + timeout_ms / 1000
+        dbapi_connection.execute("PRAGMA query_only = ON")
+        # A non-zero return aborts the running statement with "interrupted".
+        dbapi_connection.set_progress_handler(
+            lambda: int(time.monotonic() > deadline), 10_000
+        )
+
+
+def release_read_only_guards(connection: Connection) -> None:
+    """Undo connection-level state set by `apply_read_only_guards`."""
+    if connection.dialect.name == "sqlite":
+        dbapi_connection = connection.connection.dbapi_connection
+        dbapi_connection.set_progress_handler(None, 0)
+        dbapi_connection.execute("PRAGMA query_only = OFF")
+
+
+def to_jsonable(value: Any) -> Any:
+    """Convert a database value into a JSON-serialisable Python value."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    return value
@@ -0,0 +1,403 @@
+"""
+Bulk synthetic data generator for the Dwight Schrute application database.
+
+Builds users, subscriptions, user_subscriptions and invoices following the schema in
+models.py with realistic distributions (growing sign-ups, skewed plan mix, churn and
+monthly/annual billing). Rows are generated in vectorized chunks with numpy and the
+`faker` dev dependency, and bulk-loaded with COPY on PostgreSQL and executemany
+batches on SQLite.
+
+Usage (from the scranton/agents directory):
+    python -m dwight_schrute.tools.database.synthetic_data \
+        --database-url sqlite:///dwight_schrute.db --users 100000 --reset
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from faker import Faker
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine
+
+from dwight_schrute.tools.database.models import (  # pylint: disable=E0401
+    Base,
+    Subscription,
+    SubscriptionStatus,
+)
+from dwight_schrute.tools.database.user_search import (  # pylint: disable=E0401
+    ensure_search_index,
+)
+
+
+logger = logging.getLogger(__name__)
+
+PLANS = [
+    ("Basic SD", 5.99, "Standard Definition streaming, 1 screen"),
+    ("Standard HD", 9.99, "High Definition streaming, 2 screens"),
+    ("Premium 4K", 15.99, "Ultra HD/4K streaming, 4 screens"),
+    ("Family Plan", 19.99, "Family plan with multiple profiles"),
+    ("Annual Plan", 99.99, "Annual subscription with a discount"),
+]
+# Share of new subscriptions per plan, in PLANS order
+PLAN_WEIGHTS = [0.30, 0.35, 0.18, 0.12, 0.05]
+ANNUAL_PLAN = "Annual Plan"
+
+DAY = np.timedelta64(86400, "s")
+
+
+def _add_months(timestamps: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """
+    Add a whole number of calendar months to datetime64[s] values, clamping the
+    day of month (e.g. Jan 31 + 1 month -> Feb 28/29) and keeping the time of day.
+    """
+    days = timestamps.astype("datetime64[D]")
+    month = timestamps.astype("datetime64[M]")
+    day_of_month = (days - month.astype("datetime64[D]")).astype(np.int64)
+    time_of_day = timestamps - days.astype("datetime64[s]")
+    target = month + months.astype("timedelta64[M]")
+    month_length = (
+        (target + np.timedelta64(1, "M")).astype("datetime64[D]")
+        - target.astype("datetime64[D]")
+    ).astype(np.int64)
+    return (
+        target.astype("datetime64[D]") + np.minimum(day_of_month, month_length - 1)
+    ).astype("datetime64[s]") + time_of_day
+
+
+def _format_timestamps(timestamps: np.ndarray) -> List[str]:
+    """
+    Render datetime64 values in the 'YYYY-MM-DD HH:MM:SS.ffffff' form SQLAlchemy
+    uses for DateTime columns on SQLite, which PostgreSQL COPY also accepts.
+    """
+    return np.char.replace(
+        np.datetime_as_string(timestamps, unit="us"), "T", " "
+    ).tolist()
+
+
+class SyntheticDataGenerator:
+    """
+    Generates and bulk-loads a synthetic dataset into the application database.
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        seed: int = 42,
+        years: int = 3,
+        end_date: Optional[datetime] = None,
+        chunk_users: int = 50_000,
+        batch_size: int = 20_000,
+        unpaid_rate: float = 0.05,
+        churn_rate: float = 0.35,
+    ) -> None:
+        """
+        Args:
+            database_url (str): SQLAlchemy URL of the target database.
+            seed (int): Random seed; the same seed and sizes give the same dataset.
+            years (int): Length of the simulated sign-up history.
+            end_date (Optional[datetime]): "Today" of the simulation. Defaults to now.
+            chunk_users (int): Users generated (and loaded) per chunk, bounding memory.
+            batch_size (int): Rows per executemany batch on SQLite.
+            unpaid_rate (float): Share of invoices left unpaid.
+            churn_rate (float): Share of subscriptions that end before `end_date`.
+        """
+        self.engine: Engine = create_engine(database_url)
+        self.seed = seed
+        self.years = years
+        self.end = np.datetime64(
+            (end_date or datetime.now()).replace(microsecond=0), "s"
+        )
+        self.start = self.end - np.timedelta64(int(years * 365.25), "D")
+        self.chunk_users = chunk_users
+        self.batch_size = batch_size
+        self.unpaid_rate = unpaid_rate
+        self.churn_rate = churn_rate
+        faker = Faker()
+        Faker.seed(seed)
+        self._name_pool = np.array(
+            sorted({faker.user_name() for _ in range(5_000)}), dtype=object
+        )
+        self._domain_pool = np.array(
+            sorted({faker.free_email_domain() for _ in range(200)}), dtype=object
+        )
+
+    # <-- Schema and bookkeeping -->
+    def reset(self) -> None:
+        """Drop and recreate all application tables."""
+        Base.metadata.drop_all(self.engine)
+        Base.metadata.create_all(self.engine)
+
+    def _ensure_plans(self, connection: Connection) -> Dict[str, int]:
+        """Insert any missing subscription plans and return a name -> id map."""
+        table = Subscription.__table__
+        query = text("SELECT name, id FROM subscriptions")
+        existing = {name: plan_id for name, plan_id in connection.execute(query)}
+        missing = [
+            {"name": name, "price": price, "description": description}
+            for name, price, description in PLANS
+            if name not in existing
+        ]
+        if missing:
+            connection.execute(table.insert(), missing)
+            existing = {name: plan_id for name, plan_id in connection.execute(query)}
+        return existing
+
+    @staticmethod
+    def _next_id(connection: Connection, table: str) -> int:
+        return int(
+            connection.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {table}")).scalar()
+        ) + 1
+
+    # <-- Loading -->
+    def _bulk_load(
+        self,
+        connection: Connection,
+        table: str,
+        columns: Sequence[str],
+        data: Sequence[list],
+    ) -> None:
+        """
+        Load column-oriented data with COPY (PostgreSQL) or executemany (SQLite).
+        """
+        rows = list(zip(*data))
+        cursor = connection.connection.dbapi_connection.cursor()
+        try:
+            if connection.dialect.name == "postgresql":
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                    buffer,
+                )
+            else:
+                statement = (
+                    f"INSERT INTO {table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' for _ in columns)})"
+                )
+                for offset in range(0, len(rows), self.batch_size):
+                    cursor.executemany(statement, rows[offset : offset + self.batch_size])
+        finally:
+            cursor.close()
+
+    def _finalize(self, connection: Connection) -> None:
+        """
+        Advance PostgreSQL sequences past the explicit ids, build the user search
+        index and refresh statistics.
+        """
+        tables = ["users", "subscriptions", "user_subscriptions", "invoices"]
+        if connection.dialect.name == "postgresql":
+            for table in tables:
+                connection.execute(
+                    text(
+                        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                        f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+                    )
+                )
+        ensure_search_index(connection)
+        connection.execute(text("ANALYZE"))
+
+    # <-- Generation -->
+    def _generate_chunk(
+        self,
+        rng: np.random.Generator,
+        user_ids: np.ndarray,
+        total_users: int,
+        first_user_id: int,
+        first_user_subscription_id: int,
+        first_invoice_id: int,
+        plan_ids: np.ndarray,
+        plan_prices: np.ndarray,
+        plan_is_annual: np.ndarray,
+    ) -> Dict[str, Dict[str, list]]:
+        """Generate one chunk of users with their subscriptions and invoices."""
+        n_users = len(user_ids)
+        span = (self.end - self.start).astype(np.int64)
+
+        # Sign-ups accelerate over time (linearly increasing density) and ids
+        # follow sign-up order.
+        position = (user_ids - first_user_id + rng.random(n_users)) / total_users
+        created_at = self.start + (np.sqrt(position) * span).astype(np.int64)
+
+        names = self._name_pool[rng.integers(0, len(self._name_pool), n_users)]
+        usernames = [f"{name}{uid}" for name, uid in zip(names, user_ids.tolist())]
+        domains = self._domain_pool[rng.integers(0, len(self._domain_pool), n_users)]
+        emails = [f"{name}@{domain}" for name, domain in zip(usernames, domains)]
+
+        # Most users hold a single subscription; some switch or add plans.
+        per_user = 1 + rng.binomial(2, 0.2, n_users)
+        n_subs = int(per_user.sum())
+        sub_ids = np.arange(first_user_subscription_id, first_user_subscription_id + n_subs)
+        sub_users = np.repeat(user_ids, per_user)
+        plan_index = rng.choice(len(plan_ids), n_subs, p=PLAN_WEIGHTS)
+        annual = plan_is_annual[plan_index]
+        delay = (rng.exponential(45, n_subs) * 86400).astype(np.int64)
+        start = np.minimum(
+            np.repeat(created_at, per_user) + delay, self.end - DAY
+        )
+
+        # Churned subscriptions end after an exponential tenure; the rest stay
+        # active with end_date set to the next renewal after "today".
+        tenure = ((30 + rng.exponential(270, n_subs)) * 86400).astype(np.int64)
+        churn_end = start + tenure
+        churned = (rng.random(n_subs) < self.churn_rate) & (churn_end < self.end)
+        step = np.where(annual, 12, 1)
+        elapsed = (
+            self.end.astype("datetime64[M]") - start.astype("datetime64[M]")
+        ).astype(np.int64)
+        periods = elapsed // step + 1
+        renewal = _add_months(start, periods * step)
+        periods = np.where(renewal <= self.end, periods + 1, periods)
+        renewal = _add_months(start, periods * step)
+        end_date = np.where(churned, churn_end, renewal)
+        status = np.where(
+            churned,
+            np.where(
+                rng.random(n_subs) < 0.7,
+                SubscriptionStatus.CANCELLED.name,
+                SubscriptionStatus.EXPIRED.name,
+            ),
+            SubscriptionStatus.ACTIVE.name,
+        )
+
+        # One invoice per billing period started before the subscription ended.
+        bill_end = np.where(churned, churn_end, self.end)
+        counts = (
+            bill_end.astype("datetime64[M]") - start.astype("datetime64[M]")
+        ).astype(np.int64) // step + 1
+        last = _add_months(start, (counts - 1) * step)
+        counts = np.maximum(np.where(last >= bill_end, counts - 1, counts), 1)
+        n_invoices = int(counts.sum())
+        period_index = np.arange(n_invoices) - np.repeat(np.cumsum(counts) - counts, counts)
+        invoice_date = _add_months(
+            np.repeat(start, counts), period_index * np.repeat(step, counts)
+        )
+        invoice_status = np.where(
+            rng.random(n_invoices) < self.unpaid_rate, "unpaid", "paid"
+        )
+        invoice_created = invoice_date + (rng.random(n_invoices) * 3600).astype(np.int64)
+
+        return {
+            "users": {
+                "id": user_ids.tolist(),
+                "username": usernames,
+                "email": emails,
+                "created_at": _format_timestamps(created_at),
+            },
+            "user_subscriptions": {
+                "id": sub_ids.tolist(),
+                "user_id": sub_users.tolist(),
+                "subscription_id": plan_ids[plan_index].tolist(),
+                "start_date": _format_timestamps(start),
+                "end_date": _format_timestamps(end_date),
+                "status": status.tolist(),
+            },
+            "invoices": {
+                "id": np.arange(first_invoice_id, first_invoice_id + n_invoices).tolist(),
+                "user_subscription_id": np.repeat(sub_ids, counts).tolist(),
+                "invoice_date": _format_timestamps(invoice_date),
+                "amount": np.repeat(plan_prices[plan_index], counts).tolist(),
+                "status": invoice_status.tolist(),
+                "created_at": _format_timestamps(invoice_created),
+            },
+        }
+
+    def generate(self, n_users: int, reset: bool = False) -> Dict[str, float]:
+        """
+        Generate and load `n_users` users with their subscriptions and invoices.
+
+        Args:
+            n_users (int): Number of users to add.
+            reset (bool): Drop and recreate the tables first.
+
+        Returns:
+            Dict[str, float]: Row counts added per table and the elapsed seconds.
+        """
+        started = time.perf_counter()
+        if reset:
+            self.reset()
+        else:
+            Base.metadata.create_all(self.engine)
+
+        totals = {"users": 0, "user_subscriptions": 0, "invoices": 0}
+        with self.engine.begin() as connection:
+            plans = self._ensure_plans(connection)
+            plan_ids = np.array([plans[name] for name, _, _ in PLANS])
+            plan_prices = np.array([price for _, price, _ in PLANS])
+            plan_is_annual = np.array([name == ANNUAL_PLAN for name, _, _ in PLANS])
+            next_user = self._next_id(connection, "users")
+            next_sub = self._next_id(connection, "user_subscriptions")
+            next_invoice = self._next_id(connection, "invoices")
+
+        first_user = next_user
+        for chunk, offset in enumerate(range(0, n_users, self.chunk_users)):
+            rng = np.random.default_rng([self.seed, chunk])
+            size = min(self.chunk_users, n_users - offset)
+            user_ids = np.arange(next_user, next_user + size)
+            data = self._generate_chunk(
+                rng,
+                user_ids,
+                n_users,
+                first_user,
+                next_sub,
+                next_invoice,
+                plan_ids,
+                plan_prices,
+                plan_is_annual,
+            )
+            with self.engine.begin() as connection:
+                for table, columns in data.items():
+                    self._bulk_load(
+                        connection, table, list(columns), list(columns.values())
+                    )
+            added = {table: len(columns["id"]) for table, columns in data.items()}
+            for table, count in added.items():
+                totals[table] += count
+            next_user += added["users"]
+            next_sub += added["user_subscriptions"]
+            next_invoice += added["invoices"]
+            logger.info(
+                "Loaded chunk %d: %s (%.1fs elapsed)",
+                chunk,
+                added,
+                time.perf_counter() - started,
+            )
+
+        with self.engine.begin() as connection:
+            self._finalize(connection)
+        return {
+            **totals,
+            "subscriptions": len(PLANS),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", default="sqlite:///dwight_schrute.db")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--chunk-users", type=int, default=50_000)
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate tables")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    generator = SyntheticDataGenerator(
+        args.database_url,
+        seed=args.seed,
+        years=args.years,
+        chunk_users=args.chunk_users,
+    )
+    print(json.dumps(generator.generate(args.users, reset=args.reset), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Per-plan unit economics: ARPU, tenure, churn, lifetime value and revenue
+concentration.
+
+Each subscription's paid revenue and tenure are aggregated in a subquery, ranked by
+revenue within its plan with window functions, and grouped per plan, so the database
+returns one row per plan however many subscriptions there are. The ranks give the
+revenue share of the top decile of subscriptions and the Gini coefficient without
+fetching the individual subscriptions. The derived metrics are then computed for all
+plans at once with NumPy.
+
+Tenure runs from the start date to the end date for ended subscriptions and to "as
+of" for active ones (whose end date is their next renewal). Monthly churn is the
+number of ended subscriptions per subscription-month of exposure, and LTV is the
+monthly ARPU divided by that churn rate.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import DateTime, and_, case, func, literal, select
+
+from dwight_schrute.tools.database.models import (  # pylint: disable=E0401
+    Invoice,
+    Subscription,
+    SubscriptionStatus,
+    UserSubscription,
+)
+
+
+DAYS_PER_MONTH = 365.25 / 12
+
+# Share of the highest-revenue subscriptions whose revenue share is reported
+TOP_SHARE = 0.1
+
+COLUMNS = [
+    "plan",
+    "price",
+    "subscriptions",
+    "active",
+    "churned",
+    "revenue",
+    "revenue_share",
+    "arpu_monthly",
+    "avg_tenure_months",
+    "monthly_churn_rate",
+    "ltv",
+    "revenue_per_subscription",
+    "top_10pct_revenue_share",
+    "gini",
+]
+
+
+def _days_between(end, start, dialect: str):
+    if dialect == "postgresql":
+        return func.extract("epoch", end - start) / 86400.0
+    return func.julianday(end) - func.julianday(start)
+
+
+def unit_economics_query(
+    dialect: str,
+    as_of: datetime,
+    cohort_start: Optional[datetime] = None,
+    cohort_end: Optional[datetime] = None,
+    by_plan: bool = True,
+):
+    """
+    Build the grouped query of per-plan (or overall) subscription and revenue totals.
+
+    Args:
+        dialect (str): Name of the database dialect.
+        as_of (datetime): The moment tenure of active subscriptions runs to.
+        cohort_start (Optional[datetime]): Only subscriptions started on or after this.
+        cohort_end (Optional[datetime]): Only subscriptions started before this.
+        by_plan (bool): Group per plan, or over all subscriptions at once.
+
+    Returns:
+        Select: Rows of (plan, price, subscriptions, active, churned, revenue,
+        tenure days, rank-weighted revenue, top decile revenue).
+    """
+    as_of_value = literal(as_of, DateTime)
+    ended = and_(
+        UserSubscription.status != SubscriptionStatus.ACTIVE,
+        UserSubscription.end_date < as_of_value,
+    )
+    tenure_end = case((ended, UserSubscription.end_date), else_=as_of_value)
+    cohort = []
+    if cohort_start:
+        cohort.append(UserSubscription.start_date >= cohort_start)
+    if cohort_end:
+        cohort.append(UserSubscription.start_date < cohort_end)
+
+    per_subscription = (
+        select(
+            UserSubscription.subscription_id.label("plan_id"),
+            case((UserSubscription.status == SubscriptionStatus.ACTIVE, 1), else_=0).label("active"),
+            case((ended, 1), else_=0).label("churned"),
+            _days_between(tenure_end, UserSubscription.start_date, dialect).label("tenure_days"),
+            func.coalesce(func.sum(Invoice.amount), 0.0).label("revenue"),
+        )
+        .select_from(UserSubscription)
+        .outerjoin(
+            Invoice,
+            and_(
+                Invoice.user_subscription_id == UserSubscription.id,
+                Invoice.status == "paid",
+                Invoice.invoice_date < as_of_value,
+            ),
+        )
+        .where(UserSubscription.start_date < as_of_value, *cohort)
+        .group_by(UserSubscription.id)
+        .subquery()
+    )
+    partition = [per_subscription.c.plan_id] if by_plan else []
+    ranked = select(
+        per_subscription,
+        func.row_number()
+        .over(partition_by=partition, order_by=per_subscription.c.revenue)
+        .label("revenue_rank"),
+        func.count().over(partition_by=partition).label("group_size"),
+    ).subquery()
+
+    totals = [
+        func.count(),
+        func.sum(ranked.c.active),
+        func.sum(ranked.c.churned),
+        func.sum(ranked.c.revenue),
+        func.sum(ranked.c.tenure_days),
+        func.sum(ranked.c.revenue_rank * ranked.c.revenue),
+        func.sum(
+            case(
+                (ranked.c.revenue_rank > ranked.c.group_size * (1 - TOP_SHARE), ranked.c.revenue),
+                else_=0.0,
+            )
+        ),
+    ]
+    if not by_plan:
+        return select(literal("All plans"), literal(None), *totals).select_from(ranked)
+    return (
+        select(Subscription.name, Subscription.price, *totals)
+        .select_from(ranked)
+        .join(Subscription, Subscription.id == ranked.c.plan_id)
+        .group_by(Subscription.id, Subscription.name, Subscription.price)
+        .order_by(Subscription.price)
+    )
+
+
+def unit_economics_table(rows: Sequence[Sequence[Any]]) -> Dict[str, Any]:
+    """
+    Derive the per-plan metrics from the rows of unit_economics_query.
+
+    Args:
+        rows (Sequence[Sequence[Any]]): Per-plan rows, optionally followed by the
+            overall row.
+
+    Returns:
+        Dict[str, Any]: {"columns": [...], "rows": [[...], ...]}. Metrics that are
+        undefined (such as LTV without any churn) are None.
+    """
+    rows = [row for row in rows if row[2]]
+    if not rows:
+        return {"columns": COLUMNS, "rows": []}
+    names = [row[0] for row in rows]
+    prices = [row[1] for row in rows]
+    subscriptions, active, churned, revenue, tenure_days, weighted, top = (
+        np.asarray(column, dtype=float) for column in list(zip(*rows))[2:]
+    )
+    by_plan = np.array([price is not None for price in prices])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        months = tenure_days / DAYS_PER_MONTH
+        arpu = revenue / months
+        churn_rate = churned / months
+        ltv = np.where(churn_rate > 0, arpu / churn_rate, np.nan)
+        revenue_share = revenue / revenue[by_plan].sum()
+        # Gini of the revenue per subscription, from its ascending revenue ranks
+        gini = 2 * weighted / (subscriptions * revenue) - (subscriptions + 1) / subscriptions
+        top_share = top / revenue
+
+    def value(array: np.ndarray, i: int, decimals: int) -> Optional[float]:
+        return round(float(array[i]), decimals) if np.isfinite(array[i]) else None
+
+    table: List[List[Any]] = []
+    for i, name in enumerate(names):
+        table.append(
+            [
+                name,
+                prices[i],
+                int(subscriptions[i]),
+                int(active[i]),
+                int(churned[i]),
+                round(float(revenue[i]), 2),
+                value(revenue_share, i, 4),
+                value(arpu, i, 2),
+                value(months / subscriptions, i, 1),
+                value(churn_rate, i, 4),
+                value(ltv, i, 2),
+                value(revenue / subscriptions, i, 2),
+                value(top_share, i, 4),
+                value(gini, i, 3),
+            ]
+        )
+    return {"columns": COLUMNS, "rows": table}
@@ -0,0 +1,379 @@
+"""
+Indexed fuzzy search over users by username and email.
+
+PostgreSQL uses `pg_trgm` GIN indexes, while SQLite uses an FTS5 shadow table with
+the trigram tokenizer, kept in sync with `users` by triggers. Both backends fetch a
+small candidate set from the index, join each candidate's active subscription in the
+same statement, and rank the candidates by trigram similarity.
+
+Creating the index is DDL (and on PostgreSQL a blocking index build), so it is done
+by the synthetic data generator or by running this module as a migration, never by
+the read-only tools. Without the index, searches fall back to LIKE scans.
+
+Usage (from the scranton/agents directory):
+    python -m dwight_schrute.tools.database.user_search \
+        --database-url sqlite:///dwight_schrute.db
+"""
+
+import argparse
+import json
+import logging
+import re
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from sqlalchemy import DateTime, Float, Integer, String, bindparam, create_engine, text
+from sqlalchemy.engine import Connection
+
+
+MIN_QUERY_LENGTH = 3
+
+# Queries at least this long are also matched by their two halves
+_SPLIT_QUERY_LENGTH = 6
+
+# Candidates fetched per index lookup and requested match before re-ranking
+_CANDIDATES_PER_MATCH = 10
+
+_NON_WORD_RE = re.compile(r"[^0-9a-z]+")
+
+_POSTGRES_INDEXES = ("ix_users_username_trgm", "ix_users_email_trgm")
+
+_POSTGRES_INDEX_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_users_username_trgm "
+    "ON users USING gin (username gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_email_trgm "
+    "ON users USING gin (email gin_trgm_ops)",
+]
+
+_SQLITE_TRIGGERS = ("users_search_ai", "users_search_ad", "users_search_au")
+
+_SQLITE_INDEX_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS users_search USING fts5("
+    "username, email, content='users', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS users_search_ai AFTER INSERT ON users BEGIN "
+    "INSERT INTO users_search(rowid, username, email) "
+    "VALUES (new.id, new.username, new.email); END",
+    "CREATE TRIGGER IF NOT EXISTS users_search_ad AFTER DELETE ON users BEGIN "
+    "INSERT INTO users_search(users_search, rowid, username, email) "
+    "VALUES ('delete', old.id, old.username, old.email); END",
+    "CREATE TRIGGER IF NOT EXISTS users_search_au AFTER UPDATE ON users BEGIN "
+    "INSERT INTO users_search(users_search, rowid, username, email) "
+    "VALUES ('delete', old.id, old.username, old.email); "
+    "INSERT INTO users_search(rowid, username, email) "
+    "VALUES (new.id, new.username, new.email); END",
+]
+
+# The active-subscription lookup uses this index on both backends
+_SUBSCRIPTION_INDEX_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_user_subscriptions_user_id "
+    "ON user_subscriptions (user_id)"
+)
+
+_POSTGRES_CANDIDATES = """
+    SELECT id FROM users
+    WHERE username % :q OR email % :q
+       OR username LIKE :pattern ESCAPE '\\' OR email LIKE :pattern ESCAPE '\\'
+    ORDER BY GREATEST(similarity(username, :q), similarity(email, :q)) DESC
+    LIMIT :candidates
+"""
+
+# Prefix completions come from the username/email B-tree indexes, substring and
+# typo-tolerant matches from the FTS5 trigram index. FTS5 subqueries are unordered,
+# since bm25 ranking would score every row that shares a broad segment (such as an
+# email domain); candidates are re-ranked by trigram similarity instead.
+_SQLITE_PREFIX_CANDIDATES = """
+    SELECT id FROM (
+        SELECT id FROM users WHERE {condition}
+        ORDER BY {column} LIMIT :candidates
+    )
+"""
+
+_SQLITE_SEGMENT_CANDIDATES = """
+    SELECT id FROM (
+        SELECT rowid AS id FROM users_search WHERE users_search MATCH :segment_{index}
+        LIMIT :candidates
+    )
+"""
+
+# Without the search index, substrings are matched by a scan of users
+_UNINDEXED_CANDIDATES = """
+    SELECT id FROM users
+    WHERE {conditions}
+    LIMIT :candidates
+"""
+
+_SEARCH_QUERY = """
+    WITH candidates AS ({candidates})
+    SELECT u.id, u.username, u.email, u.created_at,
+           s.name AS subscription_name, s.price AS subscription_price,
+           us.start_date AS subscription_start, us.end_date AS subscription_end
+    FROM candidates c
+    JOIN users u ON u.id = c.id
+    LEFT JOIN user_subscriptions us ON us.id = (
+        SELECT latest.id FROM user_subscriptions latest
+        WHERE latest.user_id = u.id AND latest.status = 'ACTIVE'
+        ORDER BY latest.start_date DESC
+        LIMIT 1
+    )
+    LEFT JOIN subscriptions s ON s.id = us.subscription_id
+"""
+
+
+def normalize_query(query: str) -> str:
+    """Lower-case and trim a search string, as usernames and emails are stored."""
+    return (query or "").strip().lower()
+
+
+def trigrams(value: str) -> FrozenSet[str]:
+    """
+    Return the trigram set of a string, padded like pg_trgm pads each word.
+    """
+    grams = set()
+    for word in _NON_WORD_RE.split(value.lower()):
+        if word:
+            padded = f"  {word} "
+            grams.update([padded[i : i + 3] for i in range(len(padded) - 2)])
+    return frozenset(grams)
+
+
+def similarity(left: str, right: str) -> float:
+    """Trigram similarity of two strings in [0, 1] (shared / union trigrams)."""
+    return _similarity(trigrams(left), trigrams(right))
+
+
+def _similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+def _score(query: str, query_grams: FrozenSet[str], username: str, email: str) -> float:
+    """
+    Rank a candidate by its best trigram similarity. A username or email that starts
+    with the query is a completion of a partial handle and scores at least 0.5,
+    more the larger the share of the handle it covers.
+    """
+    score = max(
+        _similarity(query_grams, trigrams(username)),
+        _similarity(query_grams, trigrams(email)),
+    )
+    for value in (username, email):
+        if value.startswith(query):
+            score = max(score, 0.5 + 0.5 * len(query) / len(value))
+    return score
+
+
+def _segments(query: str) -> List[str]:
+    """
+    Split a query into the substrings to match. Besides the whole query, longer
+    queries are also matched by their two halves, so that a single typo still leaves
+    one half matching exactly. Email domains are shared by most users and would make
+    the match broad, so only the local part of an email address is used.
+    """
+    local_part = query.split("@", 1)[0]
+    if len(local_part) >= MIN_QUERY_LENGTH:
+        query = local_part
+    segments = [query]
+    if len(query) >= _SPLIT_QUERY_LENGTH:
+        middle = len(query) // 2
+        segments += [query[:middle], query[middle:]]
+    return segments
+
+
+def _fts5_segments(query: str) -> List[str]:
+    """
+    Build the FTS5 substring expressions for a query. With the trigram tokenizer a
+    quoted string matches as a substring.
+    """
+    return ['"{}"'.format(segment.replace('"', '""')) for segment in _segments(query)]
+
+
+def _escape_like(value: str) -> str:
+    return re.sub(r"([\\%_])", r"\\\1", value)
+
+
+def _prefix_end(prefix: str) -> Optional[str]:
+    """
+    Return the smallest string greater than every string starting with `prefix`,
+    or None if there is none (the prefix is made of U+10FFFF only).
+    """
+    prefix = prefix.rstrip(chr(0x10FFFF))
+    if not prefix:
+        return None
+    code = ord(prefix[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:
+        # Surrogates are not characters; skip to the next code point
+        code = 0xE000
+    return prefix[:-1] + chr(code)
+
+
+def has_search_index(connection: Connection) -> bool:
+    """
+    Whether the search index exists, checked in the catalog without any DDL.
+
+    Args:
+        connection (Connection): An open connection.
+    """
+    if connection.dialect.name == "postgresql":
+        found = connection.execute(
+            text(
+                "SELECT COUNT(*) FROM pg_indexes "
+                "WHERE tablename = 'users' AND indexname IN :names"
+            ).bindparams(bindparam("names", expanding=True)),
+            {"names": list(_POSTGRES_INDEXES)},
+        ).scalar()
+        return found == len(_POSTGRES_INDEXES)
+    found = connection.execute(
+        text(
+            "SELECT COUNT(*) FROM sqlite_master "
+            "WHERE (type = 'table' AND name = 'users_search') "
+            "OR (type = 'trigger' AND name IN :names)"
+        ).bindparams(bindparam("names", expanding=True)),
+        {"names": list(_SQLITE_TRIGGERS)},
+    ).scalar()
+    return found == 1 + len(_SQLITE_TRIGGERS)
+
+
+def ensure_search_index(connection: Connection) -> None:
+    """
+    Create the search index if it is missing. Idempotent; on SQLite the shadow
+    table is (re)built whenever its sync triggers are missing, e.g. after the
+    users table was recreated.
+
+    This runs DDL and needs privileges the agent's tools do not have; it is run
+    by the data generator and by this module's migration entry point.
+
+    Args:
+        connection (Connection): An open connection; the caller commits.
+    """
+    connection.exec_driver_sql(_SUBSCRIPTION_INDEX_DDL)
+    if connection.dialect.name == "postgresql":
+        for statement in _POSTGRES_INDEX_DDL:
+            connection.exec_driver_sql(statement)
+        return
+    triggers = connection.exec_driver_sql(
+        "SELECT COUNT(*) FROM sqlite_master "
+        "WHERE type = 'trigger' AND name LIKE 'users_search_%'"
+    ).scalar()
+    for statement in _SQLITE_INDEX_DDL:
+        connection.exec_driver_sql(statement)
+    if triggers < 3:
+        connection.exec_driver_sql(
+            "INSERT INTO users_search(users_search) VALUES ('rebuild')"
+        )
+
+
+def find_users(
+    connection: Connection, query: str, limit: int, indexed: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Find the users whose username or email best match a (partial or misspelled) query.
+
+    Args:
+        connection (Connection): An open connection.
+        query (str): Normalized search string of at least MIN_QUERY_LENGTH characters.
+        limit (int): Maximum number of matches to return.
+        indexed (bool): Whether the search index exists (see `has_search_index`).
+            Without it, candidates are found by LIKE scans, which still tolerate a
+            typo in longer queries but not in short ones.
+
+    Returns:
+        List[Dict[str, Any]]: Matches with their active subscription (or None),
+        best first.
+    """
+    params: Dict[str, Any] = {"candidates": limit * _CANDIDATES_PER_MATCH}
+    if not indexed:
+        segments = _segments(query)
+        candidates = _UNINDEXED_CANDIDATES.format(
+            conditions=" OR ".join(
+                f"{column} LIKE :like_{index} ESCAPE '\\'"
+                for index in range(len(segments))
+                for column in ("username", "email")
+            )
+        )
+        params.update(
+            {
+                f"like_{index}": f"%{_escape_like(segment)}%"
+                for index, segment in enumerate(segments)
+            }
+        )
+    elif connection.dialect.name == "postgresql":
+        candidates = _POSTGRES_CANDIDATES
+        params.update(q=query, pattern=f"{_escape_like(query)}%")
+    else:
+        segments = _fts5_segments(query)
+        q_end = _prefix_end(query)
+        condition = "{column} >= :q" + (" AND {column} < :q_end" if q_end else "")
+        candidates = " UNION ".join(
+            [
+                _SQLITE_PREFIX_CANDIDATES.format(
+                    column=column, condition=condition.format(column=column)
+                )
+                for column in ("username", "email")
+            ]
+            + [
+                _SQLITE_SEGMENT_CANDIDATES.format(index=index)
+                for index in range(len(segments))
+            ]
+        )
+        params.update(
+            q=query,
+            **{f"segment_{index}": segment for index, segment in enumerate(segments)},
+        )
+        if q_end:
+            params["q_end"] = q_end
+    statement = text(_SEARCH_QUERY.format(candidates=candidates)).columns(
+        id=Integer,
+        username=String,
+        email=String,
+        created_at=DateTime,
+        subscription_name=String,
+        subscription_price=Float,
+        subscription_start=DateTime,
+        subscription_end=DateTime,
+    )
+    rows = connection.execute(statement, params).mappings()
+
+    query_grams = trigrams(query)
+    matches = []
+    for row in rows:
+        subscription = None
+        if row["subscription_name"] is not None:
+            subscription = {
+                "name": row["subscription_name"],
+                "price": row["subscription_price"],
+                "start_date": row["subscription_start"],
+                "end_date": row["subscription_end"],
+            }
+        matches.append(
+            {
+                "user_id": row["id"],
+                "username": row["username"],
+                "email": row["email"],
+                "created_at": row["created_at"],
+                "score": round(
+                    _score(query, query_grams, row["username"], row["email"]), 4
+                ),
+                "active_subscription": subscription,
+            }
+        )
+    matches.sort(key=lambda match: (-match["score"], match["user_id"]))
+    return matches[:limit]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create the user search index.")
+    parser.add_argument("--database-url", required=True)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    engine = create_engine(args.database_url)
+    with engine.begin() as connection:
+        ensure_search_index(connection)
+        result = {"indexed": has_search_index(connection)}
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
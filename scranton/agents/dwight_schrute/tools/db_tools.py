@@ -3,15 +3,30 @@ This module contains tools for interacting with a database.
 """
 
 import os
+import json
 import logging
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 import csv
 
-from sqlalchemy import inspect
+from sqlalchemy import func, inspect, select, tuple_
+from sqlalchemy.engine import make_url
 from google.cloud import storage
 
+from dwight_schrute.tools.database.billing_jobs import (  # pylint: disable=E0401
+    expire_lapsed_subscriptions,
+    generate_monthly_invoices,
+)
 from dwight_schrute.tools.database.client import ORMDBClient  # pylint: disable=E0401
+from dwight_schrute.tools.database.fast_count import (  # pylint: disable=E0401
+    estimate_count,
+)
+from dwight_schrute.tools.database.forecasting import (  # pylint: disable=E0401
+    daily_series_query,
+    forecast_series,
+    history_days,
+    to_daily_arrays,
+)
 from dwight_schrute.tools.database.models import (  # pylint: disable=E0401
     User,
     Subscription,
@@ -20,6 +35,31 @@ from dwight_schrute.tools.database.models import (  # pylint: disable=E0401
     SubscriptionStatus,
     Base,
 )  # pylint: disable=E0401
+from dwight_schrute.tools.database.pagination import (  # pylint: disable=E0401
+    decode_cursor,
+    encode_cursor,
+)
+from dwight_schrute.tools.database.result_cache import (  # pylint: disable=E0401
+    ResultCache,
+    probe_watermark,
+)
+from dwight_schrute.tools.database.sql_guard import (  # pylint: disable=E0401
+    apply_read_only_guards,
+    estimate_plan,
+    release_read_only_guards,
+    to_jsonable,
+    validate_select,
+)
+from dwight_schrute.tools.database.unit_economics import (  # pylint: disable=E0401
+    unit_economics_query,
+    unit_economics_table,
+)
+from dwight_schrute.tools.database.user_search import (  # pylint: disable=E0401
+    MIN_QUERY_LENGTH,
+    has_search_index,
+    normalize_query,
+    find_users,
+)
 from dwight_schrute.config import settings  # pylint: disable=E0401
 
 
@@ -41,6 +81,36 @@ class DatabaseTools:
         :type database_url: str
         """
         self.database_url = database_url
+        self._result_cache = ResultCache(
+            max_entries=settings.result_cache_max_entries,
+            closed_ttl_seconds=settings.result_cache_closed_ttl_seconds,
+            open_ttl_seconds=settings.result_cache_open_ttl_seconds,
+        )
+        self._search_indexed = False
+
+    @staticmethod
+    def _is_closed_period(period_end: datetime) -> bool:
+        """
+        Whether a period ends in the past, so its results can only change by backfills.
+        """
+        return period_end < datetime.now(period_end.tzinfo)
+
+    def _cache_metadata(self, hit: bool) -> Dict[str, Any]:
+        """
+        Build the cache metadata attached to responses of cached tools.
+        """
+        return {"cache": {"hit": hit, **self._result_cache.stats()}}
+
+    @staticmethod
+    def _approximation(estimate: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Describe how an estimated count was obtained, for the count tools' results.
+        """
+        return {
+            "approximate": estimate["method"] != "exact",
+            "error_bound": estimate["error_bound"],
+            "estimation_method": estimate["method"],
+        }
 
     def _validate_and_convert_datetime(
         self, datetime_string: str
@@ -282,8 +352,75 @@ class DatabaseTools:
                 "results": {},
             }
 
+    def search_users(self, query: str, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Search users by a partial or misspelled username or email.
+
+        Args:
+            query (str): Part of the username or email, at least 3 characters.
+            limit (Optional[int]): Optional. Maximum number of matches to return.
+                Defaults to 5, at most 20.
+
+        Returns:
+            Dict[str, Any]: A dictionary containing the best matching users, each with a
+            similarity score and their active subscription (or None), or an error message.
+        """
+        query = normalize_query(query)
+        if len(query) < MIN_QUERY_LENGTH:
+            return {
+                "status": "error",
+                "message": f"Search query must be at least {MIN_QUERY_LENGTH} characters.",
+                "results": {},
+            }
+        try:
+            limit = (
+                max(1, min(int(limit), settings.user_search_max_limit))
+                if limit not in (None, "")
+                else settings.user_search_default_limit
+            )
+            with ORMDBClient(self.database_url) as db:
+                connection = db.session.connection()
+                # The index is built by the data generator or a migration; until
+                # it exists, look it up again on every call and scan instead
+                if not self._search_indexed:
+                    self._search_indexed = has_search_index(connection)
+                    if not self._search_indexed:
+                        logger.warning(
+                            "User search index missing, falling back to a scan"
+                        )
+                matches = find_users(
+                    connection, query, limit, indexed=self._search_indexed
+                )
+            for match in matches:
+                match["created_at"] = match["created_at"].isoformat()
+                subscription = match["active_subscription"]
+                if subscription:
+                    subscription["start_date"] = subscription["start_date"].isoformat()
+                    subscription["end_date"] = (
+                        subscription["end_date"].isoformat()
+                        if subscription["end_date"]
+                        else None
+                    )
+            return {
+                "status": "success",
+                "message": f"Found {len(matches)} matching users",
+                "results": {
+                    "matches": matches,
+                },
+            }
+        except Exception as e:
+            logger.error("Error searching users: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
+
     def count_users(
-        self, created_after: Optional[str] = None, created_before: Optional[str] = None
+        self,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        approximate: bool = True,
     ) -> Dict[str, Any]:
         """
         Count the number of users in the database.
@@ -293,9 +430,13 @@ class DatabaseTools:
                 Can be ISO format or any common date format.
             created_before (Optional[str]): Optional. Date string to filter users created before this date.
                 Can be ISO format or any common date format.
+            approximate (bool): Optional. Estimate the count from database statistics, which
+                is fast at any size and reports an error bound. Defaults to True; set it to
+                False only when an exact count is explicitly needed.
 
         Returns:
-            Dict[str, Any]: A dictionary containing the user count or an error message.
+            Dict[str, Any]: A dictionary containing the user count (with its error bound when
+            approximate) or an error message.
         """
         try:
             try:
@@ -315,18 +456,35 @@ class DatabaseTools:
                     "message": str(ve),
                     "results": {},
                 }
+            criteria = []
+            if created_after:
+                criteria.append(User.created_at >= created_after)
+            if created_before:
+                criteria.append(User.created_at <= created_before)
             with ORMDBClient(self.database_url) as db:
-                query = db.session.query(User)
-                if created_after:
-                    query = query.filter(User.created_at >= created_after)
-                if created_before:
-                    query = query.filter(User.created_at <= created_before)
-                user_count = query.count()
+                if approximate:
+                    estimate = estimate_count(
+                        db.session.connection(),
+                        User.__table__,
+                        criteria,
+                        range_columns=["created_at"] * len(criteria),
+                        sample_size=settings.approximate_count_sample_size,
+                    )
+                    return {
+                        "status": "success",
+                        "message": "User count estimated successfully",
+                        "results": {
+                            "user_count": estimate["count"],
+                            **self._approximation(estimate),
+                        },
+                    }
+                user_count = db.session.query(User).filter(*criteria).count()
                 return {
                     "status": "success",
                     "message": "User count retrieved successfully",
                     "results": {
                         "user_count": user_count,
+                        "approximate": False,
                     },
                 }
         except Exception as e:
@@ -397,6 +555,7 @@ class DatabaseTools:
         status: str,
         period_start: Optional[str] = None,
         period_end: Optional[str] = None,
+        approximate: bool = True,
     ) -> Dict[str, Any]:
         """
         Count the number of user subscriptions by status.
@@ -407,9 +566,13 @@ class DatabaseTools:
                 Can be ISO format or any common date format.
             period_end (Optional[str]): Optional. Date string to filter subscriptions created before this date.
                 Can be ISO format or any common date format.
+            approximate (bool): Optional. Estimate the count from database statistics, which
+                is fast at any size and reports an error bound. Defaults to True; set it to
+                False only when an exact count is explicitly needed.
 
         Returns:
-            Dict[str, Any]: A dictionary containing the subscription count or an error message.
+            Dict[str, Any]: A dictionary containing the subscription count (with its error
+            bound when approximate) or an error message.
         """
         try:
             try:
@@ -439,20 +602,40 @@ class DatabaseTools:
             # Map the status string to the SubscriptionStatus enum value
             status_enum = getattr(SubscriptionStatus, status.upper())
 
+            criteria = [UserSubscription.status == status_enum]
+            range_columns = []
+            if period_start:
+                criteria.append(UserSubscription.start_date >= period_start)
+                range_columns.append("start_date")
+            if period_end:
+                criteria.append(UserSubscription.end_date <= period_end)
+                range_columns.append("end_date")
             with ORMDBClient(self.database_url) as db:
-                query = db.session.query(UserSubscription).filter(
-                    UserSubscription.status == status_enum
+                if approximate:
+                    estimate = estimate_count(
+                        db.session.connection(),
+                        UserSubscription.__table__,
+                        criteria,
+                        range_columns=range_columns,
+                        sample_size=settings.approximate_count_sample_size,
+                    )
+                    return {
+                        "status": "success",
+                        "message": "Subscription count estimated successfully",
+                        "results": {
+                            "subscription_count": estimate["count"],
+                            **self._approximation(estimate),
+                        },
+                    }
+                subscription_count = (
+                    db.session.query(UserSubscription).filter(*criteria).count()
                 )
-                if period_start:
-                    query = query.filter(UserSubscription.start_date >= period_start)
-                if period_end:
-                    query = query.filter(UserSubscription.end_date <= period_end)
-                subscription_count = query.count()
                 return {
                     "status": "success",
                     "message": "Subscription count retrieved successfully",
                     "results": {
                         "subscription_count": subscription_count,
+                        "approximate": False,
                     },
                 }
         except Exception as e:
@@ -501,7 +684,12 @@ class DatabaseTools:
                     "results": {},
                 }
             status = status.lower() if status else "paid"
+            cache_key = ("sum_revenue", date_from.isoformat(), date_to.isoformat(), status)
             with ORMDBClient(self.database_url) as db:
+                watermark = probe_watermark(db.session)
+                cached = self._result_cache.get(cache_key, watermark)
+                if cached is not None:
+                    return {**cached, "metadata": self._cache_metadata(hit=True)}
                 query = (
                     db.session.query(Invoice.amount)
                     .join(
@@ -516,13 +704,17 @@ class DatabaseTools:
                 if status:
                     query = query.filter(Invoice.status == status.lower())
                 total_revenue = sum(invoice.amount for invoice in query.all())
-                return {
+                response = {
                     "status": "success",
                     "message": "Total revenue calculated successfully",
                     "results": {
                         "total_revenue": total_revenue,
                     },
                 }
+                self._result_cache.put(
+                    cache_key, watermark, response, closed=self._is_closed_period(date_to)
+                )
+                return {**response, "metadata": self._cache_metadata(hit=False)}
         except Exception as e:
             logger.error("Error calculating total revenue: %s", e)
             return {
@@ -629,7 +821,12 @@ class DatabaseTools:
                     "message": str(ve),
                     "results": {},
                 }
+            cache_key = ("calculate_mrr", as_of_date.isoformat())
             with ORMDBClient(self.database_url) as db:
+                watermark = probe_watermark(db.session)
+                cached = self._result_cache.get(cache_key, watermark)
+                if cached is not None:
+                    return {**cached, "metadata": self._cache_metadata(hit=True)}
                 # Query active subscriptions as of the given date, and sum the associated invoice amounts
                 query = (
                     db.session.query(Invoice.amount)
@@ -644,7 +841,7 @@ class DatabaseTools:
                     )
                 )
                 mrr = sum(invoice.amount for invoice in query.all())
-                return {
+                response = {
                     "status": "success",
                     "message": "MRR calculated successfully",
                     "results": {
@@ -652,6 +849,10 @@ class DatabaseTools:
                         "as_of_date": as_of_date.isoformat(),
                     },
                 }
+                self._result_cache.put(
+                    cache_key, watermark, response, closed=self._is_closed_period(as_of_date)
+                )
+                return {**response, "metadata": self._cache_metadata(hit=False)}
         except Exception as e:
             logger.error("Error calculating MRR: %s", e)
             return {
@@ -689,7 +890,16 @@ class DatabaseTools:
                     "message": self._INVALID_DATE_RANGE_ERROR,
                     "results": {},
                 }
+            cache_key = (
+                "calculate_churn_rate",
+                period_start.isoformat(),
+                period_end.isoformat(),
+            )
             with ORMDBClient(self.database_url) as db:
+                watermark = probe_watermark(db.session)
+                cached = self._result_cache.get(cache_key, watermark)
+                if cached is not None:
+                    return {**cached, "metadata": self._cache_metadata(hit=True)}
                 # Count subscriptions that ended during the period
                 churned_subscriptions = (
                     db.session.query(UserSubscription)
@@ -717,7 +927,7 @@ class DatabaseTools:
                         "results": {},
                     }
                 churn_rate = churned_subscriptions / active_subscriptions_start * 100
-                return {
+                response = {
                     "status": "success",
                     "message": "Churn rate calculated successfully",
                     "results": {
@@ -728,6 +938,10 @@ class DatabaseTools:
                         "active_subscriptions_start": active_subscriptions_start,
                     },
                 }
+                self._result_cache.put(
+                    cache_key, watermark, response, closed=self._is_closed_period(period_end)
+                )
+                return {**response, "metadata": self._cache_metadata(hit=False)}
         except Exception as e:
             logger.error("Error calculating churn rate: %s", e)
             return {
@@ -736,6 +950,362 @@ class DatabaseTools:
                 "results": {},
             }
 
+    def _forecast_arguments(
+        self,
+        date_from: str,
+        date_to: str,
+        horizon_days: Optional[int],
+        season_length: Optional[int],
+    ) -> tuple:
+        """
+        Validate the forecast_revenue arguments.
+
+        Raises:
+            ValueError: If a date cannot be parsed or an argument is out of range.
+        """
+        date_from = self._validate_and_convert_datetime(date_from)
+        date_to = self._validate_and_convert_datetime(date_to)
+        if date_from >= date_to:
+            raise ValueError(self._INVALID_DATE_RANGE_ERROR)
+        horizon = (
+            int(horizon_days)
+            if horizon_days not in (None, "")
+            else settings.forecast_default_horizon_days
+        )
+        if not 1 <= horizon <= settings.forecast_max_horizon_days:
+            raise ValueError(
+                f"horizon_days must be between 1 and {settings.forecast_max_horizon_days}."
+            )
+        season = int(season_length) if season_length not in (None, "") else 7
+        if season < 1:
+            raise ValueError("season_length must be at least 1.")
+        if history_days(date_from, date_to) < 2 * season:
+            raise ValueError(
+                f"At least two seasons ({2 * season} days) of history are needed."
+            )
+        return date_from, date_to, horizon, season
+
+    @staticmethod
+    def _forecast_response(
+        rows: List[tuple],
+        date_from: datetime,
+        date_to: datetime,
+        horizon: int,
+        season_length: int,
+    ) -> Dict[str, Any]:
+        """
+        Fit both daily series returned by daily_series_query and build the response.
+        """
+        dates, revenue, active = to_daily_arrays(
+            rows, date_from.date(), history_days(date_from, date_to)
+        )
+        options = {
+            "horizon": horizon,
+            "season_length": season_length,
+            "anomaly_window": settings.forecast_anomaly_window_days,
+            "anomaly_threshold": settings.forecast_anomaly_threshold,
+        }
+        return {
+            "status": "success",
+            "message": "Forecast calculated successfully",
+            "results": {
+                "history": {
+                    "from": str(dates[0]),
+                    "to": str(dates[-1]),
+                    "days": len(dates),
+                },
+                "daily_revenue": forecast_series(dates, revenue, **options),
+                "active_subscriptions": forecast_series(
+                    dates, active, decimals=0, **options
+                ),
+            },
+        }
+
+    def forecast_revenue(
+        self,
+        date_from: str,
+        date_to: str,
+        horizon_days: Optional[int] = None,
+        season_length: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Forecast daily revenue and the number of active subscriptions, and flag
+        anomalous days in their history.
+
+        Both daily series are fitted with a seasonal (Holt-Winters) model over the
+        history between date_from and date_to. Daily revenue is the total of all
+        invoices dated that day. Forecasts come with a 95% interval; anomalies are
+        the days that deviate most from the model relative to the preceding weeks.
+
+        Args:
+            date_from (str): The start of the history. Can be ISO format or any common date format.
+            date_to (str): The end of the history (exclusive). Can be ISO format or any common date format.
+            horizon_days (Optional[int]): Optional. Number of days to forecast after date_to.
+                Defaults to 30.
+            season_length (Optional[int]): Optional. Seasonal period in days. Defaults to 7
+                (weekly).
+
+        Returns:
+            Dict[str, Any]: A dictionary containing, per series, the model, the daily
+            forecast with lower and upper bounds and the anomalous days, or an error message.
+        """
+        try:
+            try:
+                date_from, date_to, horizon, season = self._forecast_arguments(
+                    date_from, date_to, horizon_days, season_length
+                )
+            except ValueError as ve:
+                return {
+                    "status": "error",
+                    "message": str(ve),
+                    "results": {},
+                }
+            cache_key = (
+                "forecast_revenue",
+                date_from.isoformat(),
+                date_to.isoformat(),
+                horizon,
+                season,
+            )
+            with ORMDBClient(self.database_url) as db:
+                watermark = probe_watermark(db.session)
+                cached = self._result_cache.get(cache_key, watermark)
+                if cached is not None:
+                    return {**cached, "metadata": self._cache_metadata(hit=True)}
+                rows = db.session.execute(daily_series_query(date_from, date_to)).all()
+            response = self._forecast_response(rows, date_from, date_to, horizon, season)
+            self._result_cache.put(
+                cache_key, watermark, response, closed=self._is_closed_period(date_to)
+            )
+            return {**response, "metadata": self._cache_metadata(hit=False)}
+        except Exception as e:
+            logger.error("Error forecasting revenue: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
+
+    def _unit_economics_queries(
+        self, cohort_start: Optional[str], cohort_end: Optional[str]
+    ) -> tuple:
+        """
+        Build the per-plan and overall unit economics queries.
+
+        Raises:
+            ValueError: If a cohort date cannot be parsed or the window is empty.
+        """
+        cohort_start = self._validate_and_convert_datetime(cohort_start)
+        cohort_end = self._validate_and_convert_datetime(cohort_end)
+        if cohort_start and cohort_end and cohort_start >= cohort_end:
+            raise ValueError(self._INVALID_DATE_RANGE_ERROR)
+        dialect = make_url(self.database_url).get_backend_name()
+        as_of = datetime.now()
+        cohort = {
+            "cohort_start": cohort_start.isoformat() if cohort_start else None,
+            "cohort_end": cohort_end.isoformat() if cohort_end else None,
+        }
+        queries = [
+            unit_economics_query(dialect, as_of, cohort_start, cohort_end, by_plan=by_plan)
+            for by_plan in (True, False)
+        ]
+        return cohort, queries
+
+    def get_plan_unit_economics(
+        self, cohort_start: Optional[str] = None, cohort_end: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Calculate the unit economics of every subscription plan in one table: lifetime
+        value (LTV), monthly ARPU, average tenure, monthly churn rate and how
+        concentrated the plan's revenue is.
+
+        Only paid invoices count as revenue. ARPU is revenue per subscription-month,
+        LTV is ARPU divided by the monthly churn rate, top_10pct_revenue_share is the
+        share of revenue from the plan's top 10% of subscriptions and gini is the Gini
+        coefficient of revenue per subscription. The last row covers all plans.
+
+        Args:
+            cohort_start (Optional[str]): Optional. Only include subscriptions started on or after this date.
+                Can be ISO format or any common date format.
+            cohort_end (Optional[str]): Optional. Only include subscriptions started before this date.
+                Can be ISO format or any common date format.
+
+        Returns:
+            Dict[str, Any]: A dictionary containing the table columns and one row per plan,
+            or an error message.
+        """
+        try:
+            try:
+                cohort, queries = self._unit_economics_queries(cohort_start, cohort_end)
+            except ValueError as ve:
+                return {
+                    "status": "error",
+                    "message": str(ve),
+                    "results": {},
+                }
+            cache_key = ("get_plan_unit_economics", cohort["cohort_start"], cohort["cohort_end"])
+            with ORMDBClient(self.database_url) as db:
+                watermark = probe_watermark(db.session)
+                cached = self._result_cache.get(cache_key, watermark)
+                if cached is not None:
+                    return {**cached, "metadata": self._cache_metadata(hit=True)}
+                rows = [row for query in queries for row in db.session.execute(query)]
+            response = {
+                "status": "success",
+                "message": "Plan unit economics calculated successfully",
+                "results": {**cohort, **unit_economics_table(rows)},
+            }
+            # Tenure of active subscriptions grows with time, so the period is never closed
+            self._result_cache.put(cache_key, watermark, response, closed=False)
+            return {**response, "metadata": self._cache_metadata(hit=False)}
+        except Exception as e:
+            logger.error("Error calculating plan unit economics: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
+
+    @staticmethod
+    def _billing_history_query(user_id: int, page_size: int, after: Optional[tuple]):
+        """
+        Build one page of a user's billing history: every subscription joined with
+        its invoices (or a single row if it has none), newest first.
+        """
+        sort_date = func.coalesce(Invoice.invoice_date, UserSubscription.start_date)
+        invoice_key = func.coalesce(Invoice.id, 0)
+        query = (
+            select(
+                sort_date.label("sort_date"),
+                UserSubscription.id.label("user_subscription_id"),
+                invoice_key.label("invoice_key"),
+                Subscription.name.label("plan"),
+                Subscription.price,
+                UserSubscription.status.label("subscription_status"),
+                UserSubscription.start_date,
+                UserSubscription.end_date,
+                Invoice.id.label("invoice_id"),
+                Invoice.invoice_date,
+                Invoice.amount,
+                Invoice.status.label("invoice_status"),
+            )
+            .join(Subscription, Subscription.id == UserSubscription.subscription_id)
+            .outerjoin(Invoice, Invoice.user_subscription_id == UserSubscription.id)
+            .where(UserSubscription.user_id == user_id)
+            .order_by(sort_date.desc(), UserSubscription.id.desc(), invoice_key.desc())
+            .limit(page_size + 1)
+        )
+        if after:
+            query = query.where(
+                tuple_(sort_date, UserSubscription.id, invoice_key) < tuple_(*after)
+            )
+        return query
+
+    @staticmethod
+    def _billing_history_page(
+        rows: List[Any], user_id: int, page_size: int
+    ) -> Dict[str, Any]:
+        """
+        Turn the fetched rows (one more than the page size) into the tool response.
+        """
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        items = [
+            {
+                "date": row.sort_date.isoformat(),
+                "user_subscription_id": row.user_subscription_id,
+                "plan": row.plan,
+                "price": row.price,
+                "subscription_status": row.subscription_status.value,
+                "start_date": row.start_date.isoformat(),
+                "end_date": row.end_date.isoformat() if row.end_date else None,
+                "invoice": (
+                    {
+                        "invoice_id": row.invoice_id,
+                        "invoice_date": row.invoice_date.isoformat(),
+                        "amount": row.amount,
+                        "status": row.invoice_status,
+                    }
+                    if row.invoice_id is not None
+                    else None
+                ),
+            }
+            for row in rows
+        ]
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = encode_cursor(
+                {"billing_history": user_id},
+                (last.sort_date, last.user_subscription_id, last.invoice_key),
+            )
+        return {
+            "status": "success",
+            "message": f"Retrieved {len(items)} billing history entries",
+            "results": {
+                "user_id": user_id,
+                "items": items,
+                "next_cursor": next_cursor,
+            },
+        }
+
+    def get_billing_history(
+        self,
+        user_id: int,
+        cursor: Optional[str] = None,
+        page_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Retrieve a user's subscriptions and invoices, newest first, one page at a time.
+
+        Args:
+            user_id (int): The id of the user, e.g. from get_user_by_username or search_users.
+            cursor (Optional[str]): Optional. The next_cursor of the previous page, to
+                continue where it ended. Omit it for the first page.
+            page_size (Optional[int]): Optional. Number of entries per page. Defaults to 10,
+                at most 50.
+
+        Returns:
+            Dict[str, Any]: A dictionary containing the entries (each subscription with
+            one of its invoices, or without an invoice if it has none) and a next_cursor,
+            which is None on the last page, or an error message.
+        """
+        try:
+            user_id = int(user_id)
+            page_size = (
+                max(1, min(int(page_size), settings.billing_history_max_page_size))
+                if page_size not in (None, "")
+                else settings.billing_history_default_page_size
+            )
+            after = (
+                decode_cursor(cursor, {"billing_history": user_id}) if cursor else None
+            )
+        except ValueError as ve:
+            return {
+                "status": "error",
+                "message": str(ve),
+                "results": {},
+            }
+        try:
+            with ORMDBClient(self.database_url) as db:
+                rows = db.session.execute(
+                    self._billing_history_query(user_id, page_size, after)
+                ).all()
+                if not rows and not after and db.session.get(User, user_id) is None:
+                    return {
+                        "status": "error",
+                        "message": f"User with id '{user_id}' not found.",
+                        "results": {},
+                    }
+                return self._billing_history_page(rows, user_id, page_size)
+        except Exception as e:
+            logger.error("Error retrieving billing history: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
+
     def export_invoices_to_gcs(
         self,
         bucket_name: str,
@@ -922,3 +1492,214 @@ class DatabaseTools:
             }
         except Exception as e:
             return {"status": "error", "message": str(e), "results": {}}
+
+    # <-- Methods for ad-hoc read-only queries -->
+    def run_readonly_query(
+        self, sql: str, max_rows: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Run an ad-hoc, read-only SELECT query against the application tables.
+
+        The query is validated (single SELECT over users, subscriptions,
+        user_subscriptions and invoices only), then admitted only if the planner's
+        estimated cost is within the configured limit. Admitted queries run in a
+        read-only transaction under a statement timeout and the results are
+        streamed and capped by rows and bytes.
+
+        Note that user_subscriptions.status stores the enum names 'ACTIVE',
+        'CANCELLED' and 'EXPIRED', while invoices.status stores 'paid' or 'unpaid'.
+
+        Args:
+            sql (str): A single SELECT (or WITH ... SELECT) statement.
+            max_rows (Optional[int]): Optional. Maximum number of rows to return.
+                Cannot exceed the configured limit, which is also the default.
+
+        Returns:
+            Dict[str, Any]: A dictionary containing the columns, rows, plan estimate and
+            whether the result was truncated, or an error message.
+        """
+        try:
+            row_limit = settings.sql_max_result_rows
+            if max_rows not in (None, ""):
+                row_limit = max(1, min(int(max_rows), row_limit))
+            query = validate_select(sql, Base.metadata.tables.keys())
+        except ValueError as ve:
+            return {
+                "status": "error",
+                "message": str(ve),
+                "results": {},
+            }
+        try:
+            with ORMDBClient(self.database_url) as db:
+                connection = db.session.connection()
+                apply_read_only_guards(connection, settings.sql_statement_timeout_ms)
+                try:
+                    plan = estimate_plan(connection, query)
+                    # Large results are cut off while fetching, so only the
+                    # work of the query is limited
+                    if plan["estimated_cost"] > settings.sql_max_plan_cost:
+                        return {
+                            "status": "error",
+                            "message": "Query rejected: estimated cost "
+                            f"{plan['estimated_cost']:.0f} exceeds the limit of "
+                            f"{settings.sql_max_plan_cost:.0f}. Add filters or aggregate.",
+                            "results": {"plan": plan},
+                        }
+
+                    result = connection.exec_driver_sql(
+                        query.sql,
+                        execution_options={
+                            "stream_results": True,
+                            "max_row_buffer": min(row_limit + 1, 1000),
+                            "no_parameters": True,
+                        },
+                    )
+                    columns = list(result.keys())
+                    rows, size, truncated = [], 0, False
+                    while not truncated:
+                        batch = result.fetchmany(min(row_limit + 1, 1000))
+                        if not batch:
+                            break
+                        for row in batch:
+                            values = [to_jsonable(value) for value in row]
+                            size += len(json.dumps(values, default=str))
+                            if len(rows) >= row_limit or size > settings.sql_max_result_bytes:
+                                truncated = True
+                                break
+                            rows.append(values)
+                    result.close()
+                finally:
+                    release_read_only_guards(connection)
+                return {
+                    "status": "success",
+                    "message": "Query executed successfully"
+                    + (" (results truncated)" if truncated else ""),
+                    "results": {
+                        "columns": columns,
+                        "rows": rows,
+                        "row_count": len(rows),
+                        "truncated": truncated,
+                        "plan": {
+                            "estimated_cost": plan["estimated_cost"],
+                            "estimated_rows": plan["estimated_rows"],
+                        },
+                    },
+                }
+        except Exception as e:
+            logger.error("Error running read-only query: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
+
+    # <-- Methods for billing batch jobs -->
+    def expire_lapsed_subscriptions(
+        self,
+        as_of_date: Optional[str] = None,
+        dry_run: bool = True,
+        chunk_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Mark active subscriptions whose end date has passed as expired.
+
+        Runs one set-based UPDATE per chunk of subscription ids, each in its own
+        transaction, so an interrupted run can simply be repeated.
+
+        Args:
+            as_of_date (Optional[str]): Optional. Subscriptions ending before this date
+                lapse. Defaults to now.
+            dry_run (bool): Optional. Only count the subscriptions that would expire.
+                Defaults to True.
+            chunk_size (Optional[int]): Optional. Subscription ids per transaction.
+
+        Returns:
+            Dict[str, Any]: A dictionary containing the number of expired subscriptions
+            or an error message.
+        """
+        try:
+            as_of = self._validate_and_convert_datetime(as_of_date)
+        except ValueError as ve:
+            return {
+                "status": "error",
+                "message": str(ve),
+                "results": {},
+            }
+        try:
+            summary = expire_lapsed_subscriptions(
+                self.database_url,
+                as_of=as_of,
+                chunk_size=chunk_size or settings.batch_job_chunk_size,
+                dry_run=dry_run,
+            )
+            if summary["rows"] and not dry_run:
+                self._result_cache.invalidate()
+            return {
+                "status": "success",
+                "message": f"{summary['rows']} subscriptions "
+                + ("would be expired" if dry_run else "expired"),
+                "results": summary,
+            }
+        except Exception as e:
+            logger.error("Error expiring lapsed subscriptions: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
+
+    def generate_monthly_invoices(
+        self,
+        month: Optional[str] = None,
+        dry_run: bool = True,
+        chunk_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Create the month's unpaid invoices for all active subscriptions.
+
+        Monthly plans are billed on the subscription's day of month, the annual plan
+        in its anniversary month only. Subscriptions already invoiced in the month are
+        skipped, so the job can be repeated safely. The renewal (end) date of every
+        subscription invoiced for the month moves to its next billing date.
+
+        Args:
+            month (Optional[str]): Optional. Any date in the month to bill. Defaults to
+                the current month.
+            dry_run (bool): Optional. Only count the invoices that would be created.
+                Defaults to True.
+            chunk_size (Optional[int]): Optional. Subscription ids per transaction.
+
+        Returns:
+            Dict[str, Any]: A dictionary containing the number of created invoices or an
+            error message.
+        """
+        try:
+            month_date = self._validate_and_convert_datetime(month).date() if month else None
+        except ValueError as ve:
+            return {
+                "status": "error",
+                "message": str(ve),
+                "results": {},
+            }
+        try:
+            summary = generate_monthly_invoices(
+                self.database_url,
+                month=month_date,
+                chunk_size=chunk_size or settings.batch_job_chunk_size,
+                dry_run=dry_run,
+            )
+            if (summary["rows"] or summary.get("renewed")) and not dry_run:
+                self._result_cache.invalidate()
+            return {
+                "status": "success",
+                "message": f"{summary['rows']} invoices for {summary['month']} "
+                + ("would be created" if dry_run else "created"),
+                "results": summary,
+            }
+        except Exception as e:
+            logger.error("Error generating monthly invoices: %s", e)
+            return {
+                "status": "error",
+                "message": str(e),
+                "results": {},
+            }
@@ -1,3 +1,11 @@
-from . import agent
+import importlib
 
 __all__ = ["agent"]
+
+
+def __getattr__(name):
+    # The agent is built when its module is imported, so it is only imported when
+    # asked for: plot worker processes import ryan_howard.tools and must not build it
+    if name == "agent":
+        return importlib.import_module(f"{__name__}.agent")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
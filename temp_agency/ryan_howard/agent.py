@@ -308,7 +308,18 @@ class RyanHowardAgent(BaseDMAgent):
         return cls()._agent
 
     def __init__(self):
-        self._tools = DataScienceTools()
+        self._tools = DataScienceTools(
+            workspace_memory_budget_mb=agent_config.workspace_memory_budget_mb,
+            workspace_spill_dir=agent_config.workspace_spill_dir,
+            workspace_spill_max_mb=agent_config.workspace_spill_max_mb,
+            workspace_idle_hours=agent_config.workspace_idle_hours,
+            dataset_cache_dir=agent_config.dataset_cache_dir,
+            dataset_cache_max_mb=agent_config.dataset_cache_max_mb,
+            gcs_cache_dir=agent_config.gcs_cache_dir,
+            gcs_cache_max_mb=agent_config.gcs_cache_max_mb,
+            plot_workers=agent_config.plot_workers,
+            plot_timeout_seconds=agent_config.plot_timeout_seconds,
+        )
         super().__init__(
             model=agent_config.model_id,
             user_id=agent_config.user_id,
@@ -321,6 +332,7 @@ class RyanHowardAgent(BaseDMAgent):
                 self._tools.get_summary_statistics,
                 self._tools.plot_histograms,
                 self._tools.get_unique_values,
+                self._tools.get_value_frequencies,
                 self._tools.get_data_sample,
                 self._tools.create_boxplot,
                 self._tools.create_scatter_plot,
@@ -328,6 +340,9 @@ class RyanHowardAgent(BaseDMAgent):
                 self._tools.plot_pie_chart,
                 self._tools.modify_dataset,
                 self._tools.encode_categorical_columns,
+                self._tools.get_transformation_pipeline,
+                self._tools.undo_transformation,
+                self._tools.replay_transformations,
                 self._tools.read_file_from_gcs,
                 self._tools.upload_file_to_gcs,
             ],
@@ -186,6 +186,44 @@ class AgentConfig(BaseAgentConfig):
         default_factory=lambda: os.getenv("GENAI_MODEL", None)
     )
 
+    # Per-session DataFrame workspaces
+    workspace_memory_budget_mb: int = field(
+        default_factory=lambda: int(os.getenv("WORKSPACE_MEMORY_BUDGET_MB", "1024"))
+    )
+    workspace_spill_dir: str | None = field(
+        default_factory=lambda: os.getenv("WORKSPACE_SPILL_DIR", None)
+    )
+    workspace_spill_max_mb: int = field(
+        default_factory=lambda: int(os.getenv("WORKSPACE_SPILL_MAX_MB", "10240"))
+    )
+    workspace_idle_hours: float = field(
+        default_factory=lambda: float(os.getenv("WORKSPACE_IDLE_HOURS", "24"))
+    )
+
+    # Cache of parsed datasets
+    dataset_cache_dir: str | None = field(
+        default_factory=lambda: os.getenv("DATASET_CACHE_DIR", None)
+    )
+    dataset_cache_max_mb: int = field(
+        default_factory=lambda: int(os.getenv("DATASET_CACHE_MAX_MB", "5120"))
+    )
+
+    # Cache of files downloaded from GCS
+    gcs_cache_dir: str | None = field(
+        default_factory=lambda: os.getenv("GCS_CACHE_DIR", None)
+    )
+    gcs_cache_max_mb: int = field(
+        default_factory=lambda: int(os.getenv("GCS_CACHE_MAX_MB", "10240"))
+    )
+
+    # Plot rendering
+    plot_workers: int = field(
+        default_factory=lambda: int(os.getenv("PLOT_WORKERS", "2"))
+    )
+    plot_timeout_seconds: float = field(
+        default_factory=lambda: float(os.getenv("PLOT_TIMEOUT_SECONDS", "60"))
+    )
+
     @property
     def description(self) -> str:
         """Get the current agent description based on environment variables."""
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The agent's modules import each other as `ryan_howard.*`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -0,0 +1,144 @@
+"""
+Tests of the GCS download cache, against an in-memory fake of the storage client.
+"""
+
+import os
+
+import pytest
+
+from ryan_howard.tools.gcs_cache import GCSDownloadCache, parse_gcs_path
+
+
+class FakeBlob:
+    def __init__(self, store, bucket_name, name):
+        self._store = store
+        self._bucket_name = bucket_name
+        self.name = name
+        self.data, self.generation = store.objects[(bucket_name, name)]
+        self.size = len(self.data)
+
+    def download_to_filename(self, filename, if_generation_match=None):
+        _, generation = self._store.objects[(self._bucket_name, self.name)]
+        if if_generation_match is not None and if_generation_match != generation:
+            raise RuntimeError("Precondition failed")
+        self._store.downloads.append((self._bucket_name, self.name, self.generation))
+        with open(filename, "wb") as f:
+            f.write(self.data)
+
+
+class FakeBucket:
+    def __init__(self, store, name):
+        self._store = store
+        self.name = name
+
+    def get_blob(self, name):
+        if (self.name, name) not in self._store.objects:
+            return None
+        return FakeBlob(self._store, self.name, name)
+
+
+class FakeClient:
+    def __init__(self):
+        self.objects = {}
+        self.downloads = []
+        self._generation = 0
+
+    def put(self, gcs_path, data):
+        self._generation += 1
+        self.objects[parse_gcs_path(gcs_path)] = (data, self._generation)
+
+    def bucket(self, name):
+        return FakeBucket(self, name)
+
+
+@pytest.fixture
+def client():
+    return FakeClient()
+
+
+@pytest.fixture
+def cache(client, tmp_path):
+    return GCSDownloadCache(lambda: client, cache_dir=str(tmp_path / "cache"))
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_parse_gcs_path():
+    assert parse_gcs_path("gs://bucket/dir/data.csv") == ("bucket", "dir/data.csv")
+    for path in ("bucket/data.csv", "gs://bucket", "gs://bucket/", "gs:///data.csv"):
+        with pytest.raises(ValueError):
+            parse_gcs_path(path)
+
+
+def test_same_name_in_other_buckets_and_directories_does_not_collide(client, cache):
+    paths = ["gs://a/data.csv", "gs://b/data.csv", "gs://a/other/data.csv"]
+    for i, path in enumerate(paths):
+        client.put(path, f"x\n{i}\n".encode())
+
+    local_paths = [cache.fetch(path)[0] for path in paths]
+
+    assert len(set(local_paths)) == len(paths)
+    assert [_read(p) for p in local_paths] == [f"x\n{i}\n".encode() for i in range(3)]
+    assert all(os.path.basename(p) == "data.csv" for p in local_paths)
+
+
+def test_unchanged_generation_is_read_from_the_cache(client, cache):
+    client.put("gs://a/data.csv", b"x\n1\n")
+
+    first = cache.fetch("gs://a/data.csv")
+    second = cache.fetch("gs://a/data.csv")
+
+    assert first[1] is False and second[1] is True
+    assert first[0] == second[0] and first[2] == second[2]
+    assert len(client.downloads) == 1
+
+
+def test_new_generation_is_downloaded_and_replaces_the_old_one(client, cache):
+    client.put("gs://a/data.csv", b"x\n1\n")
+    old_path, _, old_generation = cache.fetch("gs://a/data.csv")
+    client.put("gs://a/data.csv", b"x\n2\n")
+
+    new_path, cached, new_generation = cache.fetch("gs://a/data.csv")
+
+    assert cached is False
+    assert new_generation != old_generation
+    assert _read(new_path) == b"x\n2\n"
+    assert not os.path.exists(old_path)
+    assert len(client.downloads) == 2
+
+
+def test_truncated_copy_is_downloaded_again(client, cache):
+    client.put("gs://a/data.csv", b"x\n1\n")
+    local_path, _, _ = cache.fetch("gs://a/data.csv")
+    with open(local_path, "wb") as f:
+        f.write(b"x\n")
+
+    _, cached, _ = cache.fetch("gs://a/data.csv")
+
+    assert cached is False
+    assert _read(local_path) == b"x\n1\n"
+
+
+def test_least_recently_used_downloads_are_evicted(client, tmp_path):
+    cache = GCSDownloadCache(lambda: client, cache_dir=str(tmp_path), max_bytes=10)
+    client.put("gs://a/first.csv", b"123456")
+    client.put("gs://a/second.csv", b"123456")
+
+    first_path, _, _ = cache.fetch("gs://a/first.csv")
+    second_path, _, _ = cache.fetch("gs://a/second.csv")
+
+    assert not os.path.exists(first_path)
+    assert os.path.exists(second_path)
+
+
+def test_missing_object_raises_file_not_found(client, cache):
+    client.put("gs://a/data.csv", b"x\n1\n")
+
+    with pytest.raises(FileNotFoundError):
+        cache.fetch("gs://a/missing.csv")
+    with pytest.raises(FileNotFoundError):
+        cache.get_blob("gs://other/data.csv")
+    assert client.downloads == []
@@ -0,0 +1,75 @@
+"""
+Tests of streaming reads of GCS objects, against an in-memory fake of a blob.
+"""
+
+import gzip
+import io
+
+import pytest
+
+from ryan_howard.tools import gcs_stream
+from ryan_howard.tools.gcs_stream import BlobStream
+
+
+class FakeBlob:
+    def __init__(self, data):
+        self.data = data
+        self.size = len(data)
+        self.opened = []
+
+    def open(self, mode="rb", chunk_size=None, raw_download=False):
+        self.opened.append({"mode": mode, "raw_download": raw_download})
+        return io.BytesIO(self.data)
+
+
+class FailingStream(io.BytesIO):
+    def read(self, size=-1):
+        raise ConnectionError("Connection reset")
+
+
+DATA = b"x,y\n" + b"".join(f"{i},{i * 2}\n".encode() for i in range(1000))
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_gzip_is_detected_from_the_first_bytes(compress):
+    # The name does not tell the compression apart
+    blob = FakeBlob(gzip.compress(DATA) if compress else DATA)
+
+    with BlobStream(blob, block_bytes=64, prefetch_blocks=2) as stream:
+        assert stream.compression == ("gzip" if compress else None)
+        assert stream.file.read() == DATA
+        assert stream.bytes_read == blob.size
+    # The stored bytes, not the ones GCS would decompress
+    assert blob.opened == [{"mode": "rb", "raw_download": True}]
+
+
+def test_zstd_is_decompressed_when_available():
+    zstandard = pytest.importorskip("zstandard")
+    blob = FakeBlob(zstandard.ZstdCompressor().compress(DATA))
+
+    with BlobStream(blob, block_bytes=64) as stream:
+        assert stream.compression == "zstd"
+        assert stream.file.read() == DATA
+
+
+def test_zstd_without_the_package_raises_value_error(monkeypatch):
+    monkeypatch.setattr(gcs_stream, "zstandard", None)
+    blob = FakeBlob(b"\x28\xb5\x2f\xfd" + b"\x00" * 16)
+
+    with pytest.raises(ValueError, match="zstandard"):
+        BlobStream(blob)
+
+
+def test_empty_object_reads_as_empty():
+    with BlobStream(FakeBlob(b"")) as stream:
+        assert stream.compression is None
+        assert stream.file.read() == b""
+
+
+def test_download_errors_are_raised_to_the_reader():
+    blob = FakeBlob(DATA)
+    blob.open = lambda *args, **kwargs: FailingStream()
+
+    with pytest.raises(ConnectionError):
+        with BlobStream(blob) as stream:
+            stream.file.read()
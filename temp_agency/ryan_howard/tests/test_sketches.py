@@ -0,0 +1,116 @@
+"""
+Tests of the column sketches behind approximate statistics.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ryan_howard.tools.sketches import (
+    HyperLogLog,
+    hash_values,
+    quantiles_faster_than_exact,
+    sketch_column,
+)
+
+
+ROWS = 400_000
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(7)
+
+
+def test_hyperloglog_registers_hold_the_highest_rank(rng):
+    hashes = rng.integers(0, 2**64 - 1, 100_000, dtype=np.uint64, endpoint=True)
+    # Low bits all zero, and all one, below the register bits
+    hashes[:2] = [np.uint64(5) << np.uint64(50), np.uint64(2**50 - 1)]
+    sketch = HyperLogLog()
+    sketch.update(hashes)
+
+    p = sketch.precision
+    expected = np.zeros(1 << p, dtype=np.uint8)
+    for value in hashes.tolist():
+        rest = (value << p) & (2**64 - 1)
+        rank = min(64 - rest.bit_length() + 1, 64 - p + 1)
+        register = value >> (64 - p)
+        expected[register] = max(expected[register], rank)
+    np.testing.assert_array_equal(sketch.registers, expected)
+
+
+def test_distinct_count_is_within_its_error(rng):
+    series = pd.Series(rng.integers(0, 50_000, ROWS))
+    sketch = sketch_column(series)
+
+    error = abs(sketch.distinct.estimate() - series.nunique()) / series.nunique()
+    assert error < 4 * sketch.distinct.relative_error
+
+
+def test_mostly_distinct_column_has_no_heavy_hitters(rng):
+    series = pd.Series(rng.random(ROWS))
+    sketch = sketch_column(series, sample_size=10_000)
+
+    assert sketch.heavy_hitters(10) == []
+    assert sketch_column(series.astype(str), sample_size=10_000).describe()["top"] is None
+
+
+def test_heavy_hitters_are_counted_from_the_sample(rng):
+    values = np.where(rng.random(ROWS) < 0.3, "common", rng.integers(0, 10**6, ROWS).astype(str))
+    series = pd.Series(values, dtype="str")
+    sketch = sketch_column(series, sample_size=10_000)
+
+    hitters = sketch.heavy_hitters(5)
+    true_count = int((series == "common").sum())
+    assert [hitter["value"] for hitter in hitters] == ["common"]
+    assert abs(hitters[0]["count"] - true_count) < 0.05 * true_count
+    stats = sketch.describe()
+    assert stats["top"] == "common" and stats["freq"] == hitters[0]["count"]
+
+
+def test_heavy_hitters_of_a_fully_sampled_column_are_exact():
+    series = pd.Series(["a"] * 5 + ["b"] * 3 + ["c"] + [None])
+    sketch = sketch_column(series)
+
+    assert [(h["value"], h["count"]) for h in sketch.heavy_hitters(2)] == [("a", 5), ("b", 3)]
+    assert sketch.distinct.estimate() == 3
+
+
+@pytest.mark.parametrize("dtype", ["category", "str", "object"])
+def test_text_and_categorical_hashes_match_their_values(dtype):
+    series = pd.Series(["x", "y", "x", "z", "y", "x"]).astype(dtype)
+    hashes = hash_values(series)
+
+    assert len(set(hashes.tolist())) == 3
+    assert hashes[0] == hashes[2] == hashes[5] and hashes[1] == hashes[4]
+    np.testing.assert_array_equal(hash_values(series.astype(str)), hash_values(series.astype(object)))
+
+
+def test_numeric_columns_are_described_from_the_sample(rng):
+    series = pd.Series(rng.normal(size=ROWS))
+    series[::10] = np.nan
+    stats = sketch_column(series).describe()
+    exact = series.describe()
+
+    assert stats["count"] == exact["count"]
+    for stat in ("mean", "std", "min", "max"):
+        assert stats[stat] == pytest.approx(exact[stat])
+    for stat in ("25%", "50%", "75%"):
+        assert stats[stat] == pytest.approx(exact[stat], abs=0.05)
+
+
+def test_quantiles_are_sketched_for_numbers_and_datetimes_only():
+    assert quantiles_faster_than_exact(pd.Series([1.5]))
+    assert quantiles_faster_than_exact(pd.Series(pd.to_datetime(["2024-01-01"])))
+    assert not quantiles_faster_than_exact(pd.Series([True]))
+    assert not quantiles_faster_than_exact(pd.Series(["a"]))
+    assert not quantiles_faster_than_exact(pd.Series(["a"], dtype="category"))
+
+
+def test_hash_sketches_are_only_built_when_used(rng):
+    sketch = sketch_column(pd.Series(rng.random(1000)))
+    sketch.describe()
+    assert sketch._distinct is None
+
+    sketch.distinct.estimate()
+    assert sketch._distinct is not None and sketch._column is None
@@ -0,0 +1,109 @@
+"""
+Tests of the per-session workspaces: spilling to disk, the size cap of the spilled
+workspaces, idle expiry and removal of the private spill directory.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ryan_howard.tools import workspaces
+from ryan_howard.tools.workspaces import WorkspaceManager
+
+
+def _frame(rows=10_000):
+    return pd.DataFrame({"x": np.arange(rows, dtype="int64")})
+
+
+def _load(manager, session_id, rows=10_000):
+    with manager.use(session_id) as workspace:
+        workspace.df = _frame(rows)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(workspaces.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_least_recently_used_workspaces_are_spilled_and_loaded_back(tmp_path):
+    manager = WorkspaceManager(100_000, str(tmp_path))
+    _load(manager, "a")
+    _load(manager, "b")
+
+    assert manager.stats()["spilled_sessions"] == 1
+    with manager.use("a") as workspace:
+        pd.testing.assert_frame_equal(workspace.df, _frame())
+    assert manager.stats()["spilled_sessions"] == 1
+
+
+def test_spilled_workspaces_beyond_the_cap_are_discarded_oldest_first(tmp_path):
+    manager = WorkspaceManager(1, str(tmp_path), spill_max_bytes=150_000)
+    for session_id in "abc":
+        _load(manager, session_id)
+    # Spills the least recently used resident workspace, "c"
+    _load(manager, "d")
+
+    stats = manager.stats()
+    assert stats["spilled_sessions"] == 1
+    assert stats["spilled_bytes"] <= 150_000
+    assert len(os.listdir(tmp_path)) == 1
+    with manager.use("c") as workspace:
+        pd.testing.assert_frame_equal(workspace.df, _frame())
+    with manager.use("a") as workspace:
+        assert workspace.df is None
+
+
+def test_idle_workspaces_are_discarded_in_memory_and_on_disk(tmp_path, clock):
+    manager = WorkspaceManager(100_000, str(tmp_path), idle_seconds=3600)
+    _load(manager, "a")
+    _load(manager, "b")
+    clock[0] += 1800
+    _load(manager, "c")
+    assert manager.stats()["spilled_sessions"] == 2
+
+    clock[0] += 2400
+    with manager.use("c") as workspace:
+        assert workspace.df is not None
+
+    stats = manager.stats()
+    assert stats["spilled_sessions"] == 0
+    assert stats["resident_sessions"] == 1
+    assert os.listdir(tmp_path) == []
+
+
+def test_workspace_in_use_is_not_discarded(tmp_path, clock):
+    manager = WorkspaceManager(100_000, str(tmp_path), idle_seconds=60)
+    with manager.use("a") as workspace:
+        workspace.df = _frame()
+        clock[0] += 120
+        _load(manager, "b")
+        assert manager.stats()["resident_sessions"] == 2
+        assert workspace.df is not None
+
+
+def test_close_removes_the_private_spill_directory():
+    manager = WorkspaceManager(1)
+    _load(manager, "a")
+    _load(manager, "b")
+    spill_dir = manager.spill_dir
+    assert os.listdir(spill_dir)
+
+    manager.close()
+
+    assert not os.path.exists(spill_dir)
+    assert manager.stats()["spilled_sessions"] == 0
+
+
+def test_close_keeps_a_configured_spill_directory(tmp_path):
+    manager = WorkspaceManager(1, str(tmp_path))
+    _load(manager, "a")
+    _load(manager, "b")
+
+    manager.close()
+
+    assert os.path.isdir(tmp_path)
+    assert os.listdir(tmp_path) == []
@@ -1,13 +1,168 @@
+import functools
+import hashlib
+import inspect
 import os
-import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextvars import ContextVar
 from typing import List
-import uuid
 from typing import Optional
 
 import numpy as np
 import pandas as pd
-from matplotlib import pyplot as plt
+from matplotlib.cbook import boxplot_stats
+from google.adk.tools import ToolContext
+from google.genai import types
 from google.cloud import storage
+import pyarrow as pa
+
+from ryan_howard.tools.dataset_cache import DatasetCache
+from ryan_howard.tools.gcs_cache import GCSDownloadCache, parse_gcs_path
+from ryan_howard.tools.gcs_stream import BlobStream
+from ryan_howard.tools.ingestion import (
+    STREAMING_THRESHOLD_BYTES,
+    read_csv_chunked,
+    should_stream,
+)
+from ryan_howard.tools.multi_file import (
+    combine_shards,
+    expand_gcs,
+    expand_local,
+    is_multi_file,
+)
+from ryan_howard.tools.pipeline import TransformPipeline
+from ryan_howard.tools.plotting import (
+    PLOT_INDEX_SIZE,
+    SCATTER_MAX_POINTS,
+    PlotRenderer,
+    density_grid,
+    plot_request_key,
+    render_boxplot,
+    render_density,
+    render_heatmap,
+    render_histograms,
+    render_pie,
+    render_scatter,
+    stratified_sample,
+)
+from ryan_howard.tools.sketches import (
+    APPROXIMATE_THRESHOLD_ROWS,
+    ColumnSketch,
+    combined_error_bounds,
+    quantiles_faster_than_exact,
+    sketch_column,
+)
+from ryan_howard.tools.stats_cache import StatsCache
+from ryan_howard.tools.workspaces import (
+    DEFAULT_SESSION,
+    Workspace,
+    WorkspaceManager,
+    session_id_of,
+)
+
+
+# Order of the statistics of DataFrame.describe(include="all")
+_STAT_ORDER = ["count", "unique", "top", "freq", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+def _describe_column(series: pd.Series) -> dict:
+    """Summary statistics of a column, with NaN replaced by None."""
+    stats = series.describe().to_dict()
+    return {stat: None if pd.isna(value) else value for stat, value in stats.items()}
+
+
+def _frequency_profile(series: pd.Series, top_k: int) -> dict:
+    """The top_k most frequent values of a column with their counts and shares of the rows."""
+    counts = series.value_counts(sort=False, dropna=True)
+    # Categorical columns also count the categories that do not occur
+    counts = counts[counts.to_numpy() > 0]
+    rows = len(series)
+    non_null = int(counts.sum())
+
+    frequencies = counts.to_numpy()
+    if len(frequencies) > top_k:
+        top = np.argpartition(-frequencies, top_k - 1)[:top_k]
+    else:
+        top = np.arange(len(frequencies))
+    top = top[np.argsort(-frequencies[top], kind="stable")]
+    top_counts = frequencies[top]
+
+    # Index.tolist() converts NumPy scalars to Python ones in one call
+    values = counts.index.take(top).tolist()
+    shares = (top_counts / rows if rows else np.zeros(len(top))).tolist()
+    return {
+        "rows": rows,
+        "cardinality": len(counts),
+        "null_count": rows - non_null,
+        "null_fraction": (rows - non_null) / rows if rows else 0.0,
+        "top_values": [
+            {"value": value, "count": count, "share": share}
+            for value, count, share in zip(values, top_counts.tolist(), shares)
+        ],
+        "other_count": non_null - int(top_counts.sum()),
+    }
+
+
+def _align_stats(column_stats: dict) -> dict:
+    """Give every column the same statistics, None where one does not apply."""
+    stat_names = [
+        stat
+        for stat in _STAT_ORDER
+        if any(stat in stats for stats in column_stats.values())
+    ]
+    for stats in column_stats.values():
+        stat_names.extend(stat for stat in stats if stat not in stat_names)
+    return {
+        col: {stat: stats.get(stat) for stat in stat_names}
+        for col, stats in column_stats.items()
+    }
+
+
+# Workspace of the session whose tool call is running in this context
+_active_workspace: ContextVar[Optional[Workspace]] = ContextVar(
+    "_active_workspace", default=None
+)
+
+
+def _in_session_workspace(method):
+    """
+    Run a tool against the workspace of the session in its `tool_context`, so
+    `self.df` refers to that session's DataFrame for the duration of the call.
+    Tools called from another tool share the caller's workspace.
+    """
+
+    if inspect.iscoroutinefunction(method):
+
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            tool_context = kwargs.get("tool_context")
+            if tool_context is None and _active_workspace.get() is not None:
+                return await method(self, *args, **kwargs)
+            with self._workspaces.use(session_id_of(tool_context)) as workspace:
+                token = _active_workspace.set(workspace)
+                try:
+                    return await method(self, *args, **kwargs)
+                finally:
+                    _active_workspace.reset(token)
+
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        tool_context = kwargs.get("tool_context")
+        if tool_context is None and _active_workspace.get() is not None:
+            return method(self, *args, **kwargs)
+        with self._workspaces.use(session_id_of(tool_context)) as workspace:
+            token = _active_workspace.set(workspace)
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                _active_workspace.reset(token)
+
+    return wrapper
 
 
 class DataScienceTools:
@@ -18,75 +173,481 @@ class DataScienceTools:
     interact without ingesting raw data directly.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        workspace_memory_budget_mb: Optional[int] = None,
+        workspace_spill_dir: Optional[str] = None,
+        workspace_spill_max_mb: Optional[int] = None,
+        workspace_idle_hours: Optional[float] = None,
+        dataset_cache_dir: Optional[str] = None,
+        dataset_cache_max_mb: Optional[int] = None,
+        gcs_cache_dir: Optional[str] = None,
+        gcs_cache_max_mb: Optional[int] = None,
+        gcs_client: Optional[storage.Client] = None,
+        plot_workers: Optional[int] = None,
+        plot_timeout_seconds: Optional[float] = None,
+    ):
         """
         Initialize the agent with no DataFrame loaded.
+
+        Each session (A2A contextId) works on its own DataFrame. Sessions that have
+        not been used recently are moved to disk when the DataFrames held in memory
+        exceed the memory budget, and loaded back on their next tool call. Sessions
+        idle for longer than `workspace_idle_hours` are discarded.
+
+        Args:
+            workspace_memory_budget_mb (int, optional): Memory budget of all session
+                workspaces in MB. Defaults to 1024.
+            workspace_spill_dir (str, optional): Directory evicted workspaces are
+                written to. Defaults to a directory in the system temp directory.
+            workspace_spill_max_mb (int, optional): Size cap of the workspaces
+                written to disk in MB; the least recently used beyond it are
+                discarded. Defaults to 10240.
+            workspace_idle_hours (float, optional): Hours after its last tool call a
+                session's workspace is discarded. Defaults to 24.
+            dataset_cache_dir (str, optional): Directory of the cache of parsed
+                datasets. Defaults to a directory in the system temp directory.
+            dataset_cache_max_mb (int, optional): Size cap of the dataset cache in MB.
+                Defaults to 5120.
+            gcs_cache_dir (str, optional): Directory of the GCS download cache.
+                Defaults to a directory in the system temp directory.
+            gcs_cache_max_mb (int, optional): Size cap of the GCS download cache in MB.
+                Defaults to 10240.
+            gcs_client (storage.Client, optional): Client used for GCS. Defaults to a
+                client created with the environment's credentials on first use.
+            plot_workers (int, optional): Number of processes rendering plots.
+                Defaults to 2.
+            plot_timeout_seconds (float, optional): Seconds a plot may take to render
+                before it is stopped. Defaults to 60.
         """
-        self.df = None
+        if workspace_memory_budget_mb is None:
+            workspace_memory_budget_mb = 1024
+        if workspace_spill_max_mb is None:
+            workspace_spill_max_mb = 10240
+        if workspace_idle_hours is None:
+            workspace_idle_hours = 24
+        if dataset_cache_max_mb is None:
+            dataset_cache_max_mb = 5120
+        if gcs_cache_max_mb is None:
+            gcs_cache_max_mb = 10240
+        if plot_workers is None:
+            plot_workers = 2
+        if plot_timeout_seconds is None:
+            plot_timeout_seconds = 60
+        self._workspaces = WorkspaceManager(
+            int(workspace_memory_budget_mb) * 1024 * 1024,
+            workspace_spill_dir,
+            spill_max_bytes=int(workspace_spill_max_mb) * 1024 * 1024,
+            idle_seconds=float(workspace_idle_hours) * 3600,
+        )
+        self._dataset_cache = DatasetCache(
+            dataset_cache_dir, int(dataset_cache_max_mb) * 1024 * 1024
+        )
+        self._storage_client = gcs_client
+        self._gcs_cache = GCSDownloadCache(
+            self._gcs_client, gcs_cache_dir, int(gcs_cache_max_mb) * 1024 * 1024
+        )
+        self._plot_renderer = PlotRenderer(int(plot_workers), float(plot_timeout_seconds))
+        # Artifact names of recently rendered plots by request, to skip re-rendering
+        self._plot_artifacts: "OrderedDict[str, str]" = OrderedDict()
+        self._plot_lock = threading.Lock()
+
+    @property
+    def df(self) -> Optional[pd.DataFrame]:
+        """The DataFrame of the current session."""
+        return self._workspace().df
+
+    @df.setter
+    def df(self, value: Optional[pd.DataFrame]) -> None:
+        self._workspace().df = value
+
+    def _gcs_client(self) -> storage.Client:
+        if self._storage_client is None:
+            self._storage_client = storage.Client()
+        return self._storage_client
+
+    async def _render_plot(
+        self, tool_context: Optional[ToolContext], kind: str, render, *args
+    ) -> dict:
+        """
+        Render a plot in the plot worker pool and save it as a PNG artifact of the
+        session, named after its content hash.
+
+        A plot requested again with the same data and options is not rendered
+        again, and a rendered plot already stored in the session is not stored
+        again.
+
+        Returns:
+            dict: The artifact reference of the plot and whether it was reused, or an
+            error message if the plot could not be rendered.
+        """
+        if tool_context is None:
+            return {
+                "status": "error",
+                "message": "Plots are saved as artifacts and need a tool context.",
+            }
+        request_key = plot_request_key(render, args)
+        with self._plot_lock:
+            filename = self._plot_artifacts.get(request_key)
+        if filename is not None:
+            stored = await tool_context.get_artifact_version(filename)
+            if stored is not None:
+                return self._plot_reference(filename, stored, cached=True)
+
+        try:
+            png = await self._plot_renderer.render(render, *args)
+        except (TimeoutError, BrokenProcessPool) as e:
+            # The renderer has restarted its workers, so the call can be retried
+            return {
+                "status": "error",
+                "message": str(e) or "The plot worker process stopped unexpectedly; try again.",
+            }
+        digest = hashlib.sha256(png).hexdigest()
+        filename = f"{kind}_{digest[:16]}.png"
+        stored = await tool_context.get_artifact_version(filename)
+        cached = stored is not None
+        if not cached:
+            version = await tool_context.save_artifact(
+                filename,
+                types.Part.from_bytes(data=png, mime_type="image/png"),
+                custom_metadata={"sha256": digest},
+            )
+            stored = await tool_context.get_artifact_version(filename, version)
+        with self._plot_lock:
+            self._plot_artifacts[request_key] = filename
+            self._plot_artifacts.move_to_end(request_key)
+            while len(self._plot_artifacts) > PLOT_INDEX_SIZE:
+                self._plot_artifacts.popitem(last=False)
+        return self._plot_reference(filename, stored, cached)
+
+    @staticmethod
+    def _plot_reference(filename: str, stored, cached: bool) -> dict:
+        return {
+            "artifact": {
+                "filename": filename,
+                "version": stored.version if stored is not None else 0,
+                "mime_type": "image/png",
+                "uri": stored.canonical_uri if stored is not None else None,
+            },
+            "cached": cached,
+        }
+
+    def _cached(self, key, compute):
+        """
+        Return a result computed from the current session's DataFrame, computing it
+        only if the DataFrame changed since it was last computed.
+        """
+        workspace = self._workspace()
+        cache = workspace.state.get("stats")
+        if cache is None:
+            cache = workspace.state["stats"] = StatsCache()
+        return cache.get(workspace.version, key, compute)
+
+    def _column_sketch(self, column) -> ColumnSketch:
+        """The sketches of a column of the current DataFrame, built once per version."""
+        return self._cached(("sketch", column), lambda: sketch_column(self.df[column]))
+
+    def _frequency_profile(self, column, top_k: int) -> dict:
+        """The frequency profile of a column of the current DataFrame, computed once per version."""
+        return self._cached(
+            ("frequencies", column, top_k),
+            lambda: _frequency_profile(self.df[column], top_k),
+        )
 
+    def _pipeline(self) -> TransformPipeline:
+        """The transformation pipeline of the current session's DataFrame."""
+        state = self._workspace().state
+        if state.get("pipeline") is None:
+            state["pipeline"] = TransformPipeline(self.df)
+        return state["pipeline"]
+
+    def _workspace(self) -> Workspace:
+        workspace = _active_workspace.get()
+        if workspace is None:
+            workspace = self._workspaces.get(DEFAULT_SESSION)
+        return workspace
+
+    @_in_session_workspace
     def load_csv(
-        self, file_path: str, drop_unnamed_index: Optional[bool] = None, **kwargs
+        self,
+        file_path: str,
+        drop_unnamed_index: Optional[bool] = None,
+        optimize_dtypes: Optional[bool] = None,
+        chunk_rows: Optional[int] = None,
+        use_cache: Optional[bool] = None,
+        stream_gcs: Optional[bool] = None,
+        max_workers: Optional[int] = None,
+        tool_context: Optional[ToolContext] = None,
+        **kwargs,
     ) -> dict:
         """Load a CSV file into memory, supporting both local and GCS paths.
 
-        If `file_path` starts with 'gs://', downloads from GCS to a temp file.
+        `file_path` may also name a dataset sharded over several files: a glob pattern
+        (e.g. 'gs://bucket/exports/2024-*.csv' or 'data/*.csv'), a local directory or a
+        GCS prefix ending with '/'. The files are loaded concurrently, checked to have
+        the same columns and concatenated, and the result reports the time per file.
+
+        If `file_path` starts with 'gs://', downloads from GCS to a temp file, or for
+        large objects parses the object while it downloads, decompressing gzip or
+        zstd objects on the fly, without writing it to disk.
+        Large files are read in chunks and stored with compact dtypes (downcast
+        integers, categorical strings, parsed dates), so memory use stays bounded by
+        the chunk size; the result then reports the memory saved per column.
+        Parsed datasets are cached by file content and parse options, so loading
+        the same file again opens the cached copy instead of parsing it.
 
         Args:
-            file_path (str): Local path or GCS URI (gs://bucket/path/file.csv).
+            file_path (str): Local path or GCS URI (gs://bucket/path/file.csv), or a glob pattern,
+                             directory or GCS prefix naming several files.
             drop_unnamed_index (bool, optional): Drop 'Unnamed:' index columns. Defaults to True.
+            optimize_dtypes (bool, optional): Read in chunks with compact dtypes. Defaults to True
+                                              for files of 100 MB or more if None or empty string is provided.
+            chunk_rows (int, optional): Rows per chunk when optimizing dtypes. Default is 100000 if None or empty string is provided.
+            use_cache (bool, optional): Reuse or store the parsed dataset in the dataset cache. Defaults to True.
+            stream_gcs (bool, optional): Parse a GCS object while it downloads instead of downloading it first.
+                                         Defaults to True for objects of 100 MB or more if None or empty string is provided.
+            max_workers (int, optional): Number of files loaded at once. Default is 8 if None or empty string is provided.
+            tool_context (ToolContext, optional): Provided by ADK; selects the session's workspace.
             **kwargs: Additional arguments passed to `pd.read_csv`.
 
         Returns:
-            dict: status, row/column counts, dropped_columns list, or error message.
+            dict: status, row/column counts, dropped_columns list, memory report when
+                  dtypes are optimized, whether the dataset came from the cache, per-file
+                  timing when several files are loaded, or error message.
         """
         # Default for dropping unnamed index
         if drop_unnamed_index is None or drop_unnamed_index == "":
             drop_unnamed_index = True
 
-        # Handle GCS URIs
-        local_path = file_path
-        if file_path.startswith("gs://"):
-            download_res = self.read_file_from_gcs(file_path)
-            if download_res.get("status") != "success":
-                return {"status": "error", "message": download_res.get("message")}
-            local_path = download_res["result"]["local_path"]
+        if use_cache is None or use_cache == "":
+            use_cache = True
 
+        options = {
+            "drop_unnamed_index": drop_unnamed_index,
+            "optimize_dtypes": optimize_dtypes,
+            "chunk_rows": chunk_rows,
+            "use_cache": use_cache,
+            "stream_gcs": stream_gcs,
+            "kwargs": kwargs,
+        }
         try:
-            # Read CSV from local path
-            df = pd.read_csv(local_path, **kwargs)
-
-            dropped_columns = []
-            if drop_unnamed_index:
-                # Identify columns like 'Unnamed: *'
-                unnamed_cols = [c for c in df.columns if str(c).startswith("Unnamed:")]
-                for col in unnamed_cols:
-                    col_vals = df[col].dropna()
-                    if (
-                        len(col_vals) > 0
-                        and pd.api.types.is_numeric_dtype(col_vals)
-                        and (col_vals.astype(int) == col_vals).all()
-                        and (
-                            (col_vals.astype(int) == range(len(col_vals))).all()
-                            or (
-                                col_vals.astype(int) == range(1, len(col_vals) + 1)
-                            ).all()
-                        )
-                    ):
-                        df = df.drop(columns=[col])
-                        dropped_columns.append(col)
-
+            df, result = self._load(file_path, options, max_workers)
             self.df = df
-            result = {"status": "success", "rows": df.shape[0], "columns": df.shape[1]}
-            if dropped_columns:
-                result["dropped_columns"] = dropped_columns
+            # A new dataset starts a new transformation pipeline
+            self._workspace().state["pipeline"] = TransformPipeline(
+                df, {"file_path": file_path, "options": options, "max_workers": max_workers}
+            )
             return result
 
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
+    def _load(self, file_path: str, options: dict, max_workers: Optional[int]) -> tuple:
+        """Load one file or a dataset sharded over several files.
+
+        Returns:
+            tuple: The DataFrame and the result of `load_csv`.
+        """
+        if is_multi_file(file_path):
+            return self._load_shards(file_path, options, max_workers)
+        df, info, cached = self._load_source(file_path, **options)
+        result = {"status": "success", "rows": df.shape[0], "columns": df.shape[1]}
+        result.update(info)
+        result["cached"] = cached
+        return df, result
+
+    def _load_source(
+        self,
+        file_path: str,
+        drop_unnamed_index: bool,
+        optimize_dtypes: Optional[bool],
+        chunk_rows: Optional[int],
+        use_cache: bool,
+        stream_gcs: Optional[bool],
+        kwargs: dict,
+    ) -> tuple:
+        """Load a single local or GCS file, through the download and dataset caches.
+
+        Returns:
+            tuple: The DataFrame, the load summary and whether it came from the dataset cache.
+        """
+        # Handle GCS URIs
+        source = file_path
+        blob = None
+        content_id = None
+        if file_path.startswith("gs://"):
+            blob = self._gcs_cache.get_blob(file_path)
+            if stream_gcs is None or stream_gcs == "":
+                stream_gcs = (blob.size or 0) >= STREAMING_THRESHOLD_BYTES
+            if stream_gcs:
+                content_id = f"{file_path}#{blob.generation}"
+            else:
+                blob = None
+                download_res = self.read_file_from_gcs(file_path)
+                if download_res.get("status") != "success":
+                    raise IOError(download_res.get("message"))
+                source = download_res["result"]["local_path"]
+
+        if optimize_dtypes is None or optimize_dtypes == "":
+            optimize_dtypes = blob is not None or should_stream(source)
+
+        cache_key = None
+        cached = None
+        if use_cache:
+            options = {
+                "drop_unnamed_index": bool(drop_unnamed_index),
+                "optimize_dtypes": bool(optimize_dtypes),
+                "chunk_rows": chunk_rows or None,
+                "read_csv": kwargs,
+            }
+            cache_key = self._dataset_cache.key(source, options, content_id)
+            cached = self._dataset_cache.get(cache_key)
+
+        if cached is not None:
+            df, info = cached
+        elif blob is not None:
+            with BlobStream(blob) as stream:
+                df, info = self._read_csv(
+                    stream.file, drop_unnamed_index, optimize_dtypes, chunk_rows, kwargs
+                )
+                info["streamed"] = {
+                    "bytes": stream.bytes_read,
+                    "compression": stream.compression,
+                }
+        else:
+            df, info = self._read_csv(
+                source, drop_unnamed_index, optimize_dtypes, chunk_rows, kwargs
+            )
+        if cached is None and cache_key is not None:
+            try:
+                self._dataset_cache.put(cache_key, df, info)
+            except (pa.ArrowException, OSError, TypeError, ValueError):
+                # Datasets Arrow cannot store are simply not cached
+                pass
+        return df, info, cached is not None
+
+    def _load_shards(
+        self, file_path: str, options: dict, max_workers: Optional[int]
+    ) -> tuple:
+        """Load the files a glob, directory or GCS prefix names concurrently and
+        concatenate them after checking that they have the same columns.
+
+        Returns:
+            tuple: The DataFrame and the tool result, with the timing of each shard.
+        """
+        if file_path.startswith("gs://"):
+            paths = expand_gcs(self._gcs_client(), file_path)
+        else:
+            paths = expand_local(file_path)
+        if max_workers is None or max_workers == "":
+            max_workers = 8
+        max_workers = max(1, min(int(max_workers), len(paths)))
+
+        def load(path):
+            started = time.perf_counter()
+            df, info, cached = self._load_source(path, **options)
+            seconds = time.perf_counter() - started
+            return df, info, cached, seconds
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            loaded = list(pool.map(load, paths))
+        load_seconds = time.perf_counter() - started
+
+        # The unnamed index of a later shard does not start at 0, so it is only
+        # recognised in some shards; drop it from all of them
+        dropped = {
+            col for _, info, _, _ in loaded for col in info.get("dropped_columns", [])
+        }
+        frames = [
+            df.drop(columns=[col for col in dropped if col in df.columns])
+            if dropped
+            else df
+            for df, _, _, _ in loaded
+        ]
+        shards = [
+            {
+                "path": path,
+                "rows": df.shape[0],
+                "seconds": round(seconds, 3),
+                "cached": cached,
+                **({"streamed": info["streamed"]} if "streamed" in info else {}),
+            }
+            for path, (df, info, cached, seconds) in zip(paths, loaded)
+        ]
+        del loaded
+        df, mixed_types = combine_shards(
+            frames, paths, ignore_index="index_col" not in options["kwargs"]
+        )
+        del frames
+
+        result = {
+            "status": "success",
+            "rows": df.shape[0],
+            "columns": df.shape[1],
+            "files": len(paths),
+            "workers": max_workers,
+            "load_seconds": round(load_seconds, 3),
+            "shards": shards,
+        }
+        if dropped:
+            result["dropped_columns"] = sorted(dropped, key=str)
+        if mixed_types:
+            result["mixed_type_columns"] = mixed_types
+        return df, result
+
+    @staticmethod
+    def _read_csv(
+        source,
+        drop_unnamed_index: bool,
+        optimize_dtypes: bool,
+        chunk_rows: Optional[int],
+        kwargs: dict,
+    ) -> tuple:
+        """Parse a CSV file or stream and drop its unnamed index columns.
+
+        Returns:
+            tuple: The DataFrame and a dict with the dropped_columns list and the
+                   memory report, when there are any.
+        """
+        # Read CSV from local path
+        memory_report = None
+        if optimize_dtypes:
+            df, memory_report = read_csv_chunked(source, chunk_rows or None, **kwargs)
+        else:
+            df = pd.read_csv(source, **kwargs)
+
+        dropped_columns = []
+        if drop_unnamed_index:
+            # Identify columns like 'Unnamed: *'
+            unnamed_cols = [c for c in df.columns if str(c).startswith("Unnamed:")]
+            for col in unnamed_cols:
+                col_vals = df[col].dropna()
+                if (
+                    len(col_vals) > 0
+                    and pd.api.types.is_numeric_dtype(col_vals)
+                    and (col_vals.astype(int) == col_vals).all()
+                    and (
+                        (col_vals.astype(int) == range(len(col_vals))).all()
+                        or (
+                            col_vals.astype(int) == range(1, len(col_vals) + 1)
+                        ).all()
+                    )
+                ):
+                    df = df.drop(columns=[col])
+                    dropped_columns.append(col)
+
+        info = {}
+        if dropped_columns:
+            info["dropped_columns"] = dropped_columns
+        if memory_report is not None:
+            info["memory"] = memory_report
+        return df, info
+
     def read_file_from_gcs(self, gcs_path: str) -> dict:
         """
-        Downloads a single file from GCS to /tmp and returns a dict with status, message, and result.
+        Downloads a single file from GCS to the local download cache and returns a dict with status, message, and result.
+        A cached copy is reused as long as the object has not been overwritten in GCS since it was downloaded.
 
         Args:
             gcs_path (str): Full GCS path including filename, e.g. "gs://my-bucket/path/to/file.txt"
@@ -97,32 +658,24 @@ class DataScienceTools:
                 "message": str,
                 "result": {
                     "local_path": str,
-                    "gcs_path": str
+                    "gcs_path": str,
+                    "generation": int,
+                    "cached": bool
                 }
             }
         """
         try:
-            if not gcs_path.startswith("gs://"):
-                raise ValueError("GCS path must start with gs://")
-
-            parts = gcs_path[5:].split("/", 1)
-            bucket_name = parts[0]
-            blob_path = parts[1]
-
-            client = storage.Client()
-            bucket = client.bucket(bucket_name)
-            blob = bucket.blob(blob_path)
-
-            # Download to a temp file in /tmp
-            local_dir = "/tmp"
-            os.makedirs(local_dir, exist_ok=True)
-            local_path = os.path.join(local_dir, os.path.basename(blob_path))
-            blob.download_to_filename(local_path)
+            local_path, cached, generation = self._gcs_cache.fetch(gcs_path)
 
             return {
                 "status": "success",
-                "message": "Download completed",
-                "result": {"local_path": local_path, "gcs_path": gcs_path},
+                "message": "Cached copy is up to date" if cached else "Download completed",
+                "result": {
+                    "local_path": local_path,
+                    "gcs_path": gcs_path,
+                    "generation": generation,
+                    "cached": cached,
+                },
             }
         except Exception as e:
             return {
@@ -150,17 +703,11 @@ class DataScienceTools:
             }
         """
         try:
-            if not gcs_path.startswith("gs://"):
-                raise ValueError("GCS path must start with gs://")
+            bucket_name, blob_path = parse_gcs_path(gcs_path)
             if not os.path.isfile(local_file_path):
                 raise ValueError(f"Local file does not exist: {local_file_path}")
 
-            parts = gcs_path[5:].split("/", 1)
-            bucket_name = parts[0]
-            blob_path = parts[1]
-
-            client = storage.Client()
-            bucket = client.bucket(bucket_name)
+            bucket = self._gcs_client().bucket(bucket_name)
             blob = bucket.blob(blob_path)
 
             blob.upload_from_filename(local_file_path)
@@ -177,10 +724,14 @@ class DataScienceTools:
                 "result": {},
             }
 
-    def get_basic_info(self) -> dict:
+    @_in_session_workspace
+    def get_basic_info(self, tool_context: Optional[ToolContext] = None) -> dict:
         """Retrieve basic metadata about the loaded DataFrame: shape,
         column names, data types, and count of missing values per column.
 
+        Args:
+            tool_context (ToolContext, optional): Provided by ADK; selects the session's workspace.
+
         Returns:
             dict: {
                 'shape': [rows, columns],
@@ -194,22 +745,43 @@ class DataScienceTools:
         info = {
             "shape": list(self.df.shape),
             "columns": self.df.columns.tolist(),
-            "dtypes": self.df.dtypes.astype(str).to_dict(),
-            "missing_values": self.df.isnull().sum().to_dict(),
+            "dtypes": dict(
+                self._cached("dtypes", lambda: self.df.dtypes.astype(str).to_dict())
+            ),
+            "missing_values": dict(
+                self._cached("missing_values", lambda: self.df.isnull().sum().to_dict())
+            ),
         }
         return info
 
+    @_in_session_workspace
     def get_summary_statistics(
-        self, include_categorical: Optional[bool] = None
+        self,
+        include_categorical: Optional[bool] = None,
+        columns: Optional[str] = None,
+        approximate: Optional[bool] = None,
+        tool_context: Optional[ToolContext] = None,
     ) -> dict:
         """Compute summary statistics for numerical columns, optionally including categorical.
 
+        Statistics are computed per column and kept until the dataset changes, so
+        asking about a few columns only computes those, and asking again is free.
+
         Args:
             include_categorical (bool, optional): If True or empty string, include all columns; otherwise only numeric.
                                              Default is False if None or empty string is provided.
+            columns (str, optional): Comma-separated names of the columns to describe, of any type. If None or empty
+                                     string, the columns selected by include_categorical are described.
+            approximate (bool, optional): Estimate quantiles, distinct counts and most frequent values from sketches,
+                                          instead of computing them exactly. If None or empty string, numeric and
+                                          datetime columns of datasets of 10 million rows or more are estimated,
+                                          where a sample is faster than sorting; other columns are exact.
+            tool_context (ToolContext, optional): Provided by ADK; selects the session's workspace.
 
         Returns:
-            dict: Nested dictionary of summary statistics: {column: {stat: value, ...}, ...}
+            dict: Nested dictionary of summary statistics: {column: {stat: value, ...}, ...}. When any column is
+                  approximate: {'approximate': True, 'approximate_columns': [...],
+                  'statistics': {column: {stat: value, ...}, ...}, 'error_bounds': {...}}
         """
         if self.df is None:
             return {"status": "error", "message": "No DataFrame loaded."}
@@ -218,26 +790,54 @@ class DataScienceTools:
         if include_categorical is None or include_categorical == "":
             include_categorical = False
 
-        if include_categorical:
-            summary = self.df.describe(include="all")
+        if columns:
+            columns_list = [col.strip() for col in columns.split(",") if col.strip()]
+            missing_columns = [col for col in columns_list if col not in self.df.columns]
+            if missing_columns:
+                return {
+                    "status": "error",
+                    "message": f"Columns not found: {', '.join(missing_columns)}",
+                }
         else:
-            summary = self.df.describe()
-
-        # Convert to regular dictionary and replace NaN values with None
-        result_dict = summary.to_dict()
-        for col in result_dict:
-            for stat in result_dict[col]:
-                if pd.isna(result_dict[col][stat]):
-                    result_dict[col][stat] = None
+            # Like DataFrame.describe: numeric columns, or all columns if there are none
+            columns_list = self.df.select_dtypes(include=np.number).columns.tolist()
+            if include_categorical or not columns_list:
+                columns_list = self.df.columns.tolist()
 
-        return result_dict
+        if approximate is None or approximate == "":
+            large = len(self.df) >= APPROXIMATE_THRESHOLD_ROWS
+            sketched = [
+                col for col in columns_list if large and quantiles_faster_than_exact(self.df[col])
+            ]
+        else:
+            sketched = list(columns_list) if approximate else []
+
+        sketches = {col: self._column_sketch(col) for col in sketched}
+        stats = _align_stats(
+            {
+                col: sketches[col].describe()
+                if col in sketches
+                else self._cached(("describe", col), lambda col=col: _describe_column(self.df[col]))
+                for col in columns_list
+            }
+        )
+        if not sketches:
+            return stats
+        return {
+            "approximate": True,
+            "approximate_columns": sketched,
+            "statistics": stats,
+            "error_bounds": combined_error_bounds(list(sketches.values())),
+        }
 
-    def plot_histograms(
+    @_in_session_workspace
+    async def plot_histograms(
         self,
         columns: Optional[str] = None,
         bins: Optional[int] = None,
         fig_height: Optional[int] = None,
         fig_width: Optional[int] = None,
+        tool_context: Optional[ToolContext] = None,
     ) -> dict:
         """Generate and save histograms for numeric columns.
 
@@ -246,10 +846,12 @@ class DataScienceTools:
             bins (int, optional): Number of bins for histograms. Default is 30 if None or empty string is provided.
             fig_height (int, optional): Height of the figure in inches. Default is 6 if None or empty string is provided.
             fig_width (int, optional): Width of the figure in inches. Default is 12 if None or empty string is provided.
+            tool_context (ToolContext, optional): Provided by ADK; selects the session's workspace and stores the plot.
 
         Returns:
             dict: {
-                'file_path': path to the saved PNG image,
+                'artifact': {'filename', 'version', 'mime_type', 'uri'} of the PNG artifact,
+                'cached': whether an identical plot was already stored,
                 'type': 'image',
                 'columns_plotted': list of columns plotted,
                 'description': brief description of the plot
@@ -277,73 +879,140 @@ class DataScienceTools:
         if num_cols == 0:
             return {"status": "error", "message": "No numerical columns to plot."}
 
-        fig, axes = plt.subplots(
-            nrows=(num_cols + 2) // 3, ncols=3, figsize=(fig_width, fig_height)
+        # Only the bin counts are sent to the plot workers, not the data
+        histograms = []
+        for col in columns_list:
+            values = self.df[col].dropna().to_numpy(dtype=float)
+            counts, edges = np.histogram(values, bins=int(bins))
+            histograms.append((str(col), counts, edges))
+
+        plot = await self._render_plot(
+            tool_context,
+            "histograms",
+            render_histograms,
+            histograms,
+            fig_width,
+            fig_height,
         )
-        axes = axes.flatten()
-        for idx, col in enumerate(columns_list):
-            self.df[col].hist(bins=bins, ax=axes[idx])
-            axes[idx].set_title(col)
-        # Safely remove unused axes
-        for j in range(len(columns_list), len(axes)):
-            fig.delaxes(axes[j])
-        plt.tight_layout()
-        filename = f"histograms_{uuid.uuid4().hex}.png"
-        plt.savefig(filename)
-        plt.close()
+        if plot.get("status") == "error":
+            return plot
         return {
-            "file_path": os.path.abspath(filename),
+            **plot,
             "type": "image",
             "columns_plotted": columns_list,
             "description": "Histograms for numeric columns",
         }
 
-    def get_unique_values(self, column: str) -> dict:
+    @_in_session_workspace
+    def get_unique_values(
+        self,
+        column: str,
+        approximate: Optional[bool] = None,
+        tool_context: Optional[ToolContext] = None,
+    ) -> dict:
         """Retrieve unique values from a specified column.
         If there are more than 50 unique values,
-        randomly sample 50 of them to return.
+        the 50 most frequent of them are returned.
 
         Args:
             column (str): Name of the column to inspect.
+            approximate (bool, optional): Estimate the number of distinct values and the 50 most frequent values
+                                          from sketches instead of counting the values. If None or empty string,
+                                          estimated for numeric and datetime columns of datasets of 10 million rows
+                                          or more whose values are almost all distinct, where counting is slowest.
+            tool_context (ToolContext, optional): Provided by ADK; selects the session's workspace.
 
         Returns:
             dict: {
-                'unique_values': [list of unique values] or error message
+                'unique_values': [list of unique values] or error message,
+                'distinct_count': number of unique values
             }
+            When approximate, 'unique_values' holds the most frequent values, with
+            'distinct_count', 'heavy_hitters' (value, count, share), 'null_count'
+            and 'error_bounds'. Values too rare to tell from the sketch's error, such
+            as every value of a column of distinct values, are not listed.
         """
         if self.df is None:
             return {"status": "error", "message": "No DataFrame loaded."}
         if column not in self.df.columns:
             return {"status": "error", "message": f"Column '{column}' not found."}
 
-        # Get unique values
-        unique_vals = self.df[column].unique()
-
-        # Convert to Python native types and handle special values
-        processed_vals = []
-        for val in unique_vals:
-            if pd.isna(val):  # Handle NaN, None values
-                processed_vals.append(None)
-            elif isinstance(val, (np.integer, np.floating, np.bool_)):
-                # Convert numpy types to native Python types
-                processed_vals.append(val.item())
-            else:
-                # Other values (strings, lists, etc.) should already be in native Python format
-                processed_vals.append(val)
+        if approximate is None or approximate == "":
+            approximate = (
+                len(self.df) >= APPROXIMATE_THRESHOLD_ROWS
+                and self._column_sketch(column).counted_faster_than_exact()
+            )
+        if approximate:
+            sketch = self._column_sketch(column)
+            heavy_hitters = sketch.heavy_hitters(50)
+            return {
+                "unique_values": [hitter["value"] for hitter in heavy_hitters],
+                "distinct_count": sketch.distinct.estimate(),
+                "heavy_hitters": heavy_hitters,
+                "null_count": sketch.nulls,
+                "approximate": True,
+                "error_bounds": sketch.error_bounds(),
+            }
+
+        profile = self._frequency_profile(column, 50)
+        unique_vals = [entry["value"] for entry in profile["top_values"]]
+        # Missing values are reported as one None value
+        if profile["null_count"] and len(unique_vals) < 50:
+            unique_vals.append(None)
+
+        return {
+            "unique_values": unique_vals,
+            "distinct_count": profile["cardinality"] + int(profile["null_count"] > 0),
+        }
+
+    @_in_session_workspace
+    def get_value_frequencies(
+        self,
+        column: str,
+        top_k: Optional[int] = None,
+        tool_context: Optional[ToolContext] = None,
+    ) -> dict:
+        """Profile the value frequencies of a column: its most frequent values, cardinality and missing values.
+
+        Args:
+            column (str): Name of the column to profile.
+            top_k (int, optional): Number of most frequent values to return. Default is 10 if None or empty string is provided.
+            tool_context (ToolContext, optional): Provided by ADK; selects the session's workspace.
+
+        Returns:
+            dict: {
+                'column': column name,
+                'rows': number of rows,
+                'cardinality': number of distinct non-missing values,
+                'null_count': number of missing values,
+                'null_fraction': share of the rows that are missing,
+                'top_values': [{'value': value, 'count': rows, 'share': share of the rows}, ...],
+                'other_count': non-missing rows with a value outside top_values
+            } or error message
+        """
+        if self.df is None:
+            return {"status": "error", "message": "No DataFrame loaded."}
+        if column not in self.df.columns:
+            return {"status": "error", "message": f"Column '{column}' not found."}
 
-        # Sample if there are too many unique values
-        if len(processed_vals) > 50:
-            processed_vals = random.sample(
-                processed_vals, 50
-            )  # Limit to 50 unique values
+        # Set default value if None or empty string
+        if top_k is None or top_k == "":
+            top_k = 10
+        top_k = int(top_k)
+        if top_k < 1:
+            return {"status": "error", "message": "top_k must be at least 1."}
 
-        return {"unique_values": processed_vals}
+        return {"column": column, **self._frequency_profile(column, top_k)}
 
-    def get_data_sample(self, n: Optional[int] = None) -> dict:
+    @_in_session_workspace
+    def get_data_sample(
+        self, n: Optional[int] = None, tool_context: Optional[ToolContext] = None
+    ) -> dict:
         """Retrieve a random sample of n rows with their column names from the DataFrame.
 
         Args:
             n (int, optional): Number of rows to sample. Default is 5 if None or empty string is provided.
+            tool_context (ToolContext, optional): Provided by ADK; selects the session's workspace.
 
         Returns:
             dict: {
@@ -371,27 +1040,40 @@ class DataScienceTools:
 
         return {"sample": sample}
 
-    def create_scatter_plot(
+    @_in_session_workspace
+    async def create_scatter_plot(
         self,
         x_column: str,
         y_column: str,
         color_column: Optional[str] = None,
         fig_height: Optional[int] = None,
         fig_width: Optional[int] = None,
+        max_points: Optional[int] = None,
+        tool_context: Optional[ToolContext] = None,
     ) -> dict:
         """Create a scatter plot between two numerical columns, optionally colored by a third column.
 
+        Datasets with more than `max_points` rows are not drawn point by point: with
+        numeric axes they are drawn as a 2-D density of the points (colored by the
+        mean of a numeric color column, if given), otherwise as a sample of
+        `max_points` rows taken per category of the color column, keeping outliers.
+
         Args:
             x_column (str): Name of the column to plot on the x-axis.
             y_column (str): Name of the column to plot on the y-axis.
             color_column (str, optional): Name of the column to use for coloring points. If None or empty string, no coloring is applied.
             fig_height (int, optional): Height of the figure in inches. Default is 8 if None or empty string is provided.
             fig_width (int, optional): Width of the figure in inches. Default is 10 if None or empty string is provided.
+            max_points (int, optional): Number of rows above which the plot is aggregated or sampled. Default is 50000 if None or empty string is provided.
+            tool_context (ToolContext, optional): Provided by ADK; selects the session's workspace and stores the plot.
 
         Returns:
             dict: {
-                'file_path': path to the saved PNG image,
+                'artifact': {'filename', 'version', 'mime_type', 'uri'} of the PNG artifact,
+                'cached': whether an identical plot was already stored,
                 'type': 'image',
+                'rendering': 'points', 'density' or 'sample',
+                'points_plotted': number of rows drawn or binned,
                 'description': brief description of the plot
             }
         """
@@ -403,6 +1085,8 @@ class DataScienceTools:
             fig_height = 8
         if fig_width is None or fig_width == "":
             fig_width = 10
+        if max_points is None or max_points == "":
+            max_points = SCATTER_MAX_POINTS
 
         # Treat empty string as None for color_column
         if color_column == "":
@@ -417,70 +1101,111 @@ class DataScienceTools:
         if color_column is not None and color_column not in self.df.columns:
             return {"status": "error", "message": f"Column '{color_column}' not found."}
 
-        plt.figure(figsize=(fig_width, fig_height))
-
+        color = None
+        categories = None
         if color_column:
-            plt.scatter(
-                self.df[x_column],
-                self.df[y_column],
-                c=self.df[color_column].astype("category").cat.codes
-                if self.df[color_column].dtype == "object"
-                else self.df[color_column],
-                alpha=0.6,
-                cmap="viridis",
-            )
-            if self.df[color_column].dtype == "object":
-                # Create a legend for categorical data
-                categories = self.df[color_column].astype("category").cat.categories
-                from matplotlib.lines import Line2D
-
-                handles = [
-                    Line2D(
-                        [0],
-                        [0],
-                        marker="o",
-                        color="w",
-                        markerfacecolor="C" + str(i % 10),
-                        markersize=10,
-                    )
-                    for i in range(len(categories))
-                ]
-                plt.legend(handles, categories, title=color_column, loc="best")
+            color_series = self.df[color_column]
+            if pd.api.types.is_numeric_dtype(color_series) and not isinstance(
+                color_series.dtype, pd.CategoricalDtype
+            ):
+                color = color_series.to_numpy(dtype=float, na_value=np.nan)
             else:
-                # Add a colorbar for numerical data
-                plt.colorbar(label=color_column)
-        else:
-            plt.scatter(self.df[x_column], self.df[y_column], alpha=0.6)
-
-        plt.xlabel(x_column)
-        plt.ylabel(y_column)
-        plt.title(f"Scatter plot of {y_column} vs {x_column}")
-        plt.grid(True, linestyle="--", alpha=0.7)
-        plt.tight_layout()
+                # Categorical data is colored by category code, with a legend
+                codes = color_series.astype("category")
+                color = codes.cat.codes.to_numpy()
+                categories = [str(c) for c in codes.cat.categories]
+
+        x = self.df[x_column].to_numpy()
+        y = self.df[y_column].to_numpy()
+        color_label = str(color_column) if color_column else None
+        numeric_axes = all(
+            pd.api.types.is_numeric_dtype(self.df[col]) for col in (x_column, y_column)
+        )
 
-        filename = f"scatter_{x_column}_{y_column}_{uuid.uuid4().hex}.png"
-        plt.savefig(filename)
-        plt.close()
+        # Large datasets are reduced so the render time does not grow with them
+        if len(self.df) <= int(max_points):
+            rendering = "points"
+            points_plotted = len(self.df)
+        elif numeric_axes and categories is None:
+            rendering = "density"
+            grid, x_edges, y_edges, points_plotted = density_grid(
+                self.df[x_column].to_numpy(dtype=float, na_value=np.nan),
+                self.df[y_column].to_numpy(dtype=float, na_value=np.nan),
+                color,
+            )
+        else:
+            rendering = "sample"
+            rows = stratified_sample(x, y, color if categories else None, int(max_points))
+            x, y = x[rows], y[rows]
+            if color is not None:
+                color = color[rows]
+            points_plotted = len(rows)
+
+        if rendering == "density":
+            plot = await self._render_plot(
+                tool_context,
+                "scatter",
+                render_density,
+                grid,
+                x_edges,
+                y_edges,
+                str(x_column),
+                str(y_column),
+                points_plotted,
+                fig_width,
+                fig_height,
+                color_label,
+            )
+        else:
+            plot = await self._render_plot(
+                tool_context,
+                "scatter",
+                render_scatter,
+                x,
+                y,
+                str(x_column),
+                str(y_column),
+                fig_width,
+                fig_height,
+                color,
+                color_label,
+                categories,
+            )
 
+        description = {
+            "points": "Scatter plot",
+            "density": "Density plot",
+            "sample": f"Scatter plot of a {points_plotted:,}-row sample",
+        }[rendering]
+        if plot.get("status") == "error":
+            return plot
         return {
-            "file_path": os.path.abspath(filename),
+            **plot,
             "type": "image",
-            "description": f"Scatter plot showing relationship between {x_column} and {y_column}"
+            "rendering": rendering,
+            "points_plotted": int(points_plotted),
+            "description": f"{description} showing relationship between {x_column} and {y_column}"
             + (f", colored by {color_column}" if color_column else ""),
         }
 
-    def plot_correlation_heatmap(
-        self, fig_width: Optional[int] = None, fig_height: Optional[int] = None
+    @_in_session_workspace
+    async def plot_correlation_heatmap(
+        self,
+        fig_width: Optional[int] = None,
+        fig_height: Optional[int] = None,
+        tool_context: Optional[ToolContext] = None,
     ) -> dict:
         """Create a correlation heatmap for all numerical columns.
 
         Args:
             fig_width (int, optional): Width of the figure in inches. Default is 10 if None or empty string is provided.
             fig_height (int, optional): Height of the figure in inches. Default is 8 if None or empty string is provided.
+            tool_context (ToolContext, optional): Provided by ADK; selects the session's workspace and stores the plot.
 
         Returns:
             dict: {
-                'file_path': path to the saved PNG image,
+                'artifact': {'filename', 'version', 'mime_type', 'uri'} of the PNG artifact,
+                'cached': whether an identical plot was already stored,
                 'type': 'image',
                 'description': description of the heatmap
             }
@@ -506,66 +1231,35 @@ class DataScienceTools:
         # Calculate correlation and ensure float type
         corr_matrix = numeric_df.corr().astype(float)
 
-        # Create the heatmap
-        plt.figure(figsize=(fig_width, fig_height))
-        plt.imshow(corr_matrix, cmap="coolwarm", vmin=-1, vmax=1)
-
-        # Add correlation values as text
-        for i in range(len(corr_matrix.columns)):
-            for j in range(len(corr_matrix.columns)):
-                cell = corr_matrix.iloc[i, j]
-                if isinstance(cell, complex):
-                    value = float(cell.real)
-                elif isinstance(cell, (int, float, np.integer, np.floating)):
-                    value = float(cell)
-                else:
-                    # For unsupported types (e.g., str, date), skip annotation or convert to string
-                    value = None
-                text_color = (
-                    "white" if (value is not None and abs(value) > 0.65) else "black"
-                )
-                plt.text(
-                    j,
-                    i,
-                    f"{value:.2f}" if value is not None else "",
-                    ha="center",
-                    va="center",
-                    color=text_color,
-                    fontsize=8,
-                )
-
-        # Styling
-        plt.colorbar(label="Correlation Coefficient")
-        plt.title("Correlation Matrix Heatmap")
-        plt.xticks(
-            range(len(corr_matrix.columns)),
-            list(map(str, corr_matrix.columns)),
-            rotation=45,
-            ha="right",
-        )
-        plt.yticks(range(len(corr_matrix.columns)), list(map(str, corr_matrix.columns)))
-        plt.tight_layout()
-
-        # Save
-        filename = f"correlation_heatmap_{uuid.uuid4().hex}.png"
-        plt.savefig(filename)
-        plt.close()
-
         # Convert column names to a list of strings to ensure basic Python types
         column_names = [str(col) for col in numeric_df.columns.tolist()]
 
+        plot = await self._render_plot(
+            tool_context,
+            "correlation_heatmap",
+            render_heatmap,
+            corr_matrix.to_numpy(),
+            column_names,
+            fig_width,
+            fig_height,
+        )
+
+        if plot.get("status") == "error":
+            return plot
         return {
-            "file_path": os.path.abspath(filename),
+            **plot,
             "type": "image",
             "columns": column_names,
             "description": f"Correlation heatmap for {len(column_names)} numerical columns",
         }
 
-    def create_boxplot(
+    @_in_session_workspace
+    async def create_boxplot(
         self,
         columns: Optional[str] = None,
         fig_width: Optional[int] = None,
         fig_height: Optional[int] = None,
+        tool_context: Optional[ToolContext] = None,
     ) -> dict:
         """Create box plots for specified columns to visualize distributions and outliers.
 
@@ -573,10 +1267,12 @@ class DataScienceTools:
             columns (str, optional): Comma-separated column names to plot; if None or empty string, use all numeric columns.
             fig_width (int, optional): Width of the figure in inches. Default is 12 if None or empty string is provided.
             fig_height (int, optional): Height of the figure in inches. Default is 6 if None or empty string is provided.
+            tool_context (ToolContext, optional): Provided by ADK; selects the session's workspace and stores the plot.
 
         Returns:
             dict: {
-                'file_path': path to the saved PNG image,
+                'artifact': {'filename', 'version', 'mime_type', 'uri'} of the PNG artifact,
+                'cached': whether an identical plot was already stored,
                 'type': 'image',
                 'columns_plotted': list of columns plotted,
                 'description': description of the plot
@@ -607,35 +1303,49 @@ class DataScienceTools:
                 "message": f"Columns not found: {', '.join(missing_columns)}",
             }
 
-        # Create the boxplots
-        plt.figure(figsize=(fig_width, fig_height))
-        self.df[columns_list].boxplot(vert=True, patch_artist=True)
-        plt.title("Box Plot of Selected Columns")
-        plt.xticks(rotation=45, ha="right")
-        plt.grid(True, linestyle="--", alpha=0.7)
-        plt.tight_layout()
-
-        # Save
-        filename = f"boxplot_{uuid.uuid4().hex}.png"
-        plt.savefig(filename)
-        plt.close()
+        non_numeric = [
+            col for col in columns_list if not pd.api.types.is_numeric_dtype(self.df[col])
+        ]
+        if non_numeric:
+            return {
+                "status": "error",
+                "message": f"Columns are not numeric: {', '.join(map(str, non_numeric))}",
+            }
 
         # Convert column names to strings to ensure basic Python types
         columns_str = [str(col) for col in columns_list]
 
+        # Only the box statistics and outliers are sent to the plot workers
+        stats = boxplot_stats(
+            [self.df[col].dropna().to_numpy(dtype=float) for col in columns_list],
+            labels=columns_str,
+        )
+        plot = await self._render_plot(
+            tool_context,
+            "boxplot",
+            render_boxplot,
+            stats,
+            fig_width,
+            fig_height,
+        )
+
+        if plot.get("status") == "error":
+            return plot
         return {
-            "file_path": os.path.abspath(filename),
+            **plot,
             "type": "image",
             "columns_plotted": columns_str,
             "description": f"Box plot showing distribution and outliers for {len(columns_str)} numerical columns",
         }
 
-    def plot_pie_chart(
+    @_in_session_workspace
+    async def plot_pie_chart(
         self,
         column: str,
         max_categories: Optional[int] = None,
         fig_width: Optional[int] = None,
         fig_height: Optional[int] = None,
+        tool_context: Optional[ToolContext] = None,
     ) -> dict:
         """Create a pie chart for a categorical column.
 
@@ -644,10 +1354,12 @@ class DataScienceTools:
             max_categories (int, optional): Maximum number of categories to include before grouping as 'Other'. Default is 10 if None or empty string is provided.
             fig_width (int, optional): Width of the figure in inches. Default is 10 if None or empty string is provided.
             fig_height (int, optional): Height of the figure in inches. Default is 8 if None or empty string is provided.
+            tool_context (ToolContext, optional): Provided by ADK; selects the session's workspace and stores the plot.
 
         Returns:
             dict: {
-                'file_path': path to the saved PNG image,
+                'artifact': {'filename', 'version', 'mime_type', 'uri'} of the PNG artifact,
+                'cached': whether an identical plot was already stored,
                 'type': 'image',
                 'description': description of the pie chart
             }
@@ -688,33 +1400,28 @@ class DataScienceTools:
         labels = [str(label) for label in value_counts.index]
         values = value_counts.values.tolist()
 
-        # Create the pie chart
-        plt.figure(figsize=(fig_width, fig_height))
-        plt.pie(
+        plot = await self._render_plot(
+            tool_context,
+            "pie_chart",
+            render_pie,
+            labels,
             values,
-            labels=labels,
-            autopct="%1.1f%%",
-            startangle=90,
-            shadow=True,
-            explode=[0.05] * len(values),  # Slight separation for all slices
+            f"Distribution of {column}",
+            fig_width,
+            fig_height,
         )
-        plt.axis("equal")  # Equal aspect ratio ensures that pie is drawn as a circle
-        plt.title(f"Distribution of {column}")
-        plt.tight_layout()
-
-        # Save
-        filename = f"pie_chart_{column}_{uuid.uuid4().hex}.png"
-        plt.savefig(filename)
-        plt.close()
 
+        if plot.get("status") == "error":
+            return plot
         return {
-            "file_path": os.path.abspath(filename),
+            **plot,
             "type": "image",
             "column": column,
             "categories": labels,
             "description": f"Pie chart showing distribution of {column} across {len(value_counts)} categories",
         }
 
+    @_in_session_workspace
     def modify_dataset(
         self,
         drop_columns: Optional[str] = None,
@@ -723,6 +1430,7 @@ class DataScienceTools:
         datetime_format: Optional[str] = None,
         fill_na: Optional[str] = None,
         fill_value: Optional[str] = None,
+        tool_context: Optional[ToolContext] = None,
     ) -> dict:
         """Modify the dataset by dropping columns, setting index, converting datetime columns, or filling missing values.
 
@@ -733,6 +1441,7 @@ class DataScienceTools:
             datetime_format (str, optional): Format string for datetime conversion (e.g., '%Y-%m-%d'). Empty string is treated as None.
             fill_na (str, optional): Comma-separated names of columns to fill NA values in. Empty string is treated as None.
             fill_value (str, optional): Value to use for filling NA values (use 'mean', 'median', 'mode', or a specific value). Empty string is treated as None.
+            tool_context (ToolContext, optional): Provided by ADK; selects the session's workspace.
 
         Returns:
             dict: {
@@ -758,122 +1467,56 @@ class DataScienceTools:
         if fill_value == "":
             fill_value = None
 
-        modifications = []
-
-        # Drop columns if specified
+        # The changes are recorded as steps and applied in one pass, all or none
+        steps = []
         if drop_columns:
-            columns_to_drop = [col.strip() for col in drop_columns.split(",")]
-            # Check if all columns exist
-            invalid_columns = [
-                col for col in columns_to_drop if col not in self.df.columns
-            ]
-            if invalid_columns:
-                return {
-                    "status": "error",
-                    "message": f"Columns not found: {', '.join(invalid_columns)}",
-                }
-
-            self.df = self.df.drop(columns=columns_to_drop)
-            modifications.append(f"Dropped columns: {', '.join(columns_to_drop)}")
-
-        # Set index if specified
+            steps.append(
+                {"op": "drop", "columns": [col.strip() for col in drop_columns.split(",")]}
+            )
         if set_index:
-            if set_index not in self.df.columns:
-                return {
-                    "status": "error",
-                    "message": f"Column '{set_index}' not found for setting as index.",
-                }
-
-            self.df = self.df.set_index(set_index)
-            modifications.append(f"Set '{set_index}' as index")
-
-        # Convert datetime columns if specified
+            steps.append({"op": "set_index", "column": set_index})
         if datetime_columns:
-            dt_columns = [col.strip() for col in datetime_columns.split(",")]
-            invalid_columns = [col for col in dt_columns if col not in self.df.columns]
-            if invalid_columns:
-                return {
-                    "status": "error",
-                    "message": f"Columns not found for datetime conversion: {', '.join(invalid_columns)}",
-                }
-
-            try:
-                for col in dt_columns:
-                    if datetime_format:
-                        self.df[col] = pd.to_datetime(
-                            self.df[col], format=datetime_format
-                        )
-                    else:
-                        self.df[col] = pd.to_datetime(self.df[col])
-                modifications.append(
-                    f"Converted columns to datetime: {', '.join(dt_columns)}"
-                )
-            except Exception as e:
-                return {
-                    "status": "error",
-                    "message": f"Error converting to datetime: {str(e)}",
+            steps.append(
+                {
+                    "op": "to_datetime",
+                    "columns": [col.strip() for col in datetime_columns.split(",")],
+                    "format": datetime_format,
                 }
-
-        # Fill NA values if specified
+            )
         if fill_na and fill_value:
-            na_columns = [col.strip() for col in fill_na.split(",")]
-            invalid_columns = [col for col in na_columns if col not in self.df.columns]
-            if invalid_columns:
-                return {
-                    "status": "error",
-                    "message": f"Columns not found for NA filling: {', '.join(invalid_columns)}",
-                }
-
-            try:
-                for col in na_columns:
-                    if fill_value.lower() == "mean":
-                        if pd.api.types.is_numeric_dtype(self.df[col]):
-                            self.df[col] = self.df[col].fillna(self.df[col].mean())
-                        else:
-                            return {
-                                "status": "error",
-                                "message": f"Cannot use mean to fill non-numeric column: {col}",
-                            }
-                    elif fill_value.lower() == "median":
-                        if pd.api.types.is_numeric_dtype(self.df[col]):
-                            self.df[col] = self.df[col].fillna(self.df[col].median())
-                        else:
-                            return {
-                                "status": "error",
-                                "message": f"Cannot use median to fill non-numeric column: {col}",
-                            }
-                    elif fill_value.lower() == "mode":
-                        # Mode returns a Series, so we get the first value
-                        self.df[col] = self.df[col].fillna(self.df[col].mode()[0])
-                    else:
-                        # Use the specified value
-                        self.df[col] = self.df[col].fillna(fill_value)
-
-                modifications.append(
-                    f"Filled NA values in columns: {', '.join(na_columns)}"
-                )
-            except Exception as e:
-                return {
-                    "status": "error",
-                    "message": f"Error filling NA values: {str(e)}",
+            steps.append(
+                {
+                    "op": "fillna",
+                    "columns": [col.strip() for col in fill_na.split(",")],
+                    "value": fill_value,
                 }
+            )
 
-        if not modifications:
+        if not steps:
             return {"status": "warning", "message": "No modifications were specified."}
 
+        try:
+            self.df, plan = self._pipeline().apply(self.df, steps)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
+        except Exception as e:
+            return {"status": "error", "message": f"Error modifying dataset: {str(e)}"}
+
         # Return success with summary of changes
         return {
             "status": "success",
-            "message": "; ".join(modifications),
+            "message": "; ".join(plan.messages),
             "shape": list(self.df.shape),
         }
 
+    @_in_session_workspace
     def encode_categorical_columns(
         self,
         columns: Optional[str] = None,
         method: Optional[str] = None,
         drop_original: Optional[bool] = None,
         max_categories: Optional[int] = None,
+        tool_context: Optional[ToolContext] = None,
     ) -> dict:
         """Encode categorical columns to numerical format for machine learning and visualization.
 
@@ -882,6 +1525,7 @@ class DataScienceTools:
             method (str, optional): Encoding method to use - 'one-hot', 'label', or 'ordinal'. Default is 'one-hot' if None or empty string is provided.
             drop_original (bool, optional): Whether to drop the original categorical columns after encoding. Default is True if None or empty string is provided.
             max_categories (int, optional): Maximum number of categories to one-hot encode (to avoid creating too many columns). Default is 10 if None or empty string is provided.
+            tool_context (ToolContext, optional): Provided by ADK; selects the session's workspace.
 
         Returns:
             dict: {
@@ -928,107 +1572,160 @@ class DataScienceTools:
                 "message": "No categorical columns found to encode.",
             }
 
-        encoded_columns = []
-        method = method.lower()
-
+        step = {
+            "op": "encode",
+            "columns": columns_list,
+            "method": method.lower(),
+            "drop_original": bool(drop_original),
+            "max_categories": int(max_categories),
+        }
         try:
-            if method == "one-hot":
-                for col in columns_list:
-                    # Check the number of unique values
-                    unique_values = self.df[col].nunique()
-                    if pd.isna(self.df[col]).any():  # Account for NA values
-                        unique_values += 1
-
-                    if unique_values > max_categories:
-                        return {
-                            "status": "error",
-                            "message": f"Column '{col}' has {unique_values} categories, which exceeds the maximum of {max_categories} for one-hot encoding. Use 'label' or 'ordinal' encoding instead, or increase max_categories.",
-                        }
-
-                    # Apply one-hot encoding
-                    dummies = pd.get_dummies(
-                        self.df[col], prefix=col, dummy_na=pd.isna(self.df[col]).any()
-                    )
-                    self.df = pd.concat([self.df, dummies], axis=1)
-                    encoded_columns.extend(dummies.columns.tolist())
+            self.df, plan = self._pipeline().apply(self.df, [step])
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
+        except Exception as e:
+            return {"status": "error", "message": f"Error during encoding: {str(e)}"}
 
-                # Drop original columns if requested
-                if drop_original:
-                    self.df = self.df.drop(columns=columns_list)
+        return {
+            "status": "success",
+            "message": plan.messages[0],
+            "encoded_columns": plan.encoded_columns,
+            "original_columns": columns_list,
+            "shape": list(self.df.shape),
+        }
 
-                return {
-                    "status": "success",
-                    "message": f"One-hot encoded {len(columns_list)} columns into {len(encoded_columns)} binary columns",
-                    "encoded_columns": encoded_columns,
-                    "original_columns": columns_list,
-                    "shape": list(self.df.shape),
-                }
+    @_in_session_workspace
+    def get_transformation_pipeline(
+        self, tool_context: Optional[ToolContext] = None
+    ) -> dict:
+        """Return the transformations applied to the dataset since it was loaded.
 
-            elif method == "label":
-                from sklearn.preprocessing import LabelEncoder
+        Args:
+            tool_context (ToolContext, optional): Provided by ADK; selects the session's workspace.
 
-                for col in columns_list:
-                    # Create a new column name for the encoded version
-                    new_col_name = f"{col}_encoded"
+        Returns:
+            dict: {
+                'status': 'success' or 'error',
+                'source': file the dataset was loaded from,
+                'batches': the steps of each modify_dataset or encode_categorical_columns call, in order,
+                'steps': total number of steps
+            }
+        """
+        if self.df is None:
+            return {"status": "error", "message": "No DataFrame loaded."}
 
-                    # Handle NaN values by creating a copy of the column
-                    col_data = self.df[col].copy()
-                    nan_mask = col_data.isna()
+        pipeline = self._pipeline()
+        return {
+            "status": "success",
+            "source": (pipeline.source or {}).get("file_path"),
+            "batches": pipeline.batches,
+            "steps": len(pipeline.steps),
+        }
 
-                    # Apply label encoding (0,1,2,...)
-                    le = LabelEncoder()
-                    col_data_filled = col_data.fillna(
-                        "_NaN_"
-                    )  # Temporary fill for encoding
-                    self.df[new_col_name] = le.fit_transform(col_data_filled)
+    @_in_session_workspace
+    def undo_transformation(
+        self, count: Optional[int] = None, tool_context: Optional[ToolContext] = None
+    ) -> dict:
+        """Undo the last modify_dataset or encode_categorical_columns calls.
 
-                    # Restore NaN values
-                    self.df.loc[nan_mask, new_col_name] = np.nan
+        Args:
+            count (int, optional): Number of calls to undo. Default is 1 if None or empty string is provided.
+            tool_context (ToolContext, optional): Provided by ADK; selects the session's workspace.
 
-                    encoded_columns.append(new_col_name)
+        Returns:
+            dict: {
+                'status': 'success' or 'error',
+                'message': description of what was undone,
+                'remaining_steps': number of steps still applied,
+                'shape': shape of the dataset after undoing
+            }
+        """
+        if self.df is None:
+            return {"status": "error", "message": "No DataFrame loaded."}
 
-                # Drop original columns if requested
-                if drop_original:
-                    self.df = self.df.drop(columns=columns_list)
+        if count is None or count == "":
+            count = 1
+        pipeline = self._pipeline()
+        count = min(int(count), len(pipeline.batches))
+        if count < 1:
+            return {"status": "error", "message": "No transformations to undo."}
 
-                return {
-                    "status": "success",
-                    "message": f"Label encoded {len(columns_list)} columns",
-                    "encoded_columns": encoded_columns,
-                    "original_columns": columns_list,
-                    "shape": list(self.df.shape),
-                }
+        try:
+            df = pipeline.undo(count)
+            if df is None:
+                # The checkpoints were dropped when the workspace was spilled
+                source = pipeline.source
+                df, _ = self._load(
+                    source["file_path"], source["options"], source["max_workers"]
+                )
+                df = pipeline.rebuild(df)
+        except Exception as e:
+            return {"status": "error", "message": f"Error undoing transformations: {str(e)}"}
 
-            elif method == "ordinal":
-                for col in columns_list:
-                    # Create a new column name for the encoded version
-                    new_col_name = f"{col}_ordinal"
+        self.df = df
+        return {
+            "status": "success",
+            "message": f"Undid {count} transformation call(s)",
+            "remaining_steps": len(pipeline.steps),
+            "shape": list(self.df.shape),
+        }
 
-                    # Get the sorted unique values (excluding NaN)
-                    unique_vals = sorted([x for x in self.df[col].dropna().unique()])
-                    # Create a mapping dictionary
-                    val_map = {val: i for i, val in enumerate(unique_vals)}
+    @_in_session_workspace
+    def replay_transformations(
+        self, file_path: str, tool_context: Optional[ToolContext] = None
+    ) -> dict:
+        """Load another file and apply all transformations recorded on the current dataset to it.
 
-                    # Apply the mapping
-                    self.df[new_col_name] = self.df[col].map(val_map)
-                    encoded_columns.append(new_col_name)
+        The file is loaded with the options of the current dataset, and the recorded
+        steps are applied in one pass, so a cleaning pipeline built on one export can
+        be run on the next one with a single call.
 
-                # Drop original columns if requested
-                if drop_original:
-                    self.df = self.df.drop(columns=columns_list)
+        Args:
+            file_path (str): Local path or GCS URI of the file, or a glob pattern, directory or GCS prefix
+                             naming several files, as for load_csv.
+            tool_context (ToolContext, optional): Provided by ADK; selects the session's workspace.
 
-                return {
-                    "status": "success",
-                    "message": f"Ordinal encoded {len(columns_list)} columns",
-                    "encoded_columns": encoded_columns,
-                    "original_columns": columns_list,
-                    "shape": list(self.df.shape),
-                }
-            else:
-                return {
-                    "status": "error",
-                    "message": f"Unknown encoding method '{method}'. Use 'one-hot', 'label', or 'ordinal'.",
-                }
+        Returns:
+            dict: {
+                'status': 'success' or 'error',
+                'message': description of the steps applied,
+                'steps_applied': number of steps applied,
+                'shape': shape of the transformed dataset,
+                ...: the load summary of load_csv
+            }
+        """
+        if self.df is None:
+            return {"status": "error", "message": "No DataFrame loaded."}
 
+        pipeline = self._pipeline()
+        if not pipeline.batches:
+            return {"status": "error", "message": "No transformations recorded to replay."}
+
+        source = pipeline.source or {}
+        options = source.get("options") or {
+            "drop_unnamed_index": True,
+            "optimize_dtypes": None,
+            "chunk_rows": None,
+            "use_cache": True,
+            "stream_gcs": None,
+            "kwargs": {},
+        }
+        max_workers = source.get("max_workers")
+        try:
+            df, result = self._load(file_path, options, max_workers)
+            # Nothing changes if a step does not apply to the new file
+            self.df, plan = pipeline.replay(
+                df, {"file_path": file_path, "options": options, "max_workers": max_workers}
+            )
         except Exception as e:
-            return {"status": "error", "message": f"Error during encoding: {str(e)}"}
+            return {"status": "error", "message": str(e)}
+
+        result.update(
+            {
+                "status": "success",
+                "message": "; ".join(plan.messages),
+                "steps_applied": len(pipeline.steps),
+                "shape": list(self.df.shape),
+            }
+        )
+        return result
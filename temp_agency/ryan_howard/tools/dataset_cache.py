@@ -0,0 +1,171 @@
+"""
+Content-addressed cache of loaded datasets in the Arrow IPC (Feather) format.
+
+A dataset is keyed by the SHA-256 of its source file and the options it was parsed
+with, so the same file loaded the same way in any session maps to the same entry,
+and an edited file never hits a stale one. Entries are written uncompressed, which
+lets them be memory-mapped instead of parsed when they are loaded again. The hashes
+of source files are remembered by path, size and modification time, so an
+unchanged file is hashed only once.
+
+The cache is kept under a size cap by removing the least recently used entries.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+
+# Schema metadata key holding the load summary stored with a dataset
+_INFO_KEY = b"ryan_howard.load_info"
+_SOURCES_FILE = "sources.json"
+_HASH_BLOCK_BYTES = 8 * 1024 * 1024
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """
+    Size-capped cache of parsed datasets keyed by source content and parse options.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 5 * 1024**3):
+        """
+        Args:
+            cache_dir (str, optional): Directory of the cache. Defaults to a directory
+                in the system temp directory.
+            max_bytes (int): Total size the cached datasets are kept under.
+        """
+        self.cache_dir = cache_dir or os.path.join(
+            tempfile.gettempdir(), "ryan_howard_datasets"
+        )
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sources: Optional[Dict[str, Any]] = None
+
+    def key(
+        self, source: str, options: Dict[str, Any], content_id: Optional[str] = None
+    ) -> str:
+        """
+        Return the cache key of a source parsed with the given options.
+
+        Args:
+            source (str): Path of the source file, which is identified by its hash.
+            options (Dict[str, Any]): The options the source is parsed with.
+            content_id (str, optional): Identifies the content of a source that is
+                not a local file, such as a GCS object and its generation.
+        """
+        options_json = json.dumps(options, sort_keys=True, default=repr)
+        source_id = content_id or self._source_hash(source)
+        digest = hashlib.sha256(source_id.encode("utf-8"))
+        digest.update(options_json.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+        """
+        Load a cached dataset by memory-mapping its file.
+
+        Returns:
+            Optional[Tuple[pd.DataFrame, Dict[str, Any]]]: The DataFrame and the load
+            summary stored with it, or None if the key is not cached.
+        """
+        path = self._entry_path(key)
+        try:
+            table = feather.read_table(path, memory_map=True)
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+        # Mark as recently used for eviction
+        os.utime(path)
+        metadata = table.schema.metadata or {}
+        info = json.loads(metadata.get(_INFO_KEY, b"{}"))
+        return table.to_pandas(), info
+
+    def put(self, key: str, df: pd.DataFrame, info: Dict[str, Any]) -> None:
+        """
+        Store a dataset with its load summary, then evict entries over the size cap.
+        """
+        table = pa.Table.from_pandas(df)
+        metadata = dict(table.schema.metadata or {})
+        metadata[_INFO_KEY] = json.dumps(info, default=str).encode("utf-8")
+        table = table.replace_schema_metadata(metadata)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            feather.write_feather(table, tmp_path, compression="uncompressed")
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._evict(keep=path)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.arrow")
+
+    def _source_hash(self, source_path: str) -> str:
+        source_path = os.path.abspath(source_path)
+        stat = os.stat(source_path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        with self._lock:
+            sources = self._load_sources()
+            known = sources.get(source_path)
+            if known and known[:2] == signature:
+                return known[2]
+        content_hash = _file_sha256(source_path)
+        with self._lock:
+            sources = self._load_sources()
+            sources[source_path] = signature + [content_hash]
+            self._save_sources(sources)
+        return content_hash
+
+    def _load_sources(self) -> Dict[str, Any]:
+        if self._sources is None:
+            try:
+                with open(os.path.join(self.cache_dir, _SOURCES_FILE)) as f:
+                    self._sources = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self._sources = {}
+        return self._sources
+
+    def _save_sources(self, sources: Dict[str, Any]) -> None:
+        # Forget files that no longer exist so the index does not grow forever
+        for source_path in [p for p in sources if not os.path.exists(p)]:
+            del sources[source_path]
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, _SOURCES_FILE)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(sources, f)
+        os.replace(tmp_path, path)
+
+    def _evict(self, keep: str) -> None:
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".arrow"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,137 @@
+"""
+Local download cache for Google Cloud Storage objects.
+
+Downloads are stored under a directory per bucket, object and generation, so
+objects with the same name in different buckets never collide, and a cached copy
+is only reused while the object's generation in GCS is unchanged: overwriting the
+object creates a new generation and the next read downloads it again. Each read
+costs one metadata request.
+
+Downloads go to a temporary file that is renamed into place once complete, so a
+failed or concurrent download never leaves a partial file where a cached copy is
+expected. The cache is kept under a size cap by removing the least recently used
+downloads.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from typing import Any, Optional, Tuple
+
+
+def parse_gcs_path(gcs_path: str) -> Tuple[str, str]:
+    """
+    Split a gs://bucket/path URI into the bucket name and the object path.
+    """
+    if not gcs_path.startswith("gs://"):
+        raise ValueError("GCS path must start with gs://")
+    parts = gcs_path[5:].split("/", 1)
+    if len(parts) < 2 or not parts[0] or not parts[1]:
+        raise ValueError(f"GCS path must include a bucket and an object: {gcs_path}")
+    return parts[0], parts[1]
+
+
+class GCSDownloadCache:
+    """
+    Size-capped cache of GCS objects keyed by bucket, object and generation.
+    """
+
+    def __init__(
+        self,
+        client_factory,
+        cache_dir: Optional[str] = None,
+        max_bytes: int = 10 * 1024**3,
+    ):
+        """
+        Args:
+            client_factory (Callable[[], storage.Client]): Returns the client to use.
+            cache_dir (str, optional): Directory of the cache. Defaults to a directory
+                in the system temp directory.
+            max_bytes (int): Total size the downloads are kept under.
+        """
+        self._client_factory = client_factory
+        self.cache_dir = cache_dir or os.path.join(
+            tempfile.gettempdir(), "ryan_howard_gcs"
+        )
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def get_blob(self, gcs_path: str) -> Any:
+        """
+        Return the current generation of an object, with its metadata.
+
+        Raises:
+            FileNotFoundError: If the object does not exist.
+        """
+        bucket_name, blob_path = parse_gcs_path(gcs_path)
+        blob = self._client_factory().bucket(bucket_name).get_blob(blob_path)
+        if blob is None:
+            raise FileNotFoundError(f"Object not found: {gcs_path}")
+        return blob
+
+    def fetch(self, gcs_path: str) -> Tuple[str, bool, Any]:
+        """
+        Return a local copy of the current generation of an object.
+
+        Args:
+            gcs_path (str): gs://bucket/path URI of the object.
+
+        Returns:
+            Tuple[str, bool, Any]: The local path, whether it was already cached,
+            and the generation of the object.
+        """
+        bucket_name, blob_path = parse_gcs_path(gcs_path)
+        blob = self.get_blob(gcs_path)
+
+        object_key = hashlib.sha256(f"{bucket_name}/{blob_path}".encode("utf-8")).hexdigest()
+        entry_dir = os.path.join(self.cache_dir, f"{object_key}-{blob.generation}")
+        local_path = os.path.join(entry_dir, os.path.basename(blob_path) or "object")
+        if os.path.isfile(local_path) and (
+            blob.size is None or os.path.getsize(local_path) == blob.size
+        ):
+            # Mark as recently used for eviction
+            os.utime(local_path)
+            return local_path, True, blob.generation
+
+        os.makedirs(entry_dir, exist_ok=True)
+        tmp_path = f"{local_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            # Fails rather than mixing in a newer generation written meanwhile
+            blob.download_to_filename(tmp_path, if_generation_match=blob.generation)
+            os.replace(tmp_path, local_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        with self._lock:
+            self._remove_other_generations(object_key, entry_dir)
+            self._evict(keep=entry_dir)
+        return local_path, False, blob.generation
+
+    def _remove_other_generations(self, object_key: str, keep: str) -> None:
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.startswith(f"{object_key}-") and entry.path != keep:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    def _evict(self, keep: str) -> None:
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_dir():
+                continue
+            files = list(os.scandir(entry.path))
+            complete = [f for f in files if not f.name.endswith(".tmp")]
+            if complete:
+                stat = complete[0].stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+            elif not files and entry.path != keep:
+                # Left behind by a failed download
+                shutil.rmtree(entry.path, ignore_errors=True)
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
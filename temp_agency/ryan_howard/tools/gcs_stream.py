@@ -0,0 +1,144 @@
+"""
+Streaming reads of GCS objects straight into the CSV parser.
+
+The object is read in blocks by a background thread that stays a few blocks ahead
+of the parser, so the download and the parsing overlap and nothing is written to
+disk. gzip and zstd compressed objects (detected from their first bytes) are
+decompressed on the fly; zstd needs the optional `zstandard` package.
+"""
+
+import gzip
+import io
+import queue
+import threading
+from typing import Any, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+BLOCK_BYTES = 8 * 1024 * 1024
+PREFETCH_BLOCKS = 4
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class PrefetchingReader(io.RawIOBase):
+    """
+    Read-only stream that reads blocks of another stream in a background thread,
+    holding at most `prefetch_blocks` blocks that have not been consumed yet.
+    """
+
+    def __init__(
+        self, raw: Any, block_bytes: int = BLOCK_BYTES, prefetch_blocks: int = PREFETCH_BLOCKS
+    ):
+        super().__init__()
+        self.bytes_read = 0
+        self._block_bytes = block_bytes
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=prefetch_blocks)
+        self._stop = threading.Event()
+        self._buffer = memoryview(b"")
+        self._done = False
+        self._thread = threading.Thread(target=self._fill, args=(raw,), daemon=True)
+        self._thread.start()
+
+    def _fill(self, raw: Any) -> None:
+        try:
+            while not self._stop.is_set():
+                block = raw.read(self._block_bytes)
+                self._put(block)
+                if not block:
+                    break
+        except Exception as e:
+            self._put(e)
+        finally:
+            raw.close()
+
+    def _put(self, item: Any) -> None:
+        # Give up once the reader is closed, instead of blocking on a full queue
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer:
+            if self._done:
+                return 0
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                raise item
+            if not item:
+                self._done = True
+                return 0
+            self.bytes_read += len(item)
+            self._buffer = memoryview(item)
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+    def close(self) -> None:
+        self._stop.set()
+        super().close()
+
+
+def _decompressed(stream: io.BufferedReader) -> Tuple[Optional[str], Any]:
+    magic = stream.peek(4)[:4]
+    if magic.startswith(_GZIP_MAGIC):
+        return "gzip", gzip.GzipFile(fileobj=stream, mode="rb")
+    if magic.startswith(_ZSTD_MAGIC):
+        if zstandard is None:
+            raise ValueError(
+                "The object is zstd compressed; install the zstandard package to read it."
+            )
+        return "zstd", zstandard.ZstdDecompressor().stream_reader(stream)
+    return None, stream
+
+
+class BlobStream:
+    """
+    Decompressed, prefetched byte stream of a GCS object, to be used as a context
+    manager. `file` is the stream to read from.
+    """
+
+    def __init__(
+        self, blob: Any, block_bytes: int = BLOCK_BYTES, prefetch_blocks: int = PREFETCH_BLOCKS
+    ):
+        """
+        Args:
+            blob (storage.Blob): The object, as returned by `Bucket.get_blob`, so the
+                stream is pinned to its generation.
+            block_bytes (int): Size of the blocks read from GCS.
+            prefetch_blocks (int): Number of blocks read ahead of the parser.
+        """
+        # The stored bytes, so objects uploaded with gzip content encoding are
+        # decompressed here rather than by GCS
+        raw = blob.open("rb", chunk_size=block_bytes, raw_download=True)
+        self._reader = PrefetchingReader(raw, block_bytes, prefetch_blocks)
+        self.compression, self.file = _decompressed(
+            io.BufferedReader(self._reader, buffer_size=block_bytes)
+        )
+
+    @property
+    def bytes_read(self) -> int:
+        """Number of bytes read from GCS so far."""
+        return self._reader.bytes_read
+
+    def close(self) -> None:
+        self.file.close()
+        self._reader.close()
+
+    def __enter__(self) -> "BlobStream":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
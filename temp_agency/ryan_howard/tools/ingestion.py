@@ -0,0 +1,228 @@
+"""
+Chunked, dtype-optimized CSV ingestion for files too large to parse in one go.
+
+The file is read in chunks of a fixed number of rows. A sample from the top of the
+first chunk decides how each column is stored: integers are downcast to the
+smallest type that holds their values, low-cardinality strings become
+categoricals and date columns are parsed with the format guessed once from the
+sample. Floats keep their precision, since float32 would round them. A date column
+with a value of a later chunk that does not match the format is kept as text, as
+it would have been had the value been in the sample. Each chunk is compacted
+before the next one is read, so the memory needed besides the result is bounded
+by the chunk size rather than by the file size. The file is read only once, so it
+can also be a stream, such as a download in progress.
+"""
+
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+from pandas.tseries.api import guess_datetime_format
+
+
+# Files at least this large are read in chunks unless the caller decides otherwise
+STREAMING_THRESHOLD_BYTES = 100 * 1024 * 1024
+
+DEFAULT_CHUNK_ROWS = 100_000
+SAMPLE_ROWS = 10_000
+
+# Strings with at most this ratio of distinct to non-null values in the sample are
+# stored as categoricals
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
+def should_stream(local_path: str) -> bool:
+    """
+    Whether a file is large enough to be read in chunks by default.
+    """
+    try:
+        return os.path.getsize(local_path) >= STREAMING_THRESHOLD_BYTES
+    except OSError:
+        return False
+
+
+def _is_text(series: pd.Series) -> bool:
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+
+def infer_column_plan(
+    sample: pd.DataFrame, skip: Optional[List[str]] = None
+) -> Dict[str, Tuple[str, Optional[str]]]:
+    """
+    Decide how each column of a sample is stored.
+
+    Args:
+        sample (pd.DataFrame): Rows from the top of the file, read with default dtypes.
+        skip (List[str], optional): Columns whose dtype the caller has chosen.
+
+    Returns:
+        Dict[str, Tuple[str, Optional[str]]]: {column: (kind, date format)}, where kind
+        is "integer", "category" or "datetime". Columns that are left as read are
+        omitted.
+    """
+    skip = set(skip or [])
+    plan: Dict[str, Tuple[str, Optional[str]]] = {}
+    for column in sample.columns:
+        if column in skip:
+            continue
+        values = sample[column]
+        if pd.api.types.is_bool_dtype(values):
+            continue
+        if pd.api.types.is_integer_dtype(values):
+            plan[column] = ("integer", None)
+        elif _is_text(values):
+            non_null = values.dropna()
+            if non_null.empty:
+                continue
+            date_format = guess_datetime_format(str(non_null.iloc[0]))
+            if date_format and not pd.to_datetime(
+                non_null, format=date_format, errors="coerce"
+            ).isna().any():
+                plan[column] = ("datetime", date_format)
+            elif non_null.nunique() <= CATEGORY_MAX_UNIQUE_RATIO * len(non_null):
+                plan[column] = ("category", None)
+    return plan
+
+
+def compact_chunk(
+    chunk: pd.DataFrame, plan: Dict[str, Tuple[str, Optional[str]]]
+) -> pd.DataFrame:
+    """
+    Convert the columns of a chunk to the compact dtypes of the plan.
+
+    A date column whose values do not all match the planned format is left as text
+    and removed from the plan, so later chunks leave it as text too.
+    """
+    for column, (kind, date_format) in list(plan.items()):
+        if column not in chunk.columns:
+            continue
+        values = chunk[column]
+        if kind == "integer":
+            # Integer columns with missing values in this chunk are read as floats,
+            # which are kept as they are
+            if pd.api.types.is_integer_dtype(values):
+                chunk[column] = pd.to_numeric(values, downcast="integer")
+        elif kind == "category":
+            chunk[column] = values.astype("category")
+        elif kind == "datetime":
+            try:
+                chunk[column] = pd.to_datetime(values, format=date_format)
+            except (ValueError, TypeError):
+                del plan[column]
+    return chunk
+
+
+def _restore_text(
+    chunks: List[pd.DataFrame], columns: Dict[str, Optional[str]]
+) -> None:
+    """
+    Format the dates of columns that turned out not to be date columns back into
+    text with the format they were parsed with.
+    """
+    for chunk in chunks:
+        for column, date_format in columns.items():
+            if pd.api.types.is_datetime64_any_dtype(chunk[column]):
+                chunk[column] = chunk[column].dt.strftime(date_format)
+
+
+def combine_frames(
+    chunks: List[pd.DataFrame], ignore_index: bool = False
+) -> pd.DataFrame:
+    """
+    Concatenate frames with the same columns column by column, releasing each
+    column of the frames once it is copied. Categoricals are combined over the
+    union of their categories, numeric columns take the smallest dtype that holds
+    every frame.
+    """
+    if ignore_index:
+        index = pd.RangeIndex(sum(len(chunk) for chunk in chunks))
+    else:
+        index = chunks[0].index.append([chunk.index for chunk in chunks[1:]])
+    columns = {}
+    for column in list(chunks[0].columns):
+        parts = [chunk.pop(column) for chunk in chunks]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            columns[column] = union_categoricals(parts)
+        else:
+            columns[column] = pd.concat(parts, ignore_index=True).array
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def read_csv_chunked(
+    source: Any, chunk_rows: Optional[int] = None, **kwargs: Any
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Read a CSV file in chunks, storing every column in a compact dtype.
+
+    Args:
+        source (Any): Path to the CSV file, or a readable binary or text stream.
+        chunk_rows (int, optional): Number of rows per chunk. Defaults to 100,000.
+        **kwargs: Additional arguments passed to `pd.read_csv`. Columns given a dtype
+            or listed in parse_dates are read as requested.
+
+    Returns:
+        Tuple[pd.DataFrame, Dict[str, Any]]: The DataFrame and a memory report with
+        the dtype and memory of every column as read by default and as stored.
+    """
+    chunk_rows = int(chunk_rows or DEFAULT_CHUNK_ROWS)
+    kwargs = {k: v for k, v in kwargs.items() if k not in ("chunksize", "iterator")}
+    dtype = kwargs.get("dtype")
+    infer = dtype is None or isinstance(dtype, dict)
+    skip = list(dtype or []) if infer else []
+    if isinstance(kwargs.get("parse_dates"), list):
+        skip.extend(kwargs["parse_dates"])
+
+    plan: Optional[Dict[str, Tuple[str, Optional[str]]]] = None
+    chunks: List[pd.DataFrame] = []
+    default_dtypes: Dict[str, str] = {}
+    default_bytes: Dict[str, int] = {}
+    dates: Dict[str, Optional[str]] = {}
+    for chunk in pd.read_csv(source, chunksize=chunk_rows, **kwargs):
+        if plan is None:
+            plan = infer_column_plan(chunk.head(SAMPLE_ROWS), skip) if infer else {}
+            dates = {
+                column: date_format
+                for column, (kind, date_format) in plan.items()
+                if kind == "datetime"
+            }
+        for column, nbytes in chunk.memory_usage(deep=True, index=False).items():
+            default_bytes[column] = default_bytes.get(column, 0) + int(nbytes)
+            # Integers become floats in the result once any chunk has missing values
+            if default_dtypes.get(column) in (None, "int64"):
+                default_dtypes[column] = str(chunk[column].dtype)
+        chunks.append(compact_chunk(chunk, plan))
+
+    if not chunks:
+        return pd.DataFrame(), {"chunks": 0, "columns": {}}
+    kept_as_text = {column: fmt for column, fmt in dates.items() if column not in plan}
+    _restore_text(chunks, kept_as_text)
+    n_chunks = len(chunks)
+    df = combine_frames(chunks)
+
+    optimized_bytes = df.memory_usage(deep=True, index=False)
+    columns = {
+        str(column): {
+            "default_dtype": default_dtypes[column],
+            "dtype": str(df[column].dtype),
+            "default_bytes": default_bytes[column],
+            "bytes": int(optimized_bytes[column]),
+            "saved_bytes": default_bytes[column] - int(optimized_bytes[column]),
+        }
+        for column in df.columns
+    }
+    total_default = sum(default_bytes.values())
+    total = int(optimized_bytes.sum())
+    report = {
+        "chunks": n_chunks,
+        "chunk_rows": chunk_rows,
+        "default_bytes": total_default,
+        "bytes": total,
+        "saved_bytes": total_default - total,
+        "saved_percent": round(100 * (1 - total / total_default), 1) if total_default else 0.0,
+        "columns": columns,
+    }
+    if kept_as_text:
+        # Dates of the sample whose format some later value did not match
+        report["kept_as_text"] = [str(column) for column in kept_as_text]
+    return df, report
@@ -0,0 +1,131 @@
+"""
+Datasets sharded over several CSV files.
+
+A path names several files when it contains a glob pattern (`*`, `?` or `[`), is a
+local directory, or is a gs:// prefix ending with `/`. Directories and prefixes
+take the CSV files directly in them (including gzip and zstd compressed ones);
+patterns take every file they match, with `*` also matching `/` on GCS.
+
+The shards of a dataset must have the same columns. Their dtypes may differ: the
+combined column takes the type that holds all shards (categoricals are combined
+over the union of their categories), and columns whose shards mix numbers and text
+are reported.
+"""
+
+import fnmatch
+import glob
+import os
+from typing import Any, Dict, List, Sequence, Tuple
+
+import pandas as pd
+
+from ryan_howard.tools.ingestion import combine_frames
+
+
+CSV_SUFFIXES = (".csv", ".csv.gz", ".csv.zst", ".tsv", ".tsv.gz", ".txt")
+MAX_SHARDS = 1000
+
+_GLOB_CHARS = ("*", "?", "[")
+
+
+def is_multi_file(path: str) -> bool:
+    """
+    Whether a path names several files rather than one.
+    """
+    if any(char in path for char in _GLOB_CHARS):
+        return True
+    if path.startswith("gs://"):
+        return path.endswith("/")
+    return os.path.isdir(path)
+
+
+def _limit(paths: List[str], path: str) -> List[str]:
+    if not paths:
+        raise FileNotFoundError(f"No files match {path}")
+    if len(paths) > MAX_SHARDS:
+        raise ValueError(
+            f"{path} matches {len(paths)} files; at most {MAX_SHARDS} can be loaded at once."
+        )
+    return paths
+
+
+def expand_local(path: str) -> List[str]:
+    """
+    Return the files a local directory or glob pattern names, sorted by name.
+    """
+    if os.path.isdir(path):
+        paths = [
+            entry.path
+            for entry in os.scandir(path)
+            if entry.is_file() and entry.name.lower().endswith(CSV_SUFFIXES)
+        ]
+    else:
+        paths = [p for p in glob.glob(path, recursive=True) if os.path.isfile(p)]
+    return _limit(sorted(paths), path)
+
+
+def expand_gcs(client: Any, path: str) -> List[str]:
+    """
+    Return the gs:// URIs of the objects a prefix or glob pattern names, sorted by name.
+    """
+    bucket_name, _, pattern = path[5:].partition("/")
+    if not bucket_name:
+        raise ValueError(f"GCS path must include a bucket: {path}")
+    cut = min([pattern.index(c) for c in _GLOB_CHARS if c in pattern] or [len(pattern)])
+    prefix = pattern[:cut]
+    names = []
+    for blob in client.list_blobs(bucket_name, prefix=prefix):
+        name = blob.name
+        if name.endswith("/"):
+            continue
+        if cut < len(pattern):
+            if fnmatch.fnmatchcase(name, pattern):
+                names.append(name)
+        elif "/" not in name[len(prefix):] and name.lower().endswith(CSV_SUFFIXES):
+            names.append(name)
+    return _limit([f"gs://{bucket_name}/{name}" for name in sorted(names)], path)
+
+
+def combine_shards(
+    frames: Sequence[pd.DataFrame], paths: Sequence[str], ignore_index: bool = True
+) -> Tuple[pd.DataFrame, Dict[str, List[str]]]:
+    """
+    Check that the shards have the same columns and concatenate them.
+
+    Args:
+        frames (Sequence[pd.DataFrame]): The shards, in order. Their columns are
+            released as they are copied.
+        paths (Sequence[str]): The file of each shard, for error messages.
+        ignore_index (bool): Number the rows of the result from 0 instead of keeping
+            the index of each shard.
+
+    Returns:
+        Tuple[pd.DataFrame, Dict[str, List[str]]]: The combined DataFrame, and the
+        columns whose shards mix numeric and non-numeric dtypes with the dtypes found.
+
+    Raises:
+        ValueError: If a shard's columns differ from the first shard's.
+    """
+    expected = list(frames[0].columns)
+    for frame, path in zip(frames[1:], paths[1:]):
+        columns = list(frame.columns)
+        if columns == expected:
+            continue
+        missing = [c for c in expected if c not in columns]
+        extra = [c for c in columns if c not in expected]
+        if missing or extra:
+            raise ValueError(
+                f"{path} does not have the columns of {paths[0]}: "
+                f"missing {missing}, unexpected {extra}"
+            )
+    frames = [
+        frame if list(frame.columns) == expected else frame[expected] for frame in frames
+    ]
+
+    mixed = {}
+    for column in expected:
+        dtypes = [frame[column].dtype for frame in frames]
+        numeric = {pd.api.types.is_numeric_dtype(dtype) for dtype in dtypes}
+        if len(numeric) > 1:
+            mixed[str(column)] = sorted({str(dtype) for dtype in dtypes})
+    return combine_frames(frames, ignore_index=ignore_index), mixed
@@ -0,0 +1,360 @@
+"""
+Recorded, replayable pipeline of the transformations applied to a session's dataset.
+
+`modify_dataset` and `encode_categorical_columns` do not change the DataFrame step
+by step. Each call becomes a batch of steps (drop, set_index, to_datetime, fillna,
+encode) that runs in one fused pass: the steps are applied to the columns they
+touch, and the result is assembled once from those columns and the untouched
+columns of the input, which pandas' copy-on-write shares instead of copying. A
+batch either applies completely or not at all.
+
+The batches are recorded, so they can be undone and replayed on another file.
+The frame after recent batches is kept as a checkpoint; since checkpoints share
+the unchanged columns, they cost only the memory of the columns a batch replaced,
+which `TransformPipeline.nbytes_beyond` reports to the workspace's memory budget.
+Checkpoints are not written when a workspace is spilled to disk; undoing then
+replays the batches from the reloaded source.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Checkpoints kept besides the loaded dataset itself
+MAX_CHECKPOINTS = 5
+
+
+class _Plan:
+    """
+    Applies steps to a view of a DataFrame's columns and builds the result once.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.columns = list(df.columns)
+        self.values: Dict[Any, pd.Series] = {}
+        self.index: Optional[pd.Series] = None
+        self.messages: List[str] = []
+        self.encoded_columns: List[Any] = []
+
+    def get(self, column: Any) -> pd.Series:
+        if column in self.values:
+            return self.values[column]
+        return self.df[column]
+
+    def set(self, column: Any, values: pd.Series) -> None:
+        if column not in self.columns:
+            self.columns.append(column)
+        self.values[column] = values
+
+    def remove(self, columns: List[Any]) -> None:
+        for column in columns:
+            self.columns.remove(column)
+            self.values.pop(column, None)
+
+    def missing(self, columns: List[Any]) -> List[Any]:
+        return [col for col in columns if col not in self.columns]
+
+    def result(self) -> pd.DataFrame:
+        series = [self.get(col).rename(col) for col in self.columns]
+        if series:
+            out = pd.concat(series, axis=1)
+        else:
+            out = pd.DataFrame(index=self.df.index)
+        if self.index is not None:
+            out.index = pd.Index(self.index)
+        return out
+
+
+def _drop(plan: _Plan, step: Dict[str, Any]) -> None:
+    columns = step["columns"]
+    invalid_columns = plan.missing(columns)
+    if invalid_columns:
+        raise ValueError(f"Columns not found: {', '.join(map(str, invalid_columns))}")
+    plan.remove(columns)
+    plan.messages.append(f"Dropped columns: {', '.join(map(str, columns))}")
+
+
+def _set_index(plan: _Plan, step: Dict[str, Any]) -> None:
+    column = step["column"]
+    if column not in plan.columns:
+        raise ValueError(f"Column '{column}' not found for setting as index.")
+    plan.index = plan.get(column)
+    plan.remove([column])
+    plan.messages.append(f"Set '{column}' as index")
+
+
+def _to_datetime(plan: _Plan, step: Dict[str, Any]) -> None:
+    columns = step["columns"]
+    invalid_columns = plan.missing(columns)
+    if invalid_columns:
+        raise ValueError(
+            f"Columns not found for datetime conversion: {', '.join(map(str, invalid_columns))}"
+        )
+    try:
+        for col in columns:
+            plan.set(col, pd.to_datetime(plan.get(col), format=step.get("format")))
+    except Exception as e:
+        raise ValueError(f"Error converting to datetime: {str(e)}") from e
+    plan.messages.append(f"Converted columns to datetime: {', '.join(map(str, columns))}")
+
+
+def _fillna(plan: _Plan, step: Dict[str, Any]) -> None:
+    columns = step["columns"]
+    fill_value = step["value"]
+    invalid_columns = plan.missing(columns)
+    if invalid_columns:
+        raise ValueError(
+            f"Columns not found for NA filling: {', '.join(map(str, invalid_columns))}"
+        )
+    for col in columns:
+        values = plan.get(col)
+        method = fill_value.lower()
+        if method in ("mean", "median"):
+            if not pd.api.types.is_numeric_dtype(values):
+                raise ValueError(f"Cannot use {method} to fill non-numeric column: {col}")
+            fill = values.mean() if method == "mean" else values.median()
+        elif method == "mode":
+            # Mode returns a Series, so we get the first value
+            modes = values.mode()
+            if modes.empty:
+                raise ValueError(f"Cannot use mode to fill column without values: {col}")
+            fill = modes.iloc[0]
+        else:
+            # Use the specified value
+            fill = fill_value
+        try:
+            plan.set(col, values.fillna(fill))
+        except Exception as e:
+            raise ValueError(f"Error filling NA values: {str(e)}") from e
+    plan.messages.append(f"Filled NA values in columns: {', '.join(map(str, columns))}")
+
+
+def _encode(plan: _Plan, step: Dict[str, Any]) -> None:
+    columns = step["columns"]
+    method = step["method"]
+    missing_cols = plan.missing(columns)
+    if missing_cols:
+        raise ValueError(f"Columns not found: {', '.join(map(str, missing_cols))}")
+
+    encoded_columns = []
+    if method == "one-hot":
+        max_categories = step["max_categories"]
+        for col in columns:
+            values = plan.get(col)
+            has_na = bool(values.isna().any())
+            # Account for NA values
+            unique_values = values.nunique() + int(has_na)
+            if unique_values > max_categories:
+                raise ValueError(
+                    f"Column '{col}' has {unique_values} categories, which exceeds the maximum of {max_categories} for one-hot encoding. Use 'label' or 'ordinal' encoding instead, or increase max_categories."
+                )
+            dummies = pd.get_dummies(values, prefix=col, dummy_na=has_na)
+            for dummy in dummies.columns:
+                plan.set(dummy, dummies[dummy])
+            encoded_columns.extend(dummies.columns.tolist())
+        message = f"One-hot encoded {len(columns)} columns into {len(encoded_columns)} binary columns"
+    elif method == "label":
+        from sklearn.preprocessing import LabelEncoder
+
+        for col in columns:
+            new_col_name = f"{col}_encoded"
+            values = plan.get(col)
+            nan_mask = values.isna().to_numpy()
+            # Temporary fill for encoding, NaN is restored afterwards
+            codes = LabelEncoder().fit_transform(values.fillna("_NaN_"))
+            if nan_mask.any():
+                codes = codes.astype(float)
+                codes[nan_mask] = np.nan
+            plan.set(new_col_name, pd.Series(codes, index=values.index))
+            encoded_columns.append(new_col_name)
+        message = f"Label encoded {len(columns)} columns"
+    elif method == "ordinal":
+        for col in columns:
+            new_col_name = f"{col}_ordinal"
+            values = plan.get(col)
+            # Map the sorted unique values (excluding NaN) to 0, 1, 2, ...
+            unique_vals = sorted(values.dropna().unique())
+            val_map = {val: i for i, val in enumerate(unique_vals)}
+            plan.set(new_col_name, values.map(val_map))
+            encoded_columns.append(new_col_name)
+        message = f"Ordinal encoded {len(columns)} columns"
+    else:
+        raise ValueError(
+            f"Unknown encoding method '{method}'. Use 'one-hot', 'label', or 'ordinal'."
+        )
+
+    if step["drop_original"]:
+        plan.remove(columns)
+    plan.encoded_columns.extend(encoded_columns)
+    plan.messages.append(message)
+
+
+def _buffers(values: pd.Series) -> Tuple[Any, ...]:
+    """
+    Identify the memory holding a column's values, which frames that share the
+    column have in common.
+    """
+    array = values.array
+    if isinstance(array.dtype, pd.CategoricalDtype):
+        arrays = [array.codes]
+    elif isinstance(values.dtype, np.dtype):
+        arrays = [values.to_numpy(copy=False)]
+    elif isinstance(array, pd.arrays.ArrowExtensionArray):
+        # Only Arrow-backed arrays, since converting others to Arrow may copy them
+        return tuple(
+            buffer.address
+            for chunk in array.__arrow_array__().chunks
+            for buffer in chunk.buffers()
+            if buffer is not None
+        )
+    else:
+        return (id(array),)
+    return tuple(
+        (a.__array_interface__["data"][0], a.strides, a.shape) for a in arrays
+    )
+
+
+_STEPS = {
+    "drop": _drop,
+    "set_index": _set_index,
+    "to_datetime": _to_datetime,
+    "fillna": _fillna,
+    "encode": _encode,
+}
+
+
+def run_steps(df: pd.DataFrame, steps: List[Dict[str, Any]]) -> Tuple[pd.DataFrame, _Plan]:
+    """
+    Apply steps to a DataFrame in one pass, without modifying it.
+
+    Args:
+        df (pd.DataFrame): The input DataFrame.
+        steps (List[Dict[str, Any]]): Steps, each a dict with an 'op' (drop,
+            set_index, to_datetime, fillna or encode) and its parameters.
+
+    Returns:
+        Tuple[pd.DataFrame, _Plan]: The transformed DataFrame, and the plan with a
+        description of each step in `messages` and the columns created by encoding
+        in `encoded_columns`.
+
+    Raises:
+        ValueError: If a step cannot be applied; no step is applied then.
+    """
+    plan = _Plan(df)
+    for step in steps:
+        _STEPS[step["op"]](plan, step)
+    return plan.result(), plan
+
+
+class TransformPipeline:
+    """
+    The batches of steps applied to a session's dataset since it was loaded, with
+    checkpoints to undo them.
+    """
+
+    def __init__(self, df: Optional[pd.DataFrame] = None, source: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            df (pd.DataFrame, optional): The dataset as loaded.
+            source (Dict[str, Any], optional): How the dataset was loaded: the
+                'file_path' and the load options, to reload it.
+        """
+        self.source = source
+        self.batches: List[List[Dict[str, Any]]] = []
+        # Frame after the first n batches, by n
+        self._checkpoints: Dict[int, pd.DataFrame] = {}
+        if df is not None:
+            self._checkpoints[0] = df
+
+    @property
+    def steps(self) -> List[Dict[str, Any]]:
+        """All recorded steps, in order."""
+        return [step for batch in self.batches for step in batch]
+
+    def apply(
+        self, df: pd.DataFrame, steps: List[Dict[str, Any]]
+    ) -> Tuple[pd.DataFrame, _Plan]:
+        """
+        Apply a batch of steps to the current DataFrame and record it.
+        """
+        result, plan = run_steps(df, steps)
+        self.batches.append(steps)
+        self._checkpoint(result)
+        return result, plan
+
+    def replay(
+        self, df: pd.DataFrame, source: Optional[Dict[str, Any]] = None
+    ) -> Tuple[pd.DataFrame, _Plan]:
+        """
+        Apply all recorded steps to a newly loaded dataset in one pass, and make it
+        the base of the pipeline.
+        """
+        result, plan = run_steps(df, self.steps)
+        self.source = source
+        self._checkpoints = {0: df}
+        self._checkpoint(result)
+        return result, plan
+
+    def undo(self, batches: int = 1) -> Optional[pd.DataFrame]:
+        """
+        Forget the last batches and return the DataFrame without them.
+
+        Returns:
+            Optional[pd.DataFrame]: The DataFrame, or None if no checkpoint is left to
+            rebuild it from; call `rebuild` with the reloaded source then.
+        """
+        batches = min(batches, len(self.batches))
+        del self.batches[len(self.batches) - batches:]
+        for n in [n for n in self._checkpoints if n > len(self.batches)]:
+            del self._checkpoints[n]
+        if not self._checkpoints:
+            return None
+        start = max(self._checkpoints)
+        df = self._checkpoints[start]
+        remaining = [step for batch in self.batches[start:] for step in batch]
+        if remaining:
+            df, _ = run_steps(df, remaining)
+            self._checkpoint(df)
+        return df
+
+    def rebuild(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Apply the recorded steps to the reloaded source of the pipeline.
+        """
+        self._checkpoints = {0: df}
+        if self.batches:
+            df, _ = run_steps(df, self.steps)
+            self._checkpoint(df)
+        return df
+
+    def nbytes_beyond(self, df: Optional[pd.DataFrame]) -> int:
+        """
+        Memory of the checkpoints' columns that the DataFrame does not share.
+        """
+        seen = set()
+        if df is not None:
+            seen.update(_buffers(values) for _, values in df.items())
+        total = 0
+        for checkpoint in self._checkpoints.values():
+            for _, values in checkpoint.items():
+                key = _buffers(values)
+                if key not in seen:
+                    seen.add(key)
+                    total += int(values.memory_usage(deep=True, index=False))
+        return total
+
+    def _checkpoint(self, df: pd.DataFrame) -> None:
+        self._checkpoints[len(self.batches)] = df
+        recent = sorted(n for n in self._checkpoints if n > 0)
+        for n in recent[:-MAX_CHECKPOINTS]:
+            del self._checkpoints[n]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"source": self.source, "batches": self.batches}
+
+    def __setstate__(self, data: Dict[str, Any]) -> None:
+        self.__init__(source=data["source"])
+        self.batches = data["batches"]
@@ -0,0 +1,396 @@
+"""
+Rendering of the plotting tools' figures in a pool of worker processes.
+
+The tools reduce the data to what a figure needs (histogram counts, box plot
+statistics, a correlation matrix, ...) and hand it to one of the render functions
+below, which draws on its own `Figure` with the Agg canvas and returns the PNG
+bytes. Nothing touches pyplot's global state, so renders never interfere with each
+other. They run in worker processes, off the event loop and in parallel across
+sessions, and a render that exceeds the timeout is stopped by restarting the pool.
+
+Scatter plots of more than `SCATTER_MAX_POINTS` rows are reduced before rendering,
+so their render time does not grow with the dataset: numeric axes are binned into
+a `DENSITY_BINS` x `DENSITY_BINS` grid of point counts (or of the mean of a numeric
+color column), and data colored by category is downsampled per category, keeping
+the outliers of each axis.
+"""
+
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import LogNorm
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+
+
+SCATTER_MAX_POINTS = 50000
+DENSITY_BINS = 200
+# Robust z-score (from the median and MAD) beyond which a point is an outlier
+OUTLIER_Z = 3.5
+# Share of a downsampled scatter plot that may be taken by outliers
+OUTLIER_SHARE = 0.02
+# Number of rendered plots remembered by request, so repeated requests are not re-rendered
+PLOT_INDEX_SIZE = 1024
+
+
+def _new_figure(fig_width: float, fig_height: float) -> Figure:
+    fig = Figure(figsize=(fig_width, fig_height))
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _png(fig: Figure) -> bytes:
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def render_histograms(
+    histograms: Sequence[Tuple[str, np.ndarray, np.ndarray]],
+    fig_width: float,
+    fig_height: float,
+) -> bytes:
+    """
+    Draw one histogram per column, three per row.
+
+    Args:
+        histograms: (column, counts, bin edges) of each column.
+    """
+    fig = _new_figure(fig_width, fig_height)
+    n_rows = (len(histograms) + 2) // 3
+    for idx, (column, counts, edges) in enumerate(histograms):
+        ax = fig.add_subplot(n_rows, 3, idx + 1)
+        ax.hist(edges[:-1], bins=edges, weights=counts)
+        ax.grid(True)
+        ax.set_title(column)
+    fig.tight_layout()
+    return _png(fig)
+
+
+def render_scatter(
+    x: np.ndarray,
+    y: np.ndarray,
+    x_label: str,
+    y_label: str,
+    fig_width: float,
+    fig_height: float,
+    color: Optional[np.ndarray] = None,
+    color_label: Optional[str] = None,
+    categories: Optional[List[str]] = None,
+) -> bytes:
+    """
+    Draw a scatter plot, optionally colored by numeric values (with a colorbar) or
+    by category codes into `categories` (with a legend).
+    """
+    fig = _new_figure(fig_width, fig_height)
+    ax = fig.add_subplot()
+    if color is None:
+        ax.scatter(x, y, alpha=0.6)
+    elif categories is not None:
+        palette = np.array([f"C{i % 10}" for i in range(len(categories))] + ["lightgrey"])
+        # Missing categories have code -1 and are drawn in grey
+        ax.scatter(x, y, c=palette[color], alpha=0.6)
+        handles = [
+            Line2D([0], [0], marker="o", color="w", markerfacecolor=f"C{i % 10}", markersize=10)
+            for i in range(len(categories))
+        ]
+        ax.legend(handles, categories, title=color_label, loc="best")
+    else:
+        points = ax.scatter(x, y, c=color, alpha=0.6, cmap="viridis")
+        fig.colorbar(points, ax=ax, label=color_label)
+    ax.set_xlabel(x_label)
+    ax.set_ylabel(y_label)
+    ax.set_title(f"Scatter plot of {y_label} vs {x_label}")
+    ax.grid(True, linestyle="--", alpha=0.7)
+    fig.tight_layout()
+    return _png(fig)
+
+
+def density_grid(
+    x: np.ndarray,
+    y: np.ndarray,
+    color: Optional[np.ndarray] = None,
+    bins: int = DENSITY_BINS,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Bin points into a 2-D grid, skipping those with a missing coordinate or color.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, int]: The number of points in each
+        bin, or the mean color of the points in each bin (NaN where a bin is empty)
+        if `color` is given; the bin edges along x and y; and the number of points
+        binned.
+    """
+    valid = np.isfinite(x) & np.isfinite(y)
+    if color is not None:
+        valid &= np.isfinite(color)
+    x, y = x[valid], y[valid]
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    if color is None:
+        return counts, x_edges, y_edges, int(valid.sum())
+    sums, _, _ = np.histogram2d(x, y, bins=[x_edges, y_edges], weights=color[valid])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    return means, x_edges, y_edges, int(valid.sum())
+
+
+def _robust_z(values: np.ndarray) -> np.ndarray:
+    median = np.nanmedian(values)
+    mad = np.nanmedian(np.abs(values - median))
+    if not np.isfinite(mad) or mad == 0:
+        return np.zeros(len(values))
+    z = np.abs(values - median) / (1.4826 * mad)
+    return np.nan_to_num(z, nan=0.0)
+
+
+def stratified_sample(
+    x: np.ndarray,
+    y: np.ndarray,
+    groups: Optional[np.ndarray],
+    max_points: int = SCATTER_MAX_POINTS,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Choose at most about `max_points` rows to draw in a scatter plot.
+
+    The most extreme outliers of each numeric axis are kept (up to `OUTLIER_SHARE`
+    of the points). The rest are sampled from each group in proportion to its size,
+    with a floor so that small groups stay visible.
+
+    Args:
+        x, y (np.ndarray): Coordinates of the points.
+        groups (np.ndarray, optional): Group code of each point, e.g. category codes.
+        max_points (int): Number of rows to choose.
+        seed (int): Seed of the sampling, so the same data gives the same plot.
+
+    Returns:
+        np.ndarray: Sorted indices of the chosen rows.
+    """
+    rng = np.random.default_rng(seed)
+    z = np.zeros(len(x))
+    for values in (x, y):
+        if np.issubdtype(values.dtype, np.number):
+            z = np.maximum(z, _robust_z(values.astype(float)))
+    outliers = np.flatnonzero(z > OUTLIER_Z)
+    max_outliers = int(max_points * OUTLIER_SHARE)
+    if len(outliers) > max_outliers:
+        outliers = outliers[np.argsort(z[outliers])[len(outliers) - max_outliers:]]
+
+    rest = np.ones(len(x), dtype=bool)
+    rest[outliers] = False
+    rest_idx = np.flatnonzero(rest)
+    budget = max_points - len(outliers)
+    rest_groups = groups[rest_idx] if groups is not None else np.zeros(len(rest_idx), int)
+    codes, sizes = np.unique(rest_groups, return_counts=True)
+    floor = max(1, budget // (4 * len(codes))) if len(codes) else 0
+
+    chosen = [outliers]
+    order = np.argsort(rest_groups, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(sizes)])
+    for i, size in enumerate(sizes):
+        quota = min(size, max(floor, int(budget * size / len(rest_idx))))
+        members = rest_idx[order[starts[i]:starts[i + 1]]]
+        chosen.append(rng.choice(members, quota, replace=False))
+    return np.sort(np.concatenate(chosen))
+
+
+def render_density(
+    grid: np.ndarray,
+    x_edges: np.ndarray,
+    y_edges: np.ndarray,
+    x_label: str,
+    y_label: str,
+    n_points: int,
+    fig_width: float,
+    fig_height: float,
+    color_label: Optional[str] = None,
+) -> bytes:
+    """
+    Draw a grid from `density_grid`: point counts on a log scale, or the mean of
+    the column `color_label` per bin.
+    """
+    fig = _new_figure(fig_width, fig_height)
+    ax = fig.add_subplot()
+    extent = (x_edges[0], x_edges[-1], y_edges[0], y_edges[-1])
+    if color_label is None:
+        image = ax.imshow(
+            np.ma.masked_less_equal(grid.T, 0),
+            origin="lower",
+            extent=extent,
+            aspect="auto",
+            cmap="viridis",
+            norm=LogNorm(),
+            interpolation="nearest",
+        )
+        fig.colorbar(image, ax=ax, label="Points per bin")
+    else:
+        image = ax.imshow(
+            np.ma.masked_invalid(grid.T),
+            origin="lower",
+            extent=extent,
+            aspect="auto",
+            cmap="viridis",
+            interpolation="nearest",
+        )
+        fig.colorbar(image, ax=ax, label=f"Mean {color_label} per bin")
+    ax.set_xlabel(x_label)
+    ax.set_ylabel(y_label)
+    ax.set_title(f"Density of {y_label} vs {x_label} ({n_points:,} points)")
+    ax.grid(True, linestyle="--", alpha=0.3)
+    fig.tight_layout()
+    return _png(fig)
+
+
+def render_heatmap(
+    matrix: np.ndarray, labels: List[str], fig_width: float, fig_height: float
+) -> bytes:
+    """
+    Draw a correlation matrix with its values annotated.
+    """
+    fig = _new_figure(fig_width, fig_height)
+    ax = fig.add_subplot()
+    image = ax.imshow(matrix, cmap="coolwarm", vmin=-1, vmax=1)
+    for i in range(len(labels)):
+        for j in range(len(labels)):
+            value = matrix[i, j]
+            text_color = "white" if np.isfinite(value) and abs(value) > 0.65 else "black"
+            ax.text(
+                j,
+                i,
+                f"{value:.2f}" if np.isfinite(value) else "",
+                ha="center",
+                va="center",
+                color=text_color,
+                fontsize=8,
+            )
+    fig.colorbar(image, ax=ax, label="Correlation Coefficient")
+    ax.set_title("Correlation Matrix Heatmap")
+    ax.set_xticks(range(len(labels)), labels, rotation=45, ha="right")
+    ax.set_yticks(range(len(labels)), labels)
+    fig.tight_layout()
+    return _png(fig)
+
+
+def render_boxplot(
+    stats: List[Dict[str, Any]], fig_width: float, fig_height: float
+) -> bytes:
+    """
+    Draw box plots from precomputed statistics (see `matplotlib.cbook.boxplot_stats`).
+    """
+    fig = _new_figure(fig_width, fig_height)
+    ax = fig.add_subplot()
+    ax.bxp(stats, patch_artist=True)
+    ax.set_title("Box Plot of Selected Columns")
+    ax.tick_params(axis="x", labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
+    ax.grid(True, linestyle="--", alpha=0.7)
+    fig.tight_layout()
+    return _png(fig)
+
+
+def render_pie(
+    labels: List[str], values: List[float], title: str, fig_width: float, fig_height: float
+) -> bytes:
+    """
+    Draw a pie chart with percentage labels.
+    """
+    fig = _new_figure(fig_width, fig_height)
+    ax = fig.add_subplot()
+    ax.pie(
+        values,
+        labels=labels,
+        autopct="%1.1f%%",
+        startangle=90,
+        shadow=True,
+        explode=[0.05] * len(values),  # Slight separation for all slices
+    )
+    ax.axis("equal")  # Equal aspect ratio ensures that pie is drawn as a circle
+    ax.set_title(title)
+    fig.tight_layout()
+    return _png(fig)
+
+
+def plot_request_key(render: Callable[..., bytes], args: Sequence[Any]) -> str:
+    """
+    Return a hash identifying a render: the render function and everything it draws.
+    """
+    digest = hashlib.sha256(f"{render.__module__}.{render.__qualname__}".encode("utf-8"))
+    digest.update(pickle.dumps(tuple(args), protocol=pickle.HIGHEST_PROTOCOL))
+    return digest.hexdigest()
+
+
+class PlotRenderer:
+    """
+    Runs render functions in a pool of worker processes with a timeout per render.
+    """
+
+    def __init__(self, max_workers: int = 2, timeout: float = 60.0):
+        """
+        Args:
+            max_workers (int): Number of worker processes, started on first use.
+            timeout (float): Seconds a render may take before it is stopped.
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Workers are spawned rather than forked, since forking a process
+                # that runs other threads (the server's) can deadlock the child
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    async def render(self, function: Callable[..., bytes], *args: Any) -> bytes:
+        """
+        Run a render function in a worker process and return its PNG bytes.
+
+        Raises:
+            TimeoutError: If the render takes longer than the timeout.
+        """
+        pool = self._executor()
+        future = pool.submit(function, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            self._restart(pool)
+            raise TimeoutError(
+                f"Rendering the plot took longer than {self.timeout:g} seconds."
+            ) from None
+        except BrokenProcessPool:
+            self._restart(pool)
+            raise
+
+    def _restart(self, pool: ProcessPoolExecutor) -> None:
+        """Stop the workers of a pool, including a stuck render, and start afresh."""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        # Renders of other sessions still running in this pool fail and can be retried
+        if hasattr(pool, "terminate_workers"):
+            pool.terminate_workers()
+            return
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
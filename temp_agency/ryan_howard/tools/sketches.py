@@ -0,0 +1,377 @@
+"""
+Approximate column statistics from sketches, for datasets too large to scan exactly
+on every question.
+
+A column is summarized by:
+
+- quantiles: a uniform random sample of QUANTILE_SAMPLE_SIZE values, whose
+  quantiles are within a rank error of sqrt(ln(2 / (1 - CONFIDENCE)) / (2 k)) of
+  the true ones at the given confidence (Dvoretzky-Kiefer-Wolfowitz inequality);
+- distinct count: a HyperLogLog sketch (2^HLL_PRECISION registers), with a
+  relative standard error of 1.04 / sqrt(2^HLL_PRECISION);
+- frequencies: a count-min sketch, which overestimates a value's count by at most
+  e / CMS_WIDTH of the rows with probability 1 - exp(-CMS_DEPTH).
+
+The sample is drawn when the column is sketched; the two hash sketches are built
+in one vectorized pass over 64-bit hashes of the values the first time a distinct
+count or frequencies are asked for. Count, mean, standard deviation, minimum and
+maximum are exact.
+
+Heavy hitters are the most frequent values of the sample, with their counts
+estimated from the sample and capped by the count-min sketch. A value whose
+count-min estimate is within the sketch's error bound may owe its whole estimate
+to collisions, so it is not reported.
+
+The sketches only answer faster than an exact computation where the exact one
+sorts or hashes every value (measured at 10 million rows): quantiles of numbers
+and datetimes, and frequencies of numbers and datetimes that are almost all
+distinct. Text needs its values hashed, which costs as much as counting them, and
+categoricals are counted exactly from their codes.
+"""
+
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Datasets with at least this many rows use approximate statistics by default
+APPROXIMATE_THRESHOLD_ROWS = 10_000_000
+
+HLL_PRECISION = 14
+CMS_WIDTH = 8192
+CMS_DEPTH = 5
+QUANTILE_SAMPLE_SIZE = 65536
+CONFIDENCE = 0.99
+# Values of the sample that are checked against the count-min sketch
+HEAVY_HITTER_CANDIDATES = 100
+# Columns whose sample has at least this ratio of distinct values are counted
+# faster by the sketches than exactly
+HIGH_CARDINALITY_SAMPLE_RATIO = 0.98
+
+# Hashes are processed in blocks of this many values, which stay in cache
+_BLOCK = 1 << 20
+_U64 = np.uint64
+
+
+def hash_values(series: pd.Series) -> np.ndarray:
+    """
+    Return a 64-bit hash of each value of a Series without missing values.
+
+    Categoricals and text hash each distinct value once and take the hashes by
+    code, which is much cheaper than hashing every string.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        uniques = series.cat.categories
+    elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+        codes, uniques = pd.factorize(series)
+    else:
+        return pd.util.hash_pandas_object(series, index=False).to_numpy(dtype=_U64)
+    return pd.util.hash_array(np.asarray(uniques, dtype=object)).take(codes)
+
+
+class HyperLogLog:
+    """
+    Distinct-count sketch over 64-bit hashes.
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes: np.ndarray) -> None:
+        p = self.precision
+        # Low bits dropped before the float conversion, keeping the marker bit
+        low_bits = min(11, p - 1)
+        # Occurrences of each (register, rank) pair; a register holds its highest rank
+        seen = np.zeros((1 << p) * 64, dtype=np.int64)
+        for start in range(0, len(hashes), _BLOCK):
+            block = hashes[start:start + _BLOCK]
+            # The marker bit bounds the rank when the remaining bits are all zero
+            rest = (block << _U64(p)) | _U64(1 << (p - 1))
+            # Exact in float64 once the low bits are dropped
+            bit_length = np.frexp((rest >> _U64(low_bits)).astype(np.float64))[1] + low_bits
+            index = (block >> _U64(64 - p)).view(np.int64)
+            seen += np.bincount(index * 64 + (65 - bit_length), minlength=len(seen))
+        ranks = np.arange(64, dtype=np.uint8)
+        highest = np.max(np.where(seen.reshape(-1, 64) > 0, ranks, 0), axis=1)
+        np.maximum(self.registers, highest.astype(np.uint8), out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            raw = m * math.log(m / zeros)
+        return int(round(raw))
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of the estimate."""
+        return 1.04 / math.sqrt(len(self.registers))
+
+
+class CountMinSketch:
+    """
+    Frequency sketch over 64-bit hashes, with one multiply-shift hash per row.
+    """
+
+    def __init__(self, width: int = CMS_WIDTH, depth: int = CMS_DEPTH, seed: int = 0):
+        if width & (width - 1):
+            raise ValueError("The width of a count-min sketch must be a power of two.")
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.counts = np.zeros((depth, width), dtype=np.int64)
+        rng = np.random.default_rng(seed)
+        # Odd multipliers make each row's hash a universal multiply-shift hash
+        self._a = rng.integers(1, 2**63, size=depth, dtype=_U64) * _U64(2) + _U64(1)
+        self._shift = _U64(64 - int(math.log2(width)))
+
+    def _buckets(self, row: int, hashes: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        buckets = np.multiply(hashes, self._a[row], out=out)
+        np.right_shift(buckets, self._shift, out=buckets)
+        # Below the width, so the same integers as signed values
+        return buckets.view(np.int64)
+
+    def update(self, hashes: np.ndarray) -> None:
+        self.total += len(hashes)
+        buffer = np.empty(min(len(hashes), _BLOCK), dtype=_U64)
+        for start in range(0, len(hashes), _BLOCK):
+            block = hashes[start:start + _BLOCK]
+            for row in range(self.depth):
+                buckets = self._buckets(row, block, buffer[:len(block)])
+                self.counts[row] += np.bincount(buckets, minlength=self.width)
+
+    def estimate(self, hashes: np.ndarray) -> np.ndarray:
+        """Upper estimates of the counts of the values with these hashes."""
+        return np.min(
+            [self.counts[row][self._buckets(row, hashes)] for row in range(self.depth)],
+            axis=0,
+        )
+
+    @property
+    def error_bound(self) -> float:
+        """Maximum overestimate of a count, with probability `confidence`."""
+        return math.e / self.width * self.total
+
+    @property
+    def confidence(self) -> float:
+        return 1 - math.exp(-self.depth)
+
+
+def quantiles_faster_than_exact(series: pd.Series) -> bool:
+    """
+    Whether a sample gives a column's quantiles faster than sorting it: for numbers
+    and datetimes.
+    """
+    if pd.api.types.is_bool_dtype(series):
+        return False
+    return pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series)
+
+
+def quantile_rank_error(sample_size: int, population: int, confidence: float = CONFIDENCE) -> float:
+    """
+    Bound on the rank error of quantiles estimated from a uniform sample, as a
+    fraction of the rows; 0 when the sample is the whole population.
+    """
+    if sample_size >= population:
+        return 0.0
+    return math.sqrt(math.log(2 / (1 - confidence)) / (2 * sample_size))
+
+
+class ColumnSketch:
+    """
+    Sample and exact moments of one column, built by `sketch_column`, and its hash
+    sketches, built on first use.
+    """
+
+    def __init__(self, column: pd.Series, nulls: int):
+        self.name = column.name
+        self.rows = len(column)
+        self.nulls = nulls
+        self.sample: Optional[pd.Series] = None
+        self.sample_positions: Optional[np.ndarray] = None
+        self.sample_hashes: Optional[np.ndarray] = None
+        # The sample as numbers (nanoseconds for datetimes), for quantiles
+        self.sample_numbers: Optional[np.ndarray] = None
+        self.moments: Dict[str, Any] = {}
+        self.kind = "categorical"
+        # The column, until the hash sketches are built from it
+        self._column: Optional[pd.Series] = column
+        self._distinct: Optional[HyperLogLog] = None
+        self._frequencies: Optional[CountMinSketch] = None
+
+    @property
+    def count(self) -> int:
+        return self.rows - self.nulls
+
+    @property
+    def distinct(self) -> HyperLogLog:
+        self._build_hash_sketches()
+        return self._distinct
+
+    @property
+    def frequencies(self) -> CountMinSketch:
+        self._build_hash_sketches()
+        return self._frequencies
+
+    def _build_hash_sketches(self) -> None:
+        if self._distinct is not None:
+            return
+        values = self._column.dropna() if self.nulls else self._column
+        hashes = hash_values(values)
+        distinct, frequencies = HyperLogLog(), CountMinSketch()
+        distinct.update(hashes)
+        frequencies.update(hashes)
+        self.sample_hashes = hashes[self.sample_positions]
+        self._distinct, self._frequencies = distinct, frequencies
+        self._column = None
+
+    def counted_faster_than_exact(self) -> bool:
+        """
+        Whether the hash sketches give distinct counts and frequencies faster than
+        counting every value: for numbers and datetimes that are almost all distinct.
+        """
+        if self.kind == "categorical" or self.sample is None or not len(self.sample):
+            return False
+        distinct = self.sample.nunique()
+        return distinct >= HIGH_CARDINALITY_SAMPLE_RATIO * len(self.sample)
+
+    def heavy_hitters(self, k: int = 10) -> List[Dict[str, Any]]:
+        """
+        The most frequent values with their estimated counts and shares.
+
+        Counts are the sample's scaled to the column, capped by the count-min
+        estimate, and exact when the sample is the whole column. Values whose
+        count-min estimate is within its error bound are left out, so a column
+        of mostly distinct values may have none.
+        """
+        if self.sample is None or not len(self.sample):
+            return []
+        codes, uniques = pd.factorize(self.sample, sort=False)
+        sample_counts = np.bincount(codes)
+        top = np.argsort(-sample_counts, kind="stable")[:HEAVY_HITTER_CANDIDATES]
+        counts = sample_counts[top].astype(np.float64)
+        if len(self.sample) < self.count:
+            counts *= self.count / len(self.sample)
+            # The hash of a candidate is the hash of its first occurrence in the sample
+            first = np.full(len(uniques), -1, dtype=np.int64)
+            first[codes[::-1]] = np.arange(len(codes))[::-1]
+            upper = self.frequencies.estimate(self.sample_hashes[first[top]])
+            keep = upper > self.frequencies.error_bound
+            top, counts = top[keep], np.minimum(counts[keep], upper[keep])
+        order = np.argsort(-counts, kind="stable")[:k]
+        values = pd.Series(uniques).take(top[order]).tolist()
+        counts = np.rint(counts[order]).astype(np.int64).tolist()
+        return [
+            {"value": value, "count": count, "share": count / self.rows if self.rows else 0.0}
+            for value, count in zip(values, counts)
+        ]
+
+    def describe(self) -> Dict[str, Any]:
+        """
+        Summary statistics with the keys of `Series.describe`, approximate where
+        noted by `error_bounds`.
+        """
+        stats: Dict[str, Any] = {"count": self.count}
+        if self.kind == "categorical":
+            top = self.heavy_hitters(1)
+            stats["unique"] = self.distinct.estimate()
+            stats["top"] = top[0]["value"] if top else None
+            stats["freq"] = top[0]["count"] if top else None
+            return stats
+        stats.update(self.moments)
+        if self.sample_numbers is not None and len(self.sample_numbers):
+            quantiles = np.quantile(self.sample_numbers, [0.25, 0.5, 0.75])
+        else:
+            quantiles = [np.nan] * 3
+        for label, value in zip(["25%", "50%", "75%"], quantiles):
+            stats[label] = float(value)
+        if self.kind == "datetime":
+            stats = {
+                stat: pd.Timestamp(int(value)) if stat != "count" and not pd.isna(value) else value
+                for stat, value in stats.items()
+                if stat != "std"
+            }
+        order = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+        return {
+            stat: None if pd.isna(stats[stat]) else stats[stat]
+            for stat in order
+            if stat in stats
+        }
+
+    def error_bounds(self) -> Dict[str, Any]:
+        """
+        Error bounds of the approximate statistics.
+        """
+        sample_size = len(self.sample) if self.sample is not None else 0
+        return {
+            "confidence": CONFIDENCE,
+            "distinct_relative_std_error": round(self.distinct.relative_error, 6),
+            "frequency_overestimate_max": int(math.ceil(self.frequencies.error_bound)),
+            "frequency_confidence": round(self.frequencies.confidence, 6),
+            "quantile_rank_error": round(
+                quantile_rank_error(sample_size, self.count, CONFIDENCE), 6
+            ),
+            "quantile_sample_size": sample_size,
+        }
+
+
+def sketch_column(
+    series: pd.Series, sample_size: int = QUANTILE_SAMPLE_SIZE, seed: int = 0
+) -> ColumnSketch:
+    """
+    Draw the sample and compute the exact moments of a column; its hash sketches
+    are built when first used.
+    """
+    null_mask = series.isna().to_numpy()
+    values = series[~null_mask] if null_mask.any() else series
+    sketch = ColumnSketch(series, int(null_mask.sum()))
+
+    if len(values) > sample_size:
+        rng = np.random.default_rng(seed)
+        positions = np.sort(rng.choice(len(values), sample_size, replace=False))
+    else:
+        positions = np.arange(len(values))
+    sketch.sample_positions = positions
+
+    if pd.api.types.is_datetime64_any_dtype(values):
+        sketch.kind = "datetime"
+        numbers = values.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    elif pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        sketch.kind = "numeric"
+        numbers = values.to_numpy(dtype=np.float64)
+    else:
+        numbers = None
+
+    sketch.sample = values.iloc[positions]
+    if numbers is not None:
+        sketch.sample_numbers = numbers[positions].astype(np.float64)
+        if len(numbers):
+            sketch.moments = {
+                "mean": float(np.mean(numbers, dtype=np.float64)),
+                "std": float(np.std(numbers, ddof=1, dtype=np.float64)) if len(numbers) > 1 else np.nan,
+                "min": numbers.min().item(),
+                "max": numbers.max().item(),
+            }
+    return sketch
+
+
+def combined_error_bounds(sketches: List[ColumnSketch]) -> Dict[str, Any]:
+    """
+    Error bounds that hold for every one of several column sketches.
+    """
+    bounds = [sketch.error_bounds() for sketch in sketches]
+    if not bounds:
+        return {}
+    combined = dict(bounds[0])
+    for bound in bounds[1:]:
+        for key in ("frequency_overestimate_max", "quantile_rank_error"):
+            combined[key] = max(combined[key], bound[key])
+    combined["quantile_sample_size"] = min(b["quantile_sample_size"] for b in bounds)
+    return combined
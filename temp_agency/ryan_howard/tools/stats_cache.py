@@ -0,0 +1,48 @@
+"""
+Cache of results computed from a session's DataFrame, stamped with its version.
+
+Every assignment of a session's DataFrame increments the workspace's version, and
+the cache drops everything computed for an older version on its next use, so a
+tool called again on an unchanged dataset returns the stored result instead of
+scanning the data again. Results are stored under keys chosen by the caller,
+typically one per column, so only the columns that are asked about are computed.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class StatsCache:
+    """
+    Results computed from one version of a DataFrame, by key.
+    """
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self._values: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, version: int, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the result stored under `key` for this version of the DataFrame,
+        computing and storing it with `compute` if needed.
+        """
+        with self._lock:
+            if version != self.version:
+                self._values.clear()
+                self.version = version
+            if key in self._values:
+                return self._values[key]
+        value = compute()
+        with self._lock:
+            if version == self.version:
+                self._values[key] = value
+        return value
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"version": self.version, "values": self._values}
+
+    def __setstate__(self, data: Dict[str, Any]) -> None:
+        self.__init__()
+        self.version = data["version"]
+        self._values = data["values"]
@@ -0,0 +1,292 @@
+"""
+Per-session DataFrame workspaces with a global memory budget.
+
+Every A2A context (which is also the ADK session id) gets its own workspace, so
+concurrent conversations never see or overwrite each other's data. The memory of
+all workspaces held in memory is kept under one budget: when it is exceeded, the
+least recently used workspaces are pickled to a spill directory and dropped from
+memory, and they are loaded back transparently the next time their session calls
+a tool. Unless configured, the spill directory is a private directory created for
+the process, since unpickling a file someone else could write is unsafe, and it is
+removed when the process exits.
+
+Sessions are never closed explicitly, so workspaces not used for a while are
+discarded, in memory or on disk, and the spilled workspaces are kept under a size
+cap by discarding the least recently used ones. A session whose workspace was
+discarded starts again without data.
+"""
+
+import atexit
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import pandas as pd
+
+
+# Session used when a tool is called outside of an ADK invocation
+DEFAULT_SESSION = "default"
+
+
+def session_id_of(tool_context: Any) -> str:
+    """
+    Return the session id of an ADK tool context, or the default session.
+
+    Args:
+        tool_context (ToolContext, optional): The context ADK passes to tools.
+
+    Returns:
+        str: The session id, which the A2A executor sets to the task's contextId.
+    """
+    if tool_context is None:
+        return DEFAULT_SESSION
+    return tool_context.session.id
+
+
+def frame_nbytes(df: Optional[pd.DataFrame]) -> int:
+    """
+    Return the memory used by a DataFrame, including the contents of object columns.
+    """
+    if df is None:
+        return 0
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+class Workspace:
+    """
+    The data of one session: the active DataFrame and any per-session state.
+
+    `version` counts the assignments of `df`, so results computed from the
+    DataFrame can be reused until it changes. `nbytes` is the memory measured for
+    the current version: the DataFrame's, plus what state values with an
+    `nbytes_beyond(df)` method (such as pipeline checkpoints) hold besides it.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.state: Dict[str, Any] = {}
+        self.version = 0
+        self.nbytes = 0
+        self._df: Optional[pd.DataFrame] = None
+        self._users = 0
+        self._measured_version: Optional[int] = None
+
+    @property
+    def df(self) -> Optional[pd.DataFrame]:
+        return self._df
+
+    @df.setter
+    def df(self, value: Optional[pd.DataFrame]) -> None:
+        self._df = value
+        self.version += 1
+
+    def measure(self) -> int:
+        """
+        Measure the memory of the workspace if the DataFrame changed since it was
+        last measured; a deep measurement scans every value of object columns.
+        """
+        if self._measured_version != self.version:
+            self.nbytes = frame_nbytes(self._df) + sum(
+                value.nbytes_beyond(self._df)
+                for value in self.state.values()
+                if hasattr(value, "nbytes_beyond")
+            )
+            self._measured_version = self.version
+        return self.nbytes
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "df": self._df,
+            "state": self.state,
+            "version": self.version,
+        }
+
+    def __setstate__(self, data: Dict[str, Any]) -> None:
+        self.__init__(data["session_id"])
+        self._df = data["df"]
+        self.state = data["state"]
+        self.version = data.get("version", 0)
+        self.measure()
+
+
+class WorkspaceManager:
+    """
+    Holds the workspaces of all sessions, least recently used first, and spills
+    workspaces to disk to keep their total memory under the budget.
+
+    A workspace that is in use by a tool call is never spilled or discarded, and the
+    workspace a call has just used stays in memory even when it alone exceeds the
+    budget.
+    """
+
+    def __init__(
+        self,
+        memory_budget_bytes: int,
+        spill_dir: Optional[str] = None,
+        spill_max_bytes: Optional[int] = None,
+        idle_seconds: Optional[float] = None,
+    ):
+        """
+        Args:
+            memory_budget_bytes (int): Total memory of the workspaces kept in memory.
+            spill_dir (str, optional): Directory evicted workspaces are written to.
+                Defaults to a private directory created in the system temp directory
+                on the first spill.
+            spill_max_bytes (int, optional): Total size the spilled workspaces are
+                kept under. Defaults to no limit.
+            idle_seconds (float, optional): Seconds after its last use a workspace is
+                discarded. Defaults to never.
+        """
+        self.memory_budget_bytes = memory_budget_bytes
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+        self.idle_seconds = idle_seconds
+        self._resident: "OrderedDict[str, Workspace]" = OrderedDict()
+        # Least recently used first, with the size of the file
+        self._spilled: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._private_spill_dir: Optional[str] = None
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def use(self, session_id: str) -> Iterator[Workspace]:
+        """
+        Check out the workspace of a session for the duration of a tool call,
+        loading it from disk if it was spilled. On exit its memory is measured
+        again if its DataFrame changed, and the budget is enforced.
+        """
+        with self._lock:
+            workspace = self._checkout(session_id)
+            workspace._users += 1
+        try:
+            yield workspace
+        finally:
+            with self._lock:
+                workspace._users -= 1
+                self._last_used[session_id] = time.monotonic()
+                workspace.measure()
+                self._enforce_budget(keep=session_id)
+
+    def get(self, session_id: str) -> Workspace:
+        """
+        Return the workspace of a session without checking it out.
+        """
+        with self._lock:
+            workspace = self._checkout(session_id)
+            self._enforce_budget(keep=session_id)
+            return workspace
+
+    def drop(self, session_id: str) -> None:
+        """
+        Discard the workspace of a session, in memory and on disk.
+        """
+        with self._lock:
+            self._discard(session_id)
+
+    def close(self) -> None:
+        """
+        Discard the spilled workspaces, and remove the spill directory if it was
+        created for this manager.
+        """
+        with self._lock:
+            for session_id in list(self._spilled):
+                self._discard(session_id)
+            if self._private_spill_dir is not None:
+                shutil.rmtree(self._private_spill_dir, ignore_errors=True)
+                self.spill_dir = self._private_spill_dir = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the number and memory of the workspaces in memory and on disk.
+        """
+        with self._lock:
+            return {
+                "resident_sessions": len(self._resident),
+                "spilled_sessions": len(self._spilled),
+                "resident_bytes": sum(w.nbytes for w in self._resident.values()),
+                "spilled_bytes": sum(size for _, size in self._spilled.values()),
+                "memory_budget_bytes": self.memory_budget_bytes,
+            }
+
+    def _checkout(self, session_id: str) -> Workspace:
+        self._discard_idle()
+        workspace = self._resident.pop(session_id, None)
+        if workspace is None:
+            path, _ = self._spilled.pop(session_id, (None, 0))
+            workspace = self._load(path) if path else Workspace(session_id)
+        # Most recently used last
+        self._resident[session_id] = workspace
+        self._last_used[session_id] = time.monotonic()
+        return workspace
+
+    def _discard(self, session_id: str) -> None:
+        self._resident.pop(session_id, None)
+        self._last_used.pop(session_id, None)
+        path, _ = self._spilled.pop(session_id, (None, 0))
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    def _discard_idle(self) -> None:
+        if self.idle_seconds is None:
+            return
+        cutoff = time.monotonic() - self.idle_seconds
+        for session_id, last_used in list(self._last_used.items()):
+            workspace = self._resident.get(session_id)
+            if last_used < cutoff and not (workspace and workspace._users):
+                self._discard(session_id)
+
+    def _enforce_spill_cap(self) -> None:
+        if self.spill_max_bytes is None:
+            return
+        total = sum(size for _, size in self._spilled.values())
+        for session_id in list(self._spilled):
+            if total <= self.spill_max_bytes:
+                break
+            total -= self._spilled[session_id][1]
+            self._discard(session_id)
+
+    def _enforce_budget(self, keep: str) -> None:
+        total = sum(w.nbytes for w in self._resident.values())
+        for session_id in list(self._resident):
+            if total <= self.memory_budget_bytes:
+                break
+            workspace = self._resident[session_id]
+            if session_id == keep or workspace._users or workspace.df is None:
+                continue
+            self._spill(workspace)
+            del self._resident[session_id]
+            total -= workspace.nbytes
+        self._enforce_spill_cap()
+
+    def _spill_path(self, session_id: str) -> str:
+        name = hashlib.sha256(session_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, f"{name}.pkl")
+
+    def _spill(self, workspace: Workspace) -> None:
+        if self.spill_dir is None:
+            # Readable and writable by this user only
+            self.spill_dir = tempfile.mkdtemp(prefix="ryan_howard_workspaces_")
+            self._private_spill_dir = self.spill_dir
+            atexit.register(self.close)
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = self._spill_path(workspace.session_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(workspace, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._spilled[workspace.session_id] = (path, os.path.getsize(path))
+
+    @staticmethod
+    def _load(path: str) -> Workspace:
+        with open(path, "rb") as f:
+            workspace = pickle.load(f)
+        os.remove(path)
+        return workspace